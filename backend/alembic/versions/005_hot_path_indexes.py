@@ -0,0 +1,72 @@
+"""Add indexes for hot filter paths
+
+Revision ID: 005_hot_path_indexes
+Revises: 004_rename_knowledge_chunks_metadata
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_hot_path_indexes'
+down_revision: Union[str, None] = '004_rename_knowledge_chunks_metadata'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns / expressions) - chosen from the query shapes in services and API
+INDEXES = [
+    # Program: WHERE event_id = ? ORDER BY date_start (+ day range filter)
+    ('ix_event_items_event_id_date_start', 'event_items', ['event_id', 'date_start']),
+    # FK lookups on location/module delete (ON DELETE SET NULL) and per-location items
+    ('ix_event_items_location_id', 'event_items', ['location_id']),
+    ('ix_event_items_module_id', 'event_items', ['module_id']),
+    # PK (event_item_id, speaker_id) covers item side; speaker side is for cascades
+    ('ix_event_speakers_speaker_id', 'event_speakers', ['speaker_id']),
+    # Modules: WHERE event_id = ? [AND enabled] ORDER BY "order"
+    ('ix_modules_event_id_order', 'modules', ['event_id', sa.text('"order"')]),
+    # Chunks: WHERE event_id = ? OR event_id IS NULL (btree serves IS NULL too)
+    ('ix_knowledge_chunks_event_id', 'knowledge_chunks', ['event_id']),
+    ('ix_assistant_knowledge_event_id', 'assistant_knowledge', ['event_id']),
+    # My registrations: WHERE user_id = ?; (event_item_id, user_id) unique covers item side
+    ('ix_registrations_user_id', 'registrations', ['user_id']),
+    ('ix_speakers_event_id', 'speakers', ['event_id']),
+    ('ix_locations_event_id', 'locations', ['event_id']),
+    ('ix_locations_zone_id', 'locations', ['zone_id']),
+    ('ix_zones_event_id', 'zones', ['event_id']),
+    # News feed: WHERE event_id = ? ORDER BY published_at DESC NULLS LAST LIMIT n
+    ('ix_news_event_id_published_at', 'news', ['event_id', sa.text('published_at DESC NULLS LAST')]),
+    # Inbox / unread counters and user cascades
+    ('ix_messages_to_user_id_read_at', 'messages', ['to_user_id', 'read_at']),
+    ('ix_messages_from_user_id', 'messages', ['from_user_id']),
+    ('ix_messages_event_id', 'messages', ['event_id']),
+]
+
+
+def upgrade() -> None:
+    # Check existing indexes (safe migration: create_all may have created some)
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    existing_tables = inspector.get_table_names()
+    pending = []
+    for name, table, columns in INDEXES:
+        if table not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing_indexes:
+            pending.append((name, table, columns))
+
+    # CONCURRENTLY doesn't block writes, but can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in pending:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,59 @@
+"""Add pg_trgm indexes for program, speaker and location search
+
+Revision ID: 006_trigram_search
+Revises: 005_hot_path_indexes
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_trigram_search'
+down_revision: Union[str, None] = '005_hot_path_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, column) - GIN gin_trgm_ops serves ILIKE '%q%', similarity and word_similarity operators
+INDEXES = [
+    ('ix_event_items_title_trgm', 'event_items', 'title'),
+    ('ix_event_items_description_trgm', 'event_items', 'description'),
+    ('ix_speakers_name_trgm', 'speakers', 'name'),
+    ('ix_speakers_company_trgm', 'speakers', 'company'),
+    ('ix_locations_name_trgm', 'locations', 'name'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    pending = []
+    for name, table, column in INDEXES:
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing_indexes:
+            pending.append((name, table, column))
+
+    # CONCURRENTLY doesn't block writes, but can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, column in pending:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    # pg_trgm extension is left installed: other objects may depend on it
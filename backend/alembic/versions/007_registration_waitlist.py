@@ -0,0 +1,57 @@
+"""Add waitlist position to registrations
+
+Revision ID: 007_registration_waitlist
+Revises: 006_trigram_search
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_registration_waitlist'
+down_revision: Union[str, None] = '006_trigram_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE SEQUENCE IF NOT EXISTS registrations_waitlist_position_seq')
+
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = [col['name'] for col in inspector.get_columns('registrations')]
+    if 'waitlist_position' not in columns:
+        op.add_column('registrations', sa.Column('waitlist_position', sa.BigInteger(), nullable=True))
+
+    # Rows already marked as waitlist keep their registration order
+    op.execute("""
+        UPDATE registrations
+        SET waitlist_position = nextval('registrations_waitlist_position_seq')
+        FROM (
+            SELECT id FROM registrations
+            WHERE status = 'waitlist' AND waitlist_position IS NULL
+            ORDER BY registered_at, id
+        ) AS waiting
+        WHERE registrations.id = waiting.id
+    """)
+
+    existing_indexes = {index['name'] for index in inspector.get_indexes('registrations')}
+    if 'ix_registrations_waitlist' not in existing_indexes:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_registrations_waitlist', 'registrations', ['event_item_id', 'waitlist_position'],
+                postgresql_where=sa.text("status = 'waitlist'"),
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_registrations_waitlist', table_name='registrations',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('registrations', 'waitlist_position')
+    op.execute('DROP SEQUENCE IF EXISTS registrations_waitlist_position_seq')
@@ -0,0 +1,60 @@
+"""Move seat accounting to event_item_seats counters
+
+Revision ID: 009_event_item_seats
+Revises: 008_idempotency_keys
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_event_item_seats'
+down_revision: Union[str, None] = '008_idempotency_keys'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    # Check if table exists (safe migration: create_all may have created it)
+    if 'event_item_seats' not in inspector.get_table_names():
+        op.create_table(
+            'event_item_seats',
+            sa.Column('event_item_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('taken', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['event_item_id'], ['event_items.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('event_item_id'),
+        )
+
+    # Counters start from the registrations themselves (repairs any drift of the old column)
+    op.execute("""
+        INSERT INTO event_item_seats (event_item_id, taken, reconciled_at)
+        SELECT i.id, count(r.id) FILTER (WHERE r.status IN ('confirmed', 'pending')), now()
+        FROM event_items i
+        LEFT JOIN registrations r ON r.event_item_id = i.id
+        GROUP BY i.id
+        ON CONFLICT (event_item_id) DO NOTHING
+    """)
+
+    columns = [c['name'] for c in inspector.get_columns('event_items')]
+    if 'registered_count' in columns:
+        op.drop_column('event_items', 'registered_count')
+
+
+def downgrade() -> None:
+    op.add_column('event_items', sa.Column('registered_count', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE event_items i SET registered_count = s.taken
+        FROM event_item_seats s
+        WHERE s.event_item_id = i.id
+    """)
+    op.execute("UPDATE event_items SET registered_count = 0 WHERE registered_count IS NULL")
+    op.drop_table('event_item_seats')
@@ -0,0 +1,30 @@
+"""Add type to locations
+
+Revision ID: 010_location_type
+Revises: 009_event_item_seats
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_location_type'
+down_revision: Union[str, None] = '009_event_item_seats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = [col['name'] for col in inspector.get_columns('locations')]
+    if 'type' not in columns:
+        op.add_column('locations', sa.Column('type', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('locations', 'type')
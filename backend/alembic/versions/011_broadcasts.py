@@ -0,0 +1,75 @@
+"""Add broadcasts and broadcast_deliveries tables
+
+Revision ID: 011_broadcasts
+Revises: 010_location_type
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_broadcasts'
+down_revision: Union[str, None] = '010_location_type'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Check if tables exist (safe migration: create_all may have created them)
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+
+    if 'broadcasts' not in tables:
+        op.create_table(
+            'broadcasts',
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('event_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('news_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('text', sa.Text(), nullable=False),
+            sa.Column('audience', sa.String(length=20), nullable=False),
+            sa.Column('audience_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+            sa.Column('total', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('sent', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('failed', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('blocked', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('locked_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['news_id'], ['news.id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_broadcasts_event_id', 'broadcasts', ['event_id'])
+
+    if 'broadcast_deliveries' not in tables:
+        op.create_table(
+            'broadcast_deliveries',
+            sa.Column('broadcast_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+            sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+            sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('error', sa.String(length=255), nullable=True),
+            sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['broadcast_id'], ['broadcasts.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('broadcast_id', 'telegram_id'),
+        )
+        op.create_index(
+            'ix_broadcast_deliveries_pending',
+            'broadcast_deliveries',
+            ['broadcast_id', 'telegram_id'],
+            postgresql_where=sa.text("status = 'pending'"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('broadcast_deliveries')
+    op.drop_table('broadcasts')
@@ -0,0 +1,55 @@
+"""Add event_item_reminders table
+
+Revision ID: 012_event_item_reminders
+Revises: 011_broadcasts
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_event_item_reminders'
+down_revision: Union[str, None] = '011_broadcasts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Check if table exists (safe migration: create_all may have created it)
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'event_item_reminders' not in inspector.get_table_names():
+        op.create_table(
+            'event_item_reminders',
+            sa.Column('event_item_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('remind_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['event_item_id'], ['event_items.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('event_item_id'),
+        )
+        op.create_index(
+            'ix_event_item_reminders_pending',
+            'event_item_reminders',
+            ['remind_at'],
+            postgresql_where=sa.text('sent_at IS NULL'),
+        )
+
+    # Reminders of upcoming items (default lead; the scheduler realigns them to
+    # REMINDER_LEAD_MINUTES on startup)
+    op.execute("""
+        INSERT INTO event_item_reminders (event_item_id, remind_at)
+        SELECT id, date_start - interval '30 minutes'
+        FROM event_items
+        WHERE date_start > now() AND status != 'cancelled'
+        ON CONFLICT (event_item_id) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_item_reminders_pending', table_name='event_item_reminders')
+    op.drop_table('event_item_reminders')
@@ -1,4 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.utils.fast_json import FastJSONResponse
 
 from app.api import (
     auth,
@@ -12,9 +16,12 @@ from app.api import (
     map,
     news,
     admin_auth,
+    telegram,
 )
 
-api_router = APIRouter()
+api_router = APIRouter(
+    default_response_class=FastJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
+)
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(events.router, prefix="/events", tags=["events"])
@@ -27,3 +34,4 @@ api_router.include_router(admin_auth.router, prefix="/admin", tags=["admin-auth"
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 api_router.include_router(map.router, tags=["map"])
 api_router.include_router(news.router, prefix="/news", tags=["news"])
+api_router.include_router(telegram.router, tags=["telegram"])
@@ -1,18 +1,35 @@
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Literal
 from uuid import UUID
 from sqlalchemy import select
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, async_session_maker
 from app.models import KnowledgeChunk
 from app.schemas import (
     EventCreate, EventUpdate, EventResponse, EventListResponse,
     ModuleCreate, ModuleUpdate, ModuleResponse, ModuleReorder,
     AssistantKnowledgeCreate, AssistantKnowledgeResponse,
-    KnowledgeChunkResponse, KnowledgeChunkRefreshRequest
+    KnowledgeChunkResponse, KnowledgeChunkRefreshRequest,
+    RegistrationBulkAction, BroadcastCreate, BroadcastResponse
 )
-from app.services import EventService, ModuleService, AssistantService, KnowledgeChunkService
+from app.services import (
+    EventService, ModuleService, AssistantService, KnowledgeChunkService, RegistrationService
+)
+from app.services.assistant_service import answer_cache
+from app.services.broadcast_service import BroadcastService
+from app.services.broadcaster import broadcaster, wake_on_commit
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.seat_reconciler import seat_reconciler
+from app.bot.middlewares import outgoing_limiter, throttling_middleware
+from app.bot.updates import update_pipeline
 from app.api.admin_auth import get_current_admin_token
+from app.utils.fast_json import FastJSONResponse, dumps
+from app.utils.idempotency import Idempotency, get_idempotency
 
 router = APIRouter(dependencies=[Depends(get_current_admin_token)])
 
@@ -37,12 +54,18 @@ async def admin_get_events(
 @router.post("/events", response_model=EventResponse)
 async def admin_create_event(
     data: EventCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
+    admin: str = Depends(get_current_admin_token)
 ):
     """Create a new event (admin)"""
+    replayed = await idempotency.replay(admin)
+    if replayed is not None:
+        return replayed
+    
     service = EventService(db)
     event = await service.create(data)
-    return event
+    return await idempotency.save(EventResponse.model_validate(event))
 
 
 @router.put("/events/{event_id}", response_model=EventResponse)
@@ -98,11 +121,17 @@ async def admin_get_module_types(
 async def admin_create_module(
     data: ModuleCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
+    admin: str = Depends(get_current_admin_token)
 ):
     """Create a new module (admin - uses JWT token, no Telegram required)"""
+    replayed = await idempotency.replay(admin)
+    if replayed is not None:
+        return replayed
+    
     service = ModuleService(db)
     module = await service.create(data)
-    return module
+    return await idempotency.save(ModuleResponse.model_validate(module))
 
 
 @router.put("/modules/{module_id}", response_model=ModuleResponse)
@@ -152,15 +181,21 @@ async def admin_reorder_modules(
 async def admin_add_knowledge(
     data: AssistantKnowledgeCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
+    admin: str = Depends(get_current_admin_token)
 ):
     """Add knowledge entry (admin)"""
+    replayed = await idempotency.replay(admin)
+    if replayed is not None:
+        return replayed
+    
     service = AssistantService(db)
     knowledge = await service.add_knowledge(
         event_id=data.event_id,
         content=data.content,
         content_type=data.content_type
     )
-    return knowledge
+    return await idempotency.save(AssistantKnowledgeResponse.model_validate(knowledge))
 
 
 @router.get("/knowledge")
@@ -185,6 +220,7 @@ async def admin_refresh_knowledge_chunks(
         chunks = await service.refresh_event_chunks(data.event_id)
     else:
         chunks = await service.refresh_global_chunks()
+    answer_cache.clear()
     return [KnowledgeChunkResponse.model_validate(chunk) for chunk in chunks]
 
 
@@ -202,7 +238,107 @@ async def admin_get_knowledge_chunks(
     else:
         query = query.where(KnowledgeChunk.event_id.is_(None))
     result = await db.execute(query)
-    return [KnowledgeChunkResponse.model_validate(chunk) for chunk in result.scalars().all()]
+    # Large listing: dump rows directly, skipping response_model re-validation
+    return FastJSONResponse([
+        KnowledgeChunkResponse.model_validate(chunk).model_dump()
+        for chunk in result.scalars().all()
+    ])
+
+
+# ==================== Registrations ====================
+
+EXPORT_BATCH_SIZE = 1000
+
+
+@router.post("/registrations/approve")
+async def admin_approve_registrations(
+    data: RegistrationBulkAction,
+    db: AsyncSession = Depends(get_db),
+):
+    """Approve pending registrations by ids and/or item/event (admin)"""
+    if not (data.ids or data.event_item_id or data.event_id):
+        raise HTTPException(status_code=400, detail="ids, event_item_id or event_id is required")
+    service = RegistrationService(db)
+    updated = await service.approve_many(data.ids, data.event_item_id, data.event_id)
+    return {"success": True, "updated": updated}
+
+
+@router.post("/registrations/reject")
+async def admin_reject_registrations(
+    data: RegistrationBulkAction,
+    db: AsyncSession = Depends(get_db),
+):
+    """Reject pending registrations by ids and/or item/event (admin)"""
+    if not (data.ids or data.event_item_id or data.event_id):
+        raise HTTPException(status_code=400, detail="ids, event_item_id or event_id is required")
+    service = RegistrationService(db)
+    updated = await service.reject_many(data.ids, data.event_item_id, data.event_id)
+    return {"success": True, "updated": updated}
+
+
+@router.post("/registrations/reconcile-seats")
+async def admin_reconcile_seats(
+    event_item_ids: list[UUID] = Query(None),
+):
+    """Repair seat counters from registrations now, all items or the given ones (admin)"""
+    repaired = await seat_reconciler.run_once(event_item_ids)
+    return {
+        "success": True,
+        "repaired": [
+            {"event_item_id": str(item_id), "before": before, "after": after}
+            for item_id, (before, after) in repaired.items()
+        ]
+    }
+
+
+@router.get("/registrations/export")
+async def admin_export_registrations(
+    event_item_id: UUID = Query(None),
+    event_id: UUID = Query(None),
+    status: str = Query(None),
+    format: Literal["csv", "ndjson"] = Query("csv"),
+):
+    """
+    Export registrations of an item or event as CSV or NDJSON (admin).
+    
+    Rows are streamed from a server-side cursor in batches. The export
+    opens its own session: get_db is closed before a streaming body is sent.
+    """
+    if not (event_item_id or event_id):
+        raise HTTPException(status_code=400, detail="event_item_id or event_id is required")
+    
+    async def generate():
+        async with async_session_maker() as session:
+            service = RegistrationService(session)
+            query = service.export_query(event_item_id, event_id, status)
+            columns = list(query.selected_columns.keys())
+            
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                # BOM: Excel opens UTF-8 CSV with Cyrillic correctly
+                buffer.write("\ufeff")
+                writer.writerow(columns)
+            
+            async for rows in service.stream_export(query, EXPORT_BATCH_SIZE):
+                if format == "csv":
+                    writer.writerows(rows)
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    yield b"".join(dumps(dict(row._mapping)) + b"\n" for row in rows)
+            
+            if format == "csv" and buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+    
+    scope = f"item-{event_item_id}" if event_item_id else f"event-{event_id}"
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="registrations-{scope}.{format}"'}
+    )
 
 
 # ==================== User Management ====================
@@ -220,3 +356,86 @@ async def admin_make_user_admin(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {"success": True, "user_id": str(user.id)}
+
+
+# ==================== Bot ====================
+
+@router.get("/bot/stats")
+async def admin_bot_stats():
+    """Get bot update pipeline, throttling, outgoing limit, broadcaster and reminder counters of this API worker (admin)"""
+    return {
+        "updates": update_pipeline.stats(),
+        "throttling": throttling_middleware.stats(),
+        "outgoing": outgoing_limiter.stats(),
+        "broadcasts": broadcaster.stats(),
+        "reminders": reminder_scheduler.stats(),
+    }
+
+
+@router.post("/broadcasts", response_model=BroadcastResponse)
+async def admin_create_broadcast(
+    data: BroadcastCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Send a message or news item to users through the bot, in the background (admin)"""
+    service = BroadcastService(db)
+    try:
+        broadcast = await service.create(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    wake_on_commit(db)
+    return broadcast
+
+
+@router.get("/broadcasts", response_model=list[BroadcastResponse])
+async def admin_get_broadcasts(
+    event_id: UUID = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get latest broadcasts (admin)"""
+    service = BroadcastService(db)
+    return await service.get_all(event_id, limit)
+
+
+@router.get("/broadcasts/{broadcast_id}")
+async def admin_get_broadcast(
+    broadcast_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get broadcast progress: counters, deliveries by status, send rate (admin)"""
+    service = BroadcastService(db)
+    broadcast = await service.get(broadcast_id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    
+    deliveries = await service.delivery_stats(broadcast_id)
+    done = broadcast.sent + broadcast.failed + broadcast.blocked
+    rate = None
+    if broadcast.started_at and done:
+        end = broadcast.finished_at or datetime.now(timezone.utc)
+        elapsed = (end - broadcast.started_at).total_seconds()
+        rate = round(done / elapsed, 1) if elapsed > 0 else None
+    return {
+        **BroadcastResponse.model_validate(broadcast).model_dump(mode="json"),
+        "deliveries": deliveries,
+        "messages_per_second": rate,
+        "eta_seconds": round(deliveries.get("pending", 0) / rate) if rate and broadcast.status == "running" else None,
+    }
+
+
+@router.post("/broadcasts/{broadcast_id}/{action}", response_model=BroadcastResponse)
+async def admin_control_broadcast(
+    broadcast_id: UUID,
+    action: Literal["pause", "resume", "cancel"],
+    db: AsyncSession = Depends(get_db)
+):
+    """Pause, resume or cancel a broadcast (admin)"""
+    status = {"pause": "paused", "resume": "pending", "cancel": "cancelled"}[action]
+    service = BroadcastService(db)
+    broadcast = await service.set_status(broadcast_id, status)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    if action == "resume":
+        wake_on_commit(db)
+    return broadcast
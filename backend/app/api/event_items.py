@@ -1,15 +1,25 @@
+import asyncio
+import time
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
 from app.models import User
 from app.schemas import EventItemCreate, EventItemUpdate, EventItemResponse
 from app.services import EventItemService
+from app.services.event_item_service import serialize_event_item
+from app.services.admission_queue import admission_queue, ticket_issued_at
 from app.api.deps import get_current_user, get_current_admin
+from app.utils.fast_json import FastJSONResponse
+from app.utils.idempotency import Idempotency, get_idempotency
 
 router = APIRouter()
 
+# A ticket of another worker is looked up in the database this often while waiting
+REMOTE_TICKET_POLL_SECONDS = 1.0
+
 
 @router.get("/{item_id}")
 async def get_event_item(
@@ -23,39 +33,26 @@ async def get_event_item(
     if not item:
         raise HTTPException(status_code=404, detail="Event item not found")
     
-    result = EventItemResponse.model_validate(item).model_dump()
-    result["available_spots"] = item.available_spots
-    result["is_full"] = item.is_full
-    
-    # Add location name
-    if item.location:
-        result["location_name"] = item.location.name
-    
-    # Add speakers
-    speakers = []
-    for es in item.speakers:
-        speakers.append({
-            "id": str(es.speaker.id),
-            "name": es.speaker.name,
-            "position": es.speaker.position,
-            "company": es.speaker.company,
-            "photo_url": es.speaker.photo_url
-        })
-    result["speakers"] = speakers
-    
-    return result
+    return serialize_event_item(item)
 
 
 @router.post("", response_model=EventItemResponse)
 async def create_event_item(
     data: EventItemCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
     current_user: User = Depends(get_current_admin)
 ):
     """Create a new event item (admin only)"""
+    replayed = await idempotency.replay(current_user.id)
+    if replayed is not None:
+        return replayed
+    
     service = EventItemService(db)
     item = await service.create(data)
-    return item
+    # Reload with location and speakers for the response card
+    item = await service.get_by_id(item.id)
+    return await idempotency.save(serialize_event_item(item))
 
 
 @router.put("/{item_id}", response_model=EventItemResponse)
@@ -91,38 +88,120 @@ async def delete_event_item(
 async def register_for_item(
     item_id: UUID,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
     current_user: User = Depends(get_current_user)
 ):
-    """Register for an event item"""
+    """
+    Register for an event item.
+    
+    With the admission queue enabled the request is queued and answered
+    with 202 and a ticket to poll at /{item_id}/register/tickets/{ticket_id}.
+    """
     from app.services import RegistrationService
     
+    replayed = await idempotency.replay(current_user.id)
+    if replayed is not None:
+        return replayed
+    
+    if settings.REGISTRATION_QUEUE_ENABLED:
+        ticket = admission_queue.enqueue(item_id, current_user.id)
+        content = {"success": True, "queued": True, **ticket.to_dict(admission_queue.position(ticket))}
+        if idempotency.key:
+            return await idempotency.save(content, status_code=202)
+        return FastJSONResponse(status_code=202, content=content)
+    
     service = RegistrationService(db)
     registration, message = await service.register(current_user.id, item_id)
     
     if not registration:
         raise HTTPException(status_code=400, detail=message)
     
-    return {
+    return await idempotency.save({
         "success": True,
         "message": message,
         "registration_id": str(registration.id),
-        "status": registration.status
-    }
+        "status": registration.status,
+        "waitlist_position": await service.get_waitlist_position(registration)
+    })
+
+
+@router.get("/{item_id}/register/tickets/{ticket_id}")
+async def get_registration_ticket(
+    item_id: UUID,
+    ticket_id: str,
+    wait: float = Query(0, ge=0, le=25, description="Seconds to wait for the result"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get result of a queued registration request.
+
+    No database connection is held while waiting: the session is
+    committed (and its connection returned to the pool) first.
+    """
+    from app.services import RegistrationService
+    
+    ticket = admission_queue.tickets.get(ticket_id)
+    if ticket and (ticket.user_id != current_user.id or ticket.event_item_id != item_id):
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    
+    if ticket:
+        await db.commit()
+        await admission_queue.wait(ticket, wait)
+        return ticket.to_dict(admission_queue.position(ticket))
+    
+    # Ticket was issued by another worker (or expired): answer from the database
+    issued_at = ticket_issued_at(ticket_id)
+    service = RegistrationService(db)
+    deadline = time.monotonic() + wait
+    while True:
+        registration = await service.get_registration(current_user.id, item_id)
+        if registration:
+            return {
+                "ticket_id": ticket_id,
+                "status": "done",
+                "position": None,
+                "success": registration.status != "cancelled",
+                "message": "",
+                "registration_id": str(registration.id),
+                "registration_status": registration.status,
+            }
+        if issued_at is None or time.time() - issued_at > settings.REGISTRATION_QUEUE_TICKET_TTL_SECONDS:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        await db.commit()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # Still queued on the worker that issued it; its position is known only there
+            return {
+                "ticket_id": ticket_id,
+                "status": "queued",
+                "position": None,
+                "success": True,
+                "message": "",
+                "registration_id": None,
+                "registration_status": None,
+            }
+        await asyncio.sleep(min(remaining, REMOTE_TICKET_POLL_SECONDS))
 
 
 @router.delete("/{item_id}/register")
 async def cancel_registration(
     item_id: UUID,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
     current_user: User = Depends(get_current_user)
 ):
     """Cancel registration for an event item"""
     from app.services import RegistrationService
     
+    replayed = await idempotency.replay(current_user.id)
+    if replayed is not None:
+        return replayed
+    
     service = RegistrationService(db)
     success, message = await service.cancel(current_user.id, item_id)
     
     if not success:
         raise HTTPException(status_code=400, detail=message)
     
-    return {"success": True, "message": message}
+    return await idempotency.save({"success": True, "message": message})
@@ -1,15 +1,23 @@
+from datetime import datetime, timezone
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models import User
-from app.schemas import EventResponse, EventListResponse, ModuleResponse
-from app.services import EventService, ModuleService
+from app.schemas import EventResponse, EventListResponse, ModuleResponse, SearchResponse, SearchSuggestion
+from app.services import EventService, ModuleService, BootstrapService, SearchService
+from app.services.program_snapshot import get_program_snapshot, get_seat_counts
 from app.api.deps import get_current_user, get_optional_user
+from app.utils.fast_json import FastJSONResponse
 
 router = APIRouter()
 
+# Bootstrap payload may be reused by the Mini App for a short time,
+# revalidation goes through ETag / If-None-Match
+BOOTSTRAP_CACHE_CONTROL = "private, max-age=30"
+
 
 @router.get("", response_model=EventListResponse)
 async def get_events(
@@ -54,6 +62,29 @@ async def get_event(
     return event
 
 
+@router.get("/{event_id}/bootstrap")
+async def get_event_bootstrap(
+    event_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_optional_user)
+):
+    """
+    Get everything the Mini App dashboard needs in one request:
+    event, modules, items, days, types, speakers, map and news.
+    """
+    service = BootstrapService()
+    payload = await service.build(event_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    etag = f'"{payload["version"]}"'
+    headers = {"ETag": etag, "Cache-Control": BOOTSTRAP_CACHE_CONTROL}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    return FastJSONResponse(content=payload, headers=headers)
+
+
 @router.get("/{event_id}/modules", response_model=list[ModuleResponse])
 async def get_event_modules(
     event_id: UUID,
@@ -77,10 +108,9 @@ async def get_event_items(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_optional_user)
 ):
-    """Get event items for an event with filters"""
+    """Get event items for an event with filters (served from program snapshot)"""
     from datetime import date as date_type
-    from app.services import EventItemService
-    from app.schemas import EventItemFilter, EventItemResponse
+    from app.schemas import EventItemFilter
     
     # Parse day filter
     day_filter = None
@@ -98,34 +128,66 @@ async def get_event_items(
         available_only=available_only
     )
     
-    service = EventItemService(db)
-    items = await service.get_by_event(event_id, filters)
-    
-    result = []
-    for item in items:
-        item_dict = EventItemResponse.model_validate(item).model_dump()
-        item_dict["available_spots"] = item.available_spots
-        item_dict["is_full"] = item.is_full
-        
-        # Add location name
-        if item.location:
-            item_dict["location_name"] = item.location.name
-        
-        # Add speakers
-        speakers = []
-        for es in item.speakers:
-            speakers.append({
-                "id": str(es.speaker.id),
-                "name": es.speaker.name,
-                "position": es.speaker.position,
-                "company": es.speaker.company,
-                "photo_url": es.speaker.photo_url
-            })
-        item_dict["speakers"] = speakers
-        
-        result.append(item_dict)
-    
-    return result
+    snapshot = await get_program_snapshot(db, event_id)
+    seats = await get_seat_counts(db, event_id)
+    return Response(content=snapshot.to_json(seats, filters), media_type="application/json")
+
+
+@router.get("/{event_id}/now")
+async def get_event_now(
+    event_id: UUID,
+    location: UUID = Query(None),
+    at: datetime = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_optional_user)
+):
+    """Get event items running now (or at a given moment), optionally in one location"""
+    snapshot = await get_program_snapshot(db, event_id)
+    positions = snapshot.schedule.now(at or datetime.now(timezone.utc), location)
+    seats = await get_seat_counts(db, event_id)
+    return Response(content=snapshot.render(positions, seats), media_type="application/json")
+
+
+@router.get("/{event_id}/next")
+async def get_event_next(
+    event_id: UUID,
+    location: UUID = Query(None),
+    at: datetime = Query(None),
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_optional_user)
+):
+    """Get nearest upcoming event items, optionally in one location"""
+    snapshot = await get_program_snapshot(db, event_id)
+    positions = snapshot.schedule.next(at or datetime.now(timezone.utc), location, limit)
+    seats = await get_seat_counts(db, event_id)
+    return Response(content=snapshot.render(positions, seats), media_type="application/json")
+
+
+@router.get("/{event_id}/search", response_model=SearchResponse)
+async def search_event(
+    event_id: UUID,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_optional_user)
+):
+    """Search event items, speakers and locations (typo tolerant)"""
+    service = SearchService(db)
+    return await service.search(event_id, q, limit)
+
+
+@router.get("/{event_id}/search/suggest", response_model=list[SearchSuggestion])
+async def suggest_event_search(
+    event_id: UUID,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=20),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_optional_user)
+):
+    """Get autocomplete suggestions for event search"""
+    service = SearchService(db)
+    return await service.suggest(event_id, q, limit)
 
 
 @router.get("/{event_id}/speakers")
@@ -143,7 +205,7 @@ async def get_event_speakers(
     result = await db.execute(query)
     speakers = result.scalars().all()
     
-    return [SpeakerResponse.model_validate(s) for s in speakers]
+    return FastJSONResponse([SpeakerResponse.model_validate(s).model_dump() for s in speakers])
 
 
 @router.get("/{event_id}/days")
@@ -153,11 +215,8 @@ async def get_event_days(
     current_user: User = Depends(get_optional_user)
 ):
     """Get days with events"""
-    from app.services import EventItemService
-    
-    service = EventItemService(db)
-    days = await service.get_days(event_id)
-    return [d.isoformat() for d in days]
+    snapshot = await get_program_snapshot(db, event_id)
+    return [d.isoformat() for d in snapshot.days]
 
 
 @router.get("/{event_id}/types")
@@ -167,8 +226,5 @@ async def get_event_types(
     current_user: User = Depends(get_optional_user)
 ):
     """Get unique event item types"""
-    from app.services import EventItemService
-    
-    service = EventItemService(db)
-    types = await service.get_unique_types(event_id)
-    return types
+    snapshot = await get_program_snapshot(db, event_id)
+    return snapshot.types
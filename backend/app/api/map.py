@@ -1,37 +1,202 @@
+from datetime import datetime, timezone
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.models import User, Location, Zone
-from app.schemas import LocationCreate, LocationUpdate, LocationResponse, ZoneCreate, ZoneResponse, MapDataResponse
+from app.models import User, Location, Zone, EventItem
+from app.schemas import (
+    LocationCreate, LocationUpdate, LocationResponse, ZoneCreate, ZoneResponse, MapDataResponse, RouteResponse,
+    NearbyLocation, ZoneAtResponse, LocationDetailResponse
+)
+from app.services.map_snapshot import get_map_snapshot, invalidate_map
+from app.services.program_snapshot import invalidate_program
 from app.api.deps import get_current_user, get_current_admin
+from app.utils.idempotency import Idempotency, get_idempotency
 
 router = APIRouter()
 
+# The map is public; clients revalidate with ETag / If-None-Match.
+# A bundle requested with its current version (?v=) never changes.
+MAP_CACHE_CONTROL = "public, max-age=60"
+MAP_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+MAX_LOCATION_IDS = 500
+# Plan coordinates accepted in queries; also rules out inf and nan
+MAX_COORDINATE = 1_000_000
+
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    return bool(if_none_match) and (
+        if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    )
+
 
 @router.get("/events/{event_id}/map", response_model=MapDataResponse)
 async def get_map_data(
     event_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get map data for an event (full zones and locations, served from the map snapshot)"""
+    snapshot = await get_map_snapshot(db, event_id)
+    headers = {"ETag": snapshot.etag, "Cache-Control": MAP_CACHE_CONTROL}
+    if _not_modified(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+@router.get("/events/{event_id}/map/bundle")
+async def get_map_bundle(
+    event_id: UUID,
+    floor: Optional[int] = Query(None, description="Only this floor"),
+    v: Optional[str] = Query(None, max_length=32, description="Bundle version the client expects"),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get compact map bundle: simplified polygons and quantized coordinates
+    (divide by "scale"), precompressed with brotli or gzip.
+    """
+    bundle = (await get_map_snapshot(db, event_id)).bundle(floor)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Floor not found on the map")
+    headers = {
+        "ETag": bundle.etag,
+        "Cache-Control": MAP_IMMUTABLE_CACHE_CONTROL if v == bundle.version else MAP_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if _not_modified(if_none_match, bundle.etag):
+        return Response(status_code=304, headers=headers)
+    
+    body, encoding = bundle.encoded(accept_encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/events/{event_id}/route", response_model=RouteResponse)
+async def get_route(
+    event_id: UUID,
+    from_id: UUID = Query(..., alias="from", description="Start location or zone ID"),
+    to_id: UUID = Query(..., alias="to", description="Destination location or zone ID"),
+    avoid_stairs: bool = Query(False, description="Use elevators only"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get indoor route between two locations (or zones) of an event.
+    
+    The navigation graph is built once per map change; routes to the most
+    used rooms come from precomputed shortest-path trees.
+    """
+    snapshot = await get_map_snapshot(db, event_id)
+    graph = snapshot.navigation
+    if str(from_id) not in graph.nodes or str(to_id) not in graph.nodes:
+        raise HTTPException(status_code=404, detail="Location not found on the map")
+    
+    route = graph.route(str(from_id), str(to_id), avoid_stairs=avoid_stairs)
+    if not route:
+        raise HTTPException(status_code=404, detail="Route not found")
+    return {"from_id": str(from_id), "to_id": str(to_id), **route.to_dict()}
+
+
+@router.get("/events/{event_id}/map/nearest", response_model=list[NearbyLocation])
+async def get_nearest_locations(
+    event_id: UUID,
+    location_id: Optional[UUID] = Query(None, description="Search around this location"),
+    x: Optional[float] = Query(None, ge=-MAX_COORDINATE, le=MAX_COORDINATE),
+    y: Optional[float] = Query(None, ge=-MAX_COORDINATE, le=MAX_COORDINATE),
+    floor: int = Query(0),
+    type: Optional[str] = Query(None, max_length=50, description="Location type, e.g. toilet"),
+    k: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get locations (of a type) nearest to a location or a point on a floor"""
+    spatial = (await get_map_snapshot(db, event_id)).spatial
+    if location_id:
+        hits = spatial.nearest_to_location(location_id, type, k)
+        if hits is None:
+            raise HTTPException(status_code=404, detail="Location not found on the map")
+    elif x is not None and y is not None:
+        hits = spatial.nearest(x, y, floor, type, k)
+    else:
+        raise HTTPException(status_code=400, detail="location_id or x and y are required")
+    return [entry.to_dict(distance) for distance, entry in hits]
+
+
+@router.get("/events/{event_id}/map/zone-at", response_model=ZoneAtResponse)
+async def get_zone_at(
+    event_id: UUID,
+    x: float = Query(..., ge=-MAX_COORDINATE, le=MAX_COORDINATE),
+    y: float = Query(..., ge=-MAX_COORDINATE, le=MAX_COORDINATE),
+    floor: int = Query(0),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get zones containing a point of a floor, innermost first"""
+    zones = (await get_map_snapshot(db, event_id)).spatial.zones_at(x, y, floor)
+    return {
+        "floor": floor,
+        "x": x,
+        "y": y,
+        "zones": [ZoneResponse.model_validate(zone) for zone in zones],
+    }
+
+
+@router.get("/events/{event_id}/locations", response_model=list[LocationDetailResponse])
+async def get_event_locations(
+    event_id: UUID,
+    ids: Optional[list[UUID]] = Query(None, description="Location IDs (all locations of the event if omitted)"),
+    items_limit: int = Query(3, ge=0, le=20, description="Upcoming items per location"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get map data for an event"""
-    # Get zones
-    zones_query = select(Zone).where(Zone.event_id == event_id)
-    zones_result = await db.execute(zones_query)
-    zones = zones_result.scalars().all()
+    """
+    Get locations with zone names and upcoming program items.
     
-    # Get locations
-    locations_query = select(Location).where(Location.event_id == event_id)
-    locations_result = await db.execute(locations_query)
-    locations = locations_result.scalars().all()
+    Two queries whatever the number of locations: locations joined with
+    their zones, then upcoming items of all of them at once.
+    """
+    if ids is not None and len(ids) > MAX_LOCATION_IDS:
+        raise HTTPException(status_code=400, detail=f"Too many ids (max {MAX_LOCATION_IDS})")
     
-    return MapDataResponse(
-        zones=[ZoneResponse.model_validate(z) for z in zones],
-        locations=[LocationResponse.model_validate(l) for l in locations]
+    now = datetime.now(timezone.utc)
+    upcoming = Location.event_items.and_(
+        EventItem.status != "cancelled",
+        func.coalesce(EventItem.date_end, EventItem.date_start) >= now
+    )
+    query = (
+        select(Location)
+        .where(Location.event_id == event_id)
+        .options(
+            joinedload(Location.zone),
+            selectinload(upcoming).load_only(
+                EventItem.id, EventItem.location_id, EventItem.title, EventItem.type,
+                EventItem.status, EventItem.date_start, EventItem.date_end
+            ),
+        )
+        .order_by(Location.floor, Location.name)
     )
+    if ids is not None:
+        query = query.where(Location.id.in_(ids))
+    locations = (await db.execute(query)).unique().scalars().all()
+    
+    if ids is not None:
+        # Keep the order the client asked for; unknown ids are skipped
+        by_id = {location.id: location for location in locations}
+        locations = [by_id[location_id] for location_id in dict.fromkeys(ids) if location_id in by_id]
+    
+    results = []
+    for location in locations:
+        result = LocationDetailResponse.model_validate(location)
+        result.zone_name = location.zone.name if location.zone else None
+        items = sorted(location.event_items, key=lambda item: item.date_start or item.date_end)
+        result.upcoming_items = items[:items_limit]
+        results.append(result)
+    return results
 
 
 @router.get("/locations/{location_id}", response_model=LocationResponse)
@@ -41,7 +206,8 @@ async def get_location(
     current_user: User = Depends(get_current_user)
 ):
     """Get location by ID"""
-    location = await db.get(Location, location_id)
+    # The zone is loaded in the same query (lazy loading doesn't work with the async session)
+    location = await db.get(Location, location_id, options=[joinedload(Location.zone)])
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
@@ -56,14 +222,20 @@ async def get_location(
 async def create_location(
     data: LocationCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
     current_user: User = Depends(get_current_admin)
 ):
     """Create a new location (admin only)"""
+    replayed = await idempotency.replay(current_user.id)
+    if replayed is not None:
+        return replayed
+    
     location = Location(**data.model_dump())
     db.add(location)
     await db.flush()
     await db.refresh(location)
-    return location
+    invalidate_map(db, location.event_id)
+    return await idempotency.save(LocationResponse.model_validate(location))
 
 
 @router.put("/locations/{location_id}", response_model=LocationResponse)
@@ -84,6 +256,9 @@ async def update_location(
     
     await db.flush()
     await db.refresh(location)
+    # Location names are embedded into program items
+    invalidate_program(db, location.event_id)
+    invalidate_map(db, location.event_id)
     return location
 
 
@@ -99,6 +274,8 @@ async def delete_location(
         raise HTTPException(status_code=404, detail="Location not found")
     
     await db.delete(location)
+    invalidate_program(db, location.event_id)
+    invalidate_map(db, location.event_id)
     return {"success": True}
 
 
@@ -106,14 +283,20 @@ async def delete_location(
 async def create_zone(
     data: ZoneCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
     current_user: User = Depends(get_current_admin)
 ):
     """Create a new zone (admin only)"""
+    replayed = await idempotency.replay(current_user.id)
+    if replayed is not None:
+        return replayed
+    
     zone = Zone(**data.model_dump())
     db.add(zone)
     await db.flush()
     await db.refresh(zone)
-    return zone
+    invalidate_map(db, zone.event_id)
+    return await idempotency.save(ZoneResponse.model_validate(zone))
 
 
 @router.delete("/zones/{zone_id}")
@@ -128,4 +311,5 @@ async def delete_zone(
         raise HTTPException(status_code=404, detail="Zone not found")
     
     await db.delete(zone)
+    invalidate_map(db, zone.event_id)
     return {"success": True}
@@ -7,6 +7,7 @@ from app.models import User
 from app.schemas import ModuleCreate, ModuleUpdate, ModuleResponse, ModuleReorder
 from app.services import ModuleService
 from app.api.deps import get_current_user, get_current_admin
+from app.utils.idempotency import Idempotency, get_idempotency
 
 router = APIRouter()
 
@@ -29,12 +30,17 @@ async def get_module(
 async def create_module(
     data: ModuleCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
     current_user: User = Depends(get_current_admin)
 ):
     """Create a new module (admin only)"""
+    replayed = await idempotency.replay(current_user.id)
+    if replayed is not None:
+        return replayed
+    
     service = ModuleService(db)
     module = await service.create(data)
-    return module
+    return await idempotency.save(ModuleResponse.model_validate(module))
 
 
 @router.put("/{module_id}", response_model=ModuleResponse)
@@ -7,6 +7,7 @@ from app.database import get_db
 from app.models import User, News
 from app.schemas import NewsCreate, NewsUpdate, NewsResponse
 from app.api.deps import get_current_user, get_current_admin
+from app.utils.idempotency import Idempotency, get_idempotency
 
 router = APIRouter()
 
@@ -47,14 +48,19 @@ async def get_news(
 async def create_news(
     data: NewsCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
     current_user: User = Depends(get_current_admin)
 ):
     """Create news (admin only)"""
+    replayed = await idempotency.replay(current_user.id)
+    if replayed is not None:
+        return replayed
+    
     news = News(**data.model_dump())
     db.add(news)
     await db.flush()
     await db.refresh(news)
-    return news
+    return await idempotency.save(NewsResponse.model_validate(news))
 
 
 @router.put("/{news_id}", response_model=NewsResponse)
@@ -1,35 +1,106 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models import User
-from app.schemas import RegistrationResponse
+from app.schemas import RegistrationResponse, RegistrationConflict, ConflictItem, RegistrationCheckRequest
 from app.services import RegistrationService
+from app.services.registration_service import SEAT_HOLDING_STATUSES
 from app.api.deps import get_current_user
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Page size when only a cursor is given
+DEFAULT_PAGE_SIZE = 100
+
 
 @router.get("/registrations/my", response_model=list[RegistrationResponse])
 async def get_my_registrations(
+    response: Response,
     event_id: UUID = Query(None),
+    limit: int = Query(None, ge=1, le=500, description="Page size (all registrations if neither limit nor cursor is given)"),
+    cursor: str = Query(None, description="X-Next-Cursor of the previous page"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get current user's registrations"""
+    """
+    Get current user's registrations with item title, time and location.
+    
+    Ordered by item start. Paginated when limit or cursor is given: when
+    there are more rows, the cursor of the next page is returned in the
+    X-Next-Cursor header.
+    """
+    if limit is None and cursor:
+        limit = DEFAULT_PAGE_SIZE
     service = RegistrationService(db)
-    registrations = await service.get_by_user(current_user.id, event_id)
+    try:
+        rows, next_cursor = await service.get_user_registrations(current_user.id, event_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    result = []
-    for reg in registrations:
-        reg_dict = RegistrationResponse.model_validate(reg).model_dump()
-        # Add event item title
-        if reg.event_item:
-            reg_dict["event_item_title"] = reg.event_item.title
-        result.append(reg_dict)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [RegistrationResponse.model_validate(row._mapping) for row in rows]
+
+
+@router.get("/registrations/my/items")
+async def get_my_registered_items(
+    event_id: UUID = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get registration status per event item id (to mark cards on program screens)"""
+    service = RegistrationService(db)
+    statuses = await service.get_user_item_statuses(current_user.id)
+    return {
+        "items": {
+            str(item_id): status
+            for item_id, (item_event_id, status) in statuses.items()
+            if not event_id or item_event_id == event_id
+        }
+    }
+
+
+@router.get("/registrations/my/conflicts", response_model=list[RegistrationConflict])
+async def get_my_conflicts(
+    event_id: UUID = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get current user's registrations that overlap in time"""
+    service = RegistrationService(db)
+    pairs = await service.get_user_conflicts(current_user.id, event_id)
+    
+    fields = ("id", "title", "date_start", "date_end")
+    return [
+        RegistrationConflict(
+            item=ConflictItem(**dict(zip(fields, item))),
+            conflicts_with=ConflictItem(**dict(zip(fields, other)))
+        )
+        for item, other in pairs
+    ]
+
+
+@router.post("/registrations/check")
+async def check_registrations(
+    data: RegistrationCheckRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Check registration state for many event items at once (from the per-user cached set)"""
+    service = RegistrationService(db)
+    statuses = await service.get_user_item_statuses(current_user.id)
     
-    return result
+    result = {}
+    for item_id in data.event_item_ids:
+        _, status = statuses.get(item_id, (None, None))
+        result[str(item_id)] = {
+            "registered": status in SEAT_HOLDING_STATUSES,
+            "status": status
+        }
+    return {"items": result}
 
 
 @router.get("/registrations/{event_item_id}/check")
@@ -43,6 +114,7 @@ async def check_registration(
     registration = await service.get_registration(current_user.id, event_item_id)
     
     return {
-        "registered": registration is not None and registration.status != "cancelled",
-        "status": registration.status if registration else None
+        "registered": registration is not None and registration.status in SEAT_HOLDING_STATUSES,
+        "status": registration.status if registration else None,
+        "waitlist_position": await service.get_waitlist_position(registration) if registration else None
     }
@@ -6,7 +6,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User, Speaker
 from app.schemas import SpeakerCreate, SpeakerUpdate, SpeakerResponse
+from app.services.program_snapshot import invalidate_program
 from app.api.deps import get_current_user, get_current_admin
+from app.utils.idempotency import Idempotency, get_idempotency
 
 router = APIRouter()
 
@@ -28,14 +30,19 @@ async def get_speaker(
 async def create_speaker(
     data: SpeakerCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency: Idempotency = Depends(get_idempotency),
     current_user: User = Depends(get_current_admin)
 ):
     """Create a new speaker (admin only)"""
+    replayed = await idempotency.replay(current_user.id)
+    if replayed is not None:
+        return replayed
+    
     speaker = Speaker(**data.model_dump())
     db.add(speaker)
     await db.flush()
     await db.refresh(speaker)
-    return speaker
+    return await idempotency.save(SpeakerResponse.model_validate(speaker))
 
 
 @router.put("/{speaker_id}", response_model=SpeakerResponse)
@@ -56,6 +63,8 @@ async def update_speaker(
     
     await db.flush()
     await db.refresh(speaker)
+    # Speaker cards are embedded into program items
+    invalidate_program(db, speaker.event_id)
     return speaker
 
 
@@ -71,4 +80,5 @@ async def delete_speaker(
         raise HTTPException(status_code=404, detail="Speaker not found")
     
     await db.delete(speaker)
+    invalidate_program(db, speaker.event_id)
     return {"success": True}
@@ -0,0 +1,41 @@
+import hmac
+from typing import Optional
+
+import orjson
+from aiogram.types import Update
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from pydantic import ValidationError
+
+from app.bot.updates import update_pipeline, webhook_secret
+
+router = APIRouter()
+
+
+@router.post("/telegram/webhook")
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: Optional[str] = Header(None)
+):
+    """
+    Receive a Telegram update (webhook mode).
+
+    The update is queued and answered at once; 503 asks Telegram to
+    deliver it again when the workers are overloaded.
+    """
+    if not update_pipeline.running:
+        raise HTTPException(status_code=404, detail="Webhook mode is off")
+    if not x_telegram_bot_api_secret_token or not hmac.compare_digest(
+        # Bytes: compare_digest rejects non-ASCII str
+        x_telegram_bot_api_secret_token.encode(), webhook_secret().encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    try:
+        update = Update.model_validate(orjson.loads(await request.body()), context={"bot": update_pipeline.bot})
+    except (orjson.JSONDecodeError, ValidationError):
+        # Telegram would retry a malformed update forever
+        return Response(status_code=200)
+
+    if not await update_pipeline.submit(update):
+        return Response(status_code=503, headers={"Retry-After": "1"})
+    return Response(status_code=200)
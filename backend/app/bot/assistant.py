@@ -0,0 +1,179 @@
+"""
+AI assistant answers to free-text bot messages.
+
+Answers come from AssistantService with the same cache and coalescing of
+identical questions as POST /assistant/chat, so a question asked in chat
+and in the Mini App costs one LLM call. The chat shows "typing" until the
+first words, then one message edited as the answer grows. Edits are
+throttled per chat by a token bucket (Telegram limits how often a message
+can be edited): an edit without a token is skipped, the next one shows
+that text too, and a 429 answer stops edits for its retry_after. The
+final edit always happens.
+
+Answers are rendered in background tasks, so a slow generation doesn't
+hold up other updates of the worker.
+"""
+import asyncio
+import html
+import logging
+from typing import Optional
+
+from aiogram import Bot, types
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
+from aiogram.utils.chat_action import ChatActionSender
+
+from app.bot.webapp import create_map_deep_link
+from app.config import settings
+from app.database import async_session_maker
+from app.services import AssistantService, EventService
+from app.utils.rate_limit import KeyedTokenBuckets
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096
+MAX_QUESTION_LENGTH = 2000
+# Shown at the end of an answer still being generated
+CURSOR = " ▌"
+
+edit_buckets = KeyedTokenBuckets(1 / settings.BOT_ASSISTANT_EDIT_INTERVAL_SECONDS)
+# Keep references so running answers aren't garbage collected
+_tasks: set[asyncio.Task] = set()
+
+
+def render(text: str, final: bool = True) -> str:
+    """Answer as message HTML, cut to the message length limit"""
+    suffix = "" if final else CURSOR
+    rendered = html.escape(text) + suffix
+    if len(rendered) <= MAX_MESSAGE_LENGTH:
+        return rendered
+    # Longest prefix that fits once escaped
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(html.escape(text[:middle])) + len(suffix) + 1 <= MAX_MESSAGE_LENGTH:
+            low = middle
+        else:
+            high = middle - 1
+    return html.escape(text[:low]) + "…" + suffix
+
+
+def answer_keyboard(actions: list[dict]) -> Optional[InlineKeyboardMarkup]:
+    """Mini App buttons for assistant actions (map places, admin panel)"""
+    if not settings.TELEGRAM_WEBAPP_URL:
+        return None
+    buttons = []
+    for action in actions:
+        if action["type"] == "open_map":
+            url = create_map_deep_link(str(action["location_id"]))
+        elif action["type"] == "open_admin":
+            url = action["url"]
+        else:
+            continue
+        buttons.append([InlineKeyboardButton(text=action["label"], web_app=WebAppInfo(url=url))])
+    return InlineKeyboardMarkup(inline_keyboard=buttons) if buttons else None
+
+
+class StreamedReply:
+    """Bot message showing a growing answer"""
+
+    def __init__(self, bot: Bot, chat_id: int, reply_to_message_id: Optional[int] = None):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.reply_to_message_id = reply_to_message_id
+        self.bucket = edit_buckets.get(chat_id)
+        self.message_id: Optional[int] = None
+        self.shown = ""
+        self.edits = 0
+
+    async def update(self, text: str) -> None:
+        """Show the answer so far if the chat's edit limit allows"""
+        if self.message_id is None:
+            await self._send(render(text, final=False))
+        elif self.bucket.try_acquire():
+            try:
+                await self._edit(render(text, final=False))
+            except TelegramRetryAfter as e:
+                self.bucket.pause(e.retry_after)
+
+    async def finish(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        """Show the complete answer, waiting for the edit limit"""
+        if self.message_id is None:
+            await self._send(render(text), reply_markup)
+            return
+        while True:
+            await self.bucket.acquire()
+            try:
+                await self._edit(render(text), reply_markup)
+                return
+            except TelegramRetryAfter as e:
+                self.bucket.pause(e.retry_after)
+
+    async def _send(self, rendered: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        message = await self.bot.send_message(
+            self.chat_id,
+            rendered,
+            reply_to_message_id=self.reply_to_message_id,
+            reply_markup=reply_markup,
+            disable_web_page_preview=True,
+        )
+        self.message_id = message.message_id
+        self.shown = rendered
+        # The first edit waits a full interval after the message
+        self.bucket.try_acquire()
+
+    async def _edit(self, rendered: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        if rendered == self.shown and reply_markup is None:
+            return
+        try:
+            await self.bot.edit_message_text(
+                rendered,
+                chat_id=self.chat_id,
+                message_id=self.message_id,
+                reply_markup=reply_markup,
+                disable_web_page_preview=True,
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                raise
+        self.shown = rendered
+        self.edits += 1
+
+
+async def reply_with_answer(bot: Bot, message: types.Message) -> None:
+    """Answer a free-text message, showing the answer as it is generated"""
+    reply = StreamedReply(bot, message.chat.id, message.message_id)
+    async with ChatActionSender.typing(bot=bot, chat_id=message.chat.id):
+        async with async_session_maker() as db:
+            event_id = await EventService(db).get_active_id()
+            if event_id is None:
+                await reply.finish("Сейчас нет активного мероприятия. Откройте приложение, чтобы посмотреть программу.")
+                return
+            answer = await AssistantService(db).answer(event_id, message.text[:MAX_QUESTION_LENGTH])
+        stream = answer.follow()
+        # "Typing" lasts until the first words appear
+        first = await anext(stream, None)
+
+    if first is not None and not answer.done:
+        await reply.update(first)
+        async for text in stream:
+            if not answer.done:
+                await reply.update(text)
+    await reply.finish(answer.text, answer_keyboard(answer.actions))
+
+
+def start_reply(bot: Bot, message: types.Message) -> bool:
+    """Answer the message in the background; False when too many answers are in progress"""
+    if len(_tasks) >= settings.BOT_ASSISTANT_MAX_ANSWERS:
+        return False
+
+    async def run() -> None:
+        try:
+            await reply_with_answer(bot, message)
+        except Exception:
+            logger.exception(f"Assistant reply to chat {message.chat.id} failed")
+
+    task = asyncio.create_task(run())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return True
@@ -1,8 +1,10 @@
-from aiogram import Router, types, F
+from aiogram import Bot, Router, types, F
 from aiogram.filters import Command, CommandStart
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
 
 from app.config import settings
+from app.bot.assistant import start_reply
+from app.bot.inline import answer_inline_query
 from app.bot.keyboards import get_main_keyboard, get_webapp_keyboard
 
 router = Router()
@@ -33,6 +35,7 @@ async def cmd_start(message: types.Message):
 
 
 @router.message(Command("help"))
+@router.message(F.text == "📖 Справка")
 async def cmd_help(message: types.Message):
     """Handle /help command"""
     help_text = """
@@ -122,6 +125,14 @@ async def handle_admin_message(message: types.Message):
         )
 
 
+@router.message(F.text & ~F.text.startswith("/"))
+async def handle_question(message: types.Message, bot: Bot):
+    """Answer free text with the AI assistant"""
+    if not start_reply(bot, message):
+        await message.answer("⏳ Сейчас очень много вопросов. Попробуйте через минуту или откройте приложение:",
+                             reply_markup=get_webapp_keyboard())
+
+
 @router.message()
 async def handle_message(message: types.Message):
     """Handle any other message"""
@@ -129,3 +140,9 @@ async def handle_message(message: types.Message):
         "Используйте команду /start для начала работы или откройте приложение:",
         reply_markup=get_webapp_keyboard()
     )
+
+
+@router.inline_query()
+async def handle_inline_query(inline_query: types.InlineQuery):
+    """Search the program of the active event: @bot <query>"""
+    await answer_inline_query(inline_query)
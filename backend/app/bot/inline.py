@@ -0,0 +1,128 @@
+"""
+Inline program search: "@bot workshop" in any chat.
+
+Queries are answered from the program snapshot of the active event and
+its word index (app.services.program_search), so a keystroke costs no
+database queries once the snapshot is built; results of recent queries
+are cached by the index and by Telegram for BOT_INLINE_CACHE_SECONDS.
+Every result posts a card with a button opening the item in the Mini App.
+"""
+from datetime import datetime, timezone
+from html import escape
+from typing import Optional
+
+from aiogram.types import (
+    InlineKeyboardButton, InlineKeyboardMarkup, InlineQuery,
+    InlineQueryResultArticle, InputTextMessageContent,
+)
+
+from app.bot.webapp import create_item_deep_link
+from app.config import settings
+from app.database import async_session_maker
+from app.services import EventService
+from app.services.program_search import SearchDocument
+from app.services.program_snapshot import ProgramSnapshot, get_program_snapshot
+from app.utils.event_time import format_time_range
+
+# Telegram accepts up to 50 results per answer
+PAGE_SIZE = 20
+MAX_RESULTS = 200
+
+
+def _time_range(card: dict) -> str:
+    if not card.get("date_start"):
+        return ""
+    return format_time_range(
+        datetime.fromisoformat(card["date_start"]),
+        datetime.fromisoformat(card["date_end"]) if card.get("date_end") else None,
+    )
+
+
+def _open_keyboard(item_id: str) -> Optional[InlineKeyboardMarkup]:
+    if not settings.TELEGRAM_WEBAPP_URL:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="📱 Открыть в приложении", url=create_item_deep_link(item_id))
+    ]])
+
+
+def item_result(card: dict) -> InlineQueryResultArticle:
+    """Result posting a program item card"""
+    details = [part for part in (_time_range(card), card.get("location_name")) if part]
+    speakers = ", ".join(speaker["name"] for speaker in card["speakers"])
+    lines = [f"<b>{escape(card['title'])}</b>"]
+    if details:
+        lines.append("🕒 " + escape(" · ".join(details)))
+    if speakers:
+        lines.append(f"🎤 {escape(speakers)}")
+    return InlineQueryResultArticle(
+        id=f"item:{card['id']}",
+        title=card["title"],
+        description=" · ".join(details + ([speakers] if speakers else [])) or None,
+        input_message_content=InputTextMessageContent(
+            message_text="\n".join(lines), parse_mode="HTML", disable_web_page_preview=True
+        ),
+        reply_markup=_open_keyboard(card["id"]),
+    )
+
+
+def speaker_result(document: SearchDocument, snapshot: ProgramSnapshot) -> InlineQueryResultArticle:
+    """Result posting a speaker with their sessions; the button opens the first one"""
+    speaker = document.card
+    about = ", ".join(part for part in (speaker.get("position"), speaker.get("company")) if part)
+    cards = [snapshot.items[position] for position in document.positions]
+    lines = [f"🎤 <b>{escape(speaker['name'])}</b>"]
+    if about:
+        lines.append(escape(about))
+    lines.append("")
+    for card in cards:
+        time_str = _time_range(card)
+        lines.append(f"• {escape(card['title'])}" + (f" ({escape(time_str)})" if time_str else ""))
+    return InlineQueryResultArticle(
+        id=f"speaker:{speaker['id']}",
+        title=f"🎤 {speaker['name']}",
+        description=" · ".join(filter(None, [about, cards[0]["title"]])),
+        input_message_content=InputTextMessageContent(
+            message_text="\n".join(lines), parse_mode="HTML", disable_web_page_preview=True
+        ),
+        thumbnail_url=speaker.get("photo_url") or None,
+        reply_markup=_open_keyboard(cards[0]["id"]),
+    )
+
+
+def search_results(snapshot: ProgramSnapshot, query: str, offset: int) -> tuple[list[InlineQueryResultArticle], str]:
+    """One page of results and the next offset ("" on the last page)"""
+    if query.strip():
+        documents = snapshot.search_index.search(query)[:MAX_RESULTS]
+    else:
+        # Empty query: what's next in the program
+        positions = snapshot.schedule.next(datetime.now(timezone.utc), limit=MAX_RESULTS)
+        documents = [snapshot.search_index.documents[position] for position in positions]
+
+    page = documents[offset:offset + PAGE_SIZE]
+    results = [
+        item_result(document.card) if document.kind == "item" else speaker_result(document, snapshot)
+        for document in page
+    ]
+    next_offset = str(offset + PAGE_SIZE) if offset + PAGE_SIZE < len(documents) else ""
+    return results, next_offset
+
+
+async def answer_inline_query(inline_query: InlineQuery) -> None:
+    """Answer an inline query with program items and speakers of the active event"""
+    try:
+        offset = int(inline_query.offset or 0)
+    except ValueError:
+        offset = 0
+
+    async with async_session_maker() as db:
+        event_id = await EventService(db).get_active_id()
+        snapshot = await get_program_snapshot(db, event_id) if event_id else None
+
+    results, next_offset = search_results(snapshot, inline_query.query, offset) if snapshot else ([], "")
+    await inline_query.answer(
+        results,
+        cache_time=settings.BOT_INLINE_CACHE_SECONDS,
+        is_personal=False,
+        next_offset=next_offset,
+    )
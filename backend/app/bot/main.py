@@ -1,39 +1,50 @@
 """
 Telegram Bot main entry point
+
+Without TELEGRAM_WEBHOOK_URL the bot long-polls from this process. In
+webhook mode updates are received by the API (see app.bot.updates) and
+this entry point isn't needed.
 """
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.enums import ParseMode
-from aiogram.client.default import DefaultBotProperties
+from aiogram import Dispatcher
 
 from app.config import settings
 from app.bot.handlers import router
+from app.bot.middlewares import throttling_middleware
+from app.bot.notifications import create_bot
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def create_dispatcher() -> Dispatcher:
+    """Create dispatcher with all bot routers and anti-flood throttling"""
+    dp = Dispatcher()
+    dp.update.outer_middleware(throttling_middleware)
+    dp.include_router(router)
+    return dp
+
+
 async def run_bot():
     """Run the Telegram bot"""
     if not settings.TELEGRAM_BOT_TOKEN:
         logger.error("TELEGRAM_BOT_TOKEN is not set!")
         return
-    
+    if settings.TELEGRAM_WEBHOOK_URL:
+        logger.error("TELEGRAM_WEBHOOK_URL is set: updates are received by the API webhook, not polled")
+        return
+
     # Initialize bot and dispatcher
-    bot = Bot(
-        token=settings.TELEGRAM_BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
-    dp = Dispatcher()
-    
-    # Include routers
-    dp.include_router(router)
-    
+    bot = create_bot()
+    dp = create_dispatcher()
+
     # Start polling
     logger.info("Starting bot...")
     try:
+        # A webhook left from webhook mode would make getUpdates fail
+        await bot.delete_webhook()
         await dp.start_polling(bot)
     finally:
         await bot.session.close()
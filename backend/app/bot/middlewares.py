@@ -0,0 +1,172 @@
+"""
+Bot anti-flood middlewares.
+
+ThrottlingMiddleware runs before any handler: updates of a user beyond
+their token bucket are dropped (with an occasional "slow down" notice),
+and a message repeating the previous one of the chat within
+BOT_DUPLICATE_WINDOW_SECONDS is dropped as well. Inline queries have
+their own, more generous buckets since every keystroke is a query.
+
+OutgoingRateLimiter is a Bot API session middleware: every call posting
+to a chat (messages, edits, chat actions) waits for a token of one
+process-wide bucket, so handlers, notifications and broadcasts together
+stay within the bot's flood limit. A 429 answer to a call posting to a
+chat pauses only that chat for its retry_after; other 429 answers pause
+the process-wide bucket.
+
+Counters are per process (see GET /admin/bot/stats).
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import CallbackQuery, Message, Update
+
+from app.config import settings
+from app.utils.rate_limit import KeyedTokenBuckets, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+THROTTLED_TEXT = "⏳ Слишком много сообщений. Подождите немного."
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Outer update middleware with per-user token buckets and per-chat duplicate suppression"""
+
+    def __init__(
+        self,
+        rate: float = settings.BOT_THROTTLE_RATE_PER_SECOND,
+        burst: float = settings.BOT_THROTTLE_BURST,
+        inline_rate: float = settings.BOT_THROTTLE_INLINE_RATE_PER_SECOND,
+        inline_burst: float = settings.BOT_THROTTLE_INLINE_BURST,
+        duplicate_window: float = settings.BOT_DUPLICATE_WINDOW_SECONDS,
+        notice_interval: float = settings.BOT_THROTTLE_NOTICE_SECONDS,
+        max_keys: int = 100_000,
+    ):
+        self.buckets = KeyedTokenBuckets(rate, burst, max_keys)
+        self.inline_buckets = KeyedTokenBuckets(inline_rate, inline_burst, max_keys)
+        self.notice_buckets = KeyedTokenBuckets(1 / notice_interval, 1, max_keys)
+        self.duplicate_window = duplicate_window
+        self.max_keys = max_keys
+        # Chat -> (text, time) of its last message
+        self._last_messages: OrderedDict[int, tuple[str, float]] = OrderedDict()
+        self.passed = 0
+        self.throttled = 0
+        self.duplicates = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        if event.message and event.message.text and self._is_duplicate(event.message):
+            self.duplicates += 1
+            return None
+
+        buckets = self.inline_buckets if event.inline_query else self.buckets
+        if not buckets.get(user.id).try_acquire():
+            self.throttled += 1
+            await self._notify(event.event, user.id)
+            return None
+
+        self.passed += 1
+        return await handler(event, data)
+
+    def _is_duplicate(self, message: Message) -> bool:
+        """Same text as the chat's previous message within the window"""
+        now = time.monotonic()
+        previous = self._last_messages.get(message.chat.id)
+        self._last_messages[message.chat.id] = (message.text, now)
+        self._last_messages.move_to_end(message.chat.id)
+        if len(self._last_messages) > self.max_keys:
+            self._last_messages.popitem(last=False)
+        return previous is not None and previous[0] == message.text and now - previous[1] < self.duplicate_window
+
+    async def _notify(self, update: Any, user_id: int) -> None:
+        """
+        Tell a throttled user to slow down, at most once per notice interval.
+
+        A callback query is always answered (without text between notices),
+        or the button keeps spinning in the client.
+        """
+        notice = self.notice_buckets.get(user_id).try_acquire()
+        try:
+            if isinstance(update, CallbackQuery):
+                await update.answer(THROTTLED_TEXT if notice else None)
+            elif isinstance(update, Message) and notice:
+                await update.answer(THROTTLED_TEXT)
+        except Exception as e:
+            logger.debug(f"Throttling notice to {user_id} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "passed": self.passed,
+            "throttled": self.throttled,
+            "duplicates": self.duplicates,
+            "users": len(self.buckets),
+        }
+
+
+class OutgoingRateLimiter(BaseRequestMiddleware):
+    """Session middleware spacing calls that post to chats by one global token bucket"""
+
+    def __init__(self, rate: float = settings.BOT_OUTGOING_RATE_PER_SECOND, max_chats: int = 100_000):
+        # No burst allowance: calls are spread evenly over each second
+        self.bucket = TokenBucket(rate)
+        # Per chat only to hold back a chat paused by a 429, so as generous as the global bucket
+        self.chat_buckets = KeyedTokenBuckets(rate, rate, max_chats)
+        self.calls = 0
+        self.delayed = 0
+        self.waited_seconds = 0.0
+        self.retry_after_count = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        # Polling, webhook setup, inline answers and the like aren't chat messages
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None:
+            self.calls += 1
+            started = time.monotonic()
+            # The chat first: a paused chat doesn't hold up the others
+            await self.chat_buckets.get(chat_id).acquire()
+            await self.bucket.acquire()
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                self.delayed += 1
+                self.waited_seconds += waited
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter as e:
+            self.retry_after_count += 1
+            if chat_id is not None:
+                self.chat_buckets.get(chat_id).pause(e.retry_after)
+            else:
+                self.bucket.pause(e.retry_after)
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "delayed": self.delayed,
+            "waited_seconds": round(self.waited_seconds, 1),
+            "retry_after_count": self.retry_after_count,
+        }
+
+
+throttling_middleware = ThrottlingMiddleware()
+outgoing_limiter = OutgoingRateLimiter()
@@ -0,0 +1,88 @@
+"""
+Bot notifications sent from the API process
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.bot.middlewares import outgoing_limiter
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Session.info key with (telegram_id, text) pairs to send once the transaction commits
+PENDING_NOTIFICATIONS_KEY = "pending_bot_notifications"
+
+_bot: Optional[Bot] = None
+# Keep references so running sends aren't garbage collected
+_tasks: set[asyncio.Task] = set()
+
+
+def create_bot() -> Bot:
+    """Create Bot talking to the configured Bot API server, within the process-wide outgoing limit"""
+    session = AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL)) if settings.TELEGRAM_API_URL else AiohttpSession()
+    session.middleware(outgoing_limiter)
+    return Bot(token=settings.TELEGRAM_BOT_TOKEN, session=session, parse_mode=ParseMode.HTML)
+
+
+def get_bot() -> Optional[Bot]:
+    """Get shared Bot instance of the process (None if token isn't set)"""
+    global _bot
+    if _bot is None and settings.TELEGRAM_BOT_TOKEN:
+        _bot = create_bot()
+    return _bot
+
+
+async def send_notifications(messages: list[tuple[int, str]]) -> None:
+    """Send messages; failures are logged and don't affect other recipients"""
+    bot = get_bot()
+    if not bot:
+        logger.warning("TELEGRAM_BOT_TOKEN is not set, %d notifications dropped", len(messages))
+        return
+
+    for telegram_id, text in messages:
+        try:
+            await bot.send_message(telegram_id, text, parse_mode=ParseMode.HTML)
+        except Exception as e:
+            logger.warning(f"Failed to notify {telegram_id}: {e}")
+
+
+def notify_on_commit(db: AsyncSession, telegram_id: int, text: str) -> None:
+    """Queue a bot message to be sent only if the current transaction commits"""
+    db.sync_session.info.setdefault(PENDING_NOTIFICATIONS_KEY, []).append((telegram_id, text))
+
+
+async def close_bot() -> None:
+    """Close the shared bot session"""
+    global _bot
+    if _bot is not None:
+        await _bot.session.close()
+        _bot = None
+
+
+@event.listens_for(Session, "after_commit")
+def _send_pending_notifications(session: Session) -> None:
+    messages = session.info.pop(PENDING_NOTIFICATIONS_KEY, None)
+    if not messages:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning("No running event loop, %d notifications dropped", len(messages))
+        return
+    task = loop.create_task(send_notifications(messages))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_notifications(session: Session) -> None:
+    session.info.pop(PENDING_NOTIFICATIONS_KEY, None)
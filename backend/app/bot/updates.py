@@ -0,0 +1,179 @@
+"""
+Webhook update pipeline.
+
+In webhook mode Telegram posts updates to the API; the endpoint only puts
+them into bounded in-memory queues and answers at once, and a pool of
+workers feeds them to the dispatcher concurrently. Updates are sharded by
+chat, so one chat's updates are handled in order by one worker while
+other chats proceed in parallel.
+
+Backpressure: when handlers are slow and a shard's queue is full, the
+endpoint waits BOT_UPDATE_ENQUEUE_TIMEOUT_SECONDS for room and then
+answers 503, so Telegram keeps the update and delivers it again later.
+Any number of API workers can receive updates; each runs its own pool.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def webhook_secret() -> str:
+    """Secret token Telegram sends in X-Telegram-Bot-Api-Secret-Token"""
+    if settings.TELEGRAM_WEBHOOK_SECRET:
+        return settings.TELEGRAM_WEBHOOK_SECRET
+    # Allowed characters are A-Z, a-z, 0-9, _ and -: hex digest fits
+    return hmac.new(
+        settings.SECRET_KEY.encode(), settings.TELEGRAM_BOT_TOKEN.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def _chat_key(update: Update) -> int:
+    """Chat (or user) the update belongs to, for sharding"""
+    try:
+        event = update.event
+    except Exception:
+        return update.update_id
+    chat = getattr(event, "chat", None) or getattr(getattr(event, "message", None), "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None) or getattr(event, "user", None)
+    return user.id if user is not None else update.update_id
+
+
+class UpdatePipeline:
+    """Bounded per-shard queues of updates and the workers draining them"""
+
+    def __init__(
+        self,
+        workers: int = settings.BOT_UPDATE_WORKERS,
+        queue_size: int = settings.BOT_UPDATE_QUEUE_SIZE,
+        enqueue_timeout: float = settings.BOT_UPDATE_ENQUEUE_TIMEOUT_SECONDS,
+    ):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size // self.workers)
+        self.enqueue_timeout = enqueue_timeout
+        self.bot: Optional[Bot] = None
+        self.dispatcher: Optional[Dispatcher] = None
+        self._queues: list[asyncio.Queue] = []
+        self._tasks: list[asyncio.Task] = []
+        self._busy = 0
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.handling_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, bot: Bot, dispatcher: Dispatcher) -> None:
+        """Start the workers"""
+        if self.running:
+            return
+        self.bot, self.dispatcher = bot, dispatcher
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+
+    async def submit(self, update: Update) -> bool:
+        """
+        Queue an update for handling.
+
+        Returns:
+            False if its shard stayed full for the whole enqueue timeout
+        """
+        self.received += 1
+        queue = self._queues[_chat_key(update) % self.workers]
+        try:
+            queue.put_nowait(update)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(queue.put(update), self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                return False
+        return True
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Handle queued updates (up to the timeout) and stop the workers"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.queued} bot updates left unhandled on shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._queues = [], []
+
+    @property
+    def queued(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "busy": self._busy,
+            "queued": self.queued,
+            "queue_capacity": self.queue_size * self.workers,
+            "received": self.received,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_handling_ms": round(1000 * self.handling_seconds / self.processed, 2) if self.processed else None,
+        }
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            update = await queue.get()
+            self._busy += 1
+            started = time.perf_counter()
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception:
+                self.failed += 1
+                logger.exception(f"Bot update {update.update_id} failed")
+            finally:
+                self.processed += 1
+                self.handling_seconds += time.perf_counter() - started
+                self._busy -= 1
+                queue.task_done()
+
+
+update_pipeline = UpdatePipeline()
+
+
+async def start_webhook() -> None:
+    """Start the update workers and register the webhook with Telegram"""
+    from app.bot.main import create_dispatcher
+    from app.bot.notifications import get_bot
+
+    bot = get_bot()
+    if bot is None:
+        logger.error("TELEGRAM_WEBHOOK_URL is set but TELEGRAM_BOT_TOKEN is not")
+        return
+    dispatcher = create_dispatcher()
+    update_pipeline.start(bot, dispatcher)
+    try:
+        await bot.set_webhook(
+            settings.TELEGRAM_WEBHOOK_URL,
+            secret_token=webhook_secret(),
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            max_connections=settings.TELEGRAM_WEBHOOK_MAX_CONNECTIONS,
+        )
+        logger.info(f"Telegram webhook set to {settings.TELEGRAM_WEBHOOK_URL}")
+    except Exception as e:
+        # Another worker may have set it; updates are accepted either way
+        logger.warning(f"Failed to set Telegram webhook: {e}")
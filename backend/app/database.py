@@ -1,3 +1,4 @@
+from sqlalchemy import DDL, event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from typing import AsyncGenerator
@@ -29,6 +30,10 @@ class Base(DeclarativeBase):
     pass
 
 
+# Trigram search indexes (gin_trgm_ops) need pg_trgm before create_all builds them
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting database session"""
     async with async_session_maker() as session:
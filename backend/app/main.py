@@ -6,6 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import init_db, close_db
 from app.api import api_router
+from app.bot.notifications import close_bot, get_bot
+from app.bot.updates import update_pipeline, start_webhook
+from app.services.admission_queue import admission_queue
+from app.services.broadcaster import broadcaster
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.seat_reconciler import seat_reconciler
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +28,21 @@ async def lifespan(app: FastAPI):
         # create_all может конфликтовать с существующими таблицами, созданными через миграции
         logger.warning(f"Database initialization warning (tables may already exist via migrations): {e}")
         logger.info("Continuing startup - assuming migrations are already applied")
+    seat_reconciler.start()
+    broadcaster.start(get_bot())
+    reminder_scheduler.start(get_bot())
+    if settings.TELEGRAM_WEBHOOK_URL:
+        await start_webhook()
     
     yield
     
     # Shutdown
+    await update_pipeline.close()
+    await reminder_scheduler.close()
+    await broadcaster.close()
+    await seat_reconciler.close()
+    await admission_queue.close()
+    await close_bot()
     try:
         await close_db()
         logger.info("Database connections closed")
@@ -47,6 +64,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursor of list endpoints
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API router
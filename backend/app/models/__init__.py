@@ -1,7 +1,7 @@
 from app.models.event import Event
 from app.models.module import Module
 from app.models.user import User
-from app.models.event_item import EventItem
+from app.models.event_item import EventItem, EventItemSeats, EventItemReminder
 from app.models.speaker import Speaker, EventSpeaker
 from app.models.registration import Registration
 from app.models.location import Location, Zone
@@ -9,12 +9,16 @@ from app.models.assistant import AssistantKnowledge
 from app.models.knowledge_chunk import KnowledgeChunk
 from app.models.news import News
 from app.models.message import Message
+from app.models.idempotency import IdempotencyKey
+from app.models.broadcast import Broadcast, BroadcastDelivery
 
 __all__ = [
     "Event",
     "Module",
     "User",
     "EventItem",
+    "EventItemSeats",
+    "EventItemReminder",
     "Speaker",
     "EventSpeaker",
     "Registration",
@@ -23,4 +27,7 @@ __all__ = [
     "AssistantKnowledge",
     "News",
     "Message",
+    "IdempotencyKey",
+    "Broadcast",
+    "BroadcastDelivery",
 ]
@@ -11,7 +11,7 @@ class AssistantKnowledge(Base):
     __tablename__ = "assistant_knowledge"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=True)  # NULL = global knowledge
+    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=True, index=True)  # NULL = global knowledge
     
     content_type = Column(String(50), nullable=True)  # faq, info, navigation, etc.
     content = Column(Text, nullable=False)
@@ -0,0 +1,63 @@
+from sqlalchemy import Column, String, Text, Integer, BigInteger, DateTime, ForeignKey, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.database import Base
+
+
+class Broadcast(Base):
+    """Broadcast model - рассылки сообщений через бота"""
+    __tablename__ = "broadcasts"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=True, index=True)
+    news_id = Column(UUID(as_uuid=True), ForeignKey("news.id", ondelete="SET NULL"), nullable=True)
+
+    text = Column(Text, nullable=False)  # HTML
+    audience = Column(String(20), nullable=False)  # all, event, event_item
+    audience_id = Column(UUID(as_uuid=True), nullable=True)  # event or event item id
+    status = Column(String(20), nullable=False, default="pending", server_default="pending")  # pending, running, paused, done, cancelled
+
+    # Delivery counters, updated after every batch
+    total = Column(Integer, nullable=False, default=0, server_default="0")
+    sent = Column(Integer, nullable=False, default=0, server_default="0")
+    failed = Column(Integer, nullable=False, default=0, server_default="0")
+    blocked = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # A worker sending the broadcast holds it until this time and extends it before and after
+    # every batch; an expired lease (crashed worker) lets another one resume. locked_by is the
+    # token of the lease holder, so a worker whose lease was taken over stops.
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(UUID(as_uuid=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Broadcast(id={self.id}, status={self.status})>"
+
+
+class BroadcastDelivery(Base):
+    """BroadcastDelivery model - получатель рассылки и статус доставки"""
+    __tablename__ = "broadcast_deliveries"
+
+    broadcast_id = Column(UUID(as_uuid=True), ForeignKey("broadcasts.id", ondelete="CASCADE"), primary_key=True)
+    telegram_id = Column(BigInteger, primary_key=True)
+
+    status = Column(String(20), nullable=False, default="pending", server_default="pending")  # pending, sent, failed, blocked
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(String(255), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Next batch: WHERE broadcast_id = ? AND status = 'pending' ORDER BY telegram_id
+        Index(
+            "ix_broadcast_deliveries_pending",
+            "broadcast_id", "telegram_id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<BroadcastDelivery(broadcast_id={self.broadcast_id}, telegram_id={self.telegram_id})>"
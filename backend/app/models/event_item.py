@@ -1,27 +1,71 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index, func, select, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, column_property
 import uuid
 
 from app.database import Base
 
 
+class EventItemSeats(Base):
+    """EventItemSeats model - счётчик занятых мест элемента программы"""
+    __tablename__ = "event_item_seats"
+    
+    # Kept apart from event_items: registrations update only this narrow row,
+    # not the program card (no updated_at bumps, no row lock on the item)
+    event_item_id = Column(UUID(as_uuid=True), ForeignKey("event_items.id", ondelete="CASCADE"), primary_key=True)
+    taken = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Last time the counter was repaired from registrations
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<EventItemSeats(event_item_id={self.event_item_id}, taken={self.taken})>"
+
+
+class EventItemReminder(Base):
+    """EventItemReminder model - напоминание участникам о начале элемента программы"""
+    __tablename__ = "event_item_reminders"
+    
+    # One reminder per item; recipients are its confirmed registrations at send time
+    event_item_id = Column(UUID(as_uuid=True), ForeignKey("event_items.id", ondelete="CASCADE"), primary_key=True)
+    remind_at = Column(DateTime(timezone=True), nullable=False)
+    # Set when a worker takes the reminder for sending; reset when the item is moved
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Scheduler window: WHERE sent_at IS NULL AND remind_at < ?
+        Index("ix_event_item_reminders_pending", "remind_at", postgresql_where=text("sent_at IS NULL")),
+    )
+    
+    def __repr__(self):
+        return f"<EventItemReminder(event_item_id={self.event_item_id}, remind_at={self.remind_at})>"
+
+
 class EventItem(Base):
     """EventItem model - элементы программы мероприятия"""
     __tablename__ = "event_items"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
-    module_id = Column(UUID(as_uuid=True), ForeignKey("modules.id", ondelete="SET NULL"), nullable=True)
+    module_id = Column(UUID(as_uuid=True), ForeignKey("modules.id", ondelete="SET NULL"), nullable=True, index=True)
     
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     date_start = Column(DateTime(timezone=True), nullable=True)
     date_end = Column(DateTime(timezone=True), nullable=True)
-    location_id = Column(UUID(as_uuid=True), ForeignKey("locations.id", ondelete="SET NULL"), nullable=True)
+    location_id = Column(UUID(as_uuid=True), ForeignKey("locations.id", ondelete="SET NULL"), nullable=True, index=True)
     
     capacity = Column(Integer, nullable=True)
-    registered_count = Column(Integer, default=0)
+    # Read-only: taken seats from the counter row (primary key lookup per item)
+    registered_count = column_property(
+        func.coalesce(
+            select(EventItemSeats.taken)
+            .where(EventItemSeats.event_item_id == id)
+            .correlate_except(EventItemSeats)
+            .scalar_subquery(),
+            0,
+        )
+    )
     
     type = Column(String(50), nullable=True)  # lecture, workshop, networking, etc.
     status = Column(String(20), default="active")  # active, cancelled, finished
@@ -31,6 +75,14 @@ class EventItem(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        # Program queries: WHERE event_id = ? ORDER BY date_start
+        Index("ix_event_items_event_id_date_start", "event_id", "date_start"),
+        # Trigram search (pg_trgm)
+        Index("ix_event_items_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_event_items_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+    )
+    
     # Relationships
     event = relationship("Event", back_populates="event_items")
     module = relationship("Module", back_populates="event_items")
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary, func
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """IdempotencyKey model - сохранённые ответы на повторяемые запросы (Idempotency-Key)"""
+    __tablename__ = "idempotency_keys"
+    
+    # Owner of the key (user id / admin name): keys of different clients never collide
+    scope = Column(String(64), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    
+    # Hash of method, path and body: the same key with another request is rejected
+    request_hash = Column(String(64), nullable=False)
+    
+    # Stored response (NULL until the request completes)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<IdempotencyKey(scope={self.scope}, key={self.key})>"
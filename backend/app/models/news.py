@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -22,6 +22,11 @@ class News(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        # News feed: WHERE event_id = ? ORDER BY published_at DESC NULLS LAST
+        Index("ix_news_event_id_published_at", "event_id", published_at.desc().nullslast()),
+    )
+    
     # Relationships
     event = relationship("Event", back_populates="news")
     
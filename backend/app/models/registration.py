@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, func, UniqueConstraint
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, Index, Sequence, func, text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -6,22 +6,34 @@ import uuid
 from app.database import Base
 
 
+# Global monotonic ticket numbers for waitlist order (gaps are fine, only order matters)
+waitlist_position_seq = Sequence("registrations_waitlist_position_seq", metadata=Base.metadata)
+
+
 class Registration(Base):
     """Registration model - записи пользователей на мероприятия"""
     __tablename__ = "registrations"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     event_item_id = Column(UUID(as_uuid=True), ForeignKey("event_items.id", ondelete="CASCADE"), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
-    status = Column(String(20), default="confirmed")  # pending, confirmed, cancelled, waitlist
+    status = Column(String(20), default="confirmed")  # pending, confirmed, cancelled, waitlist, rejected
     
     registered_at = Column(DateTime(timezone=True), server_default=func.now())
     approved_at = Column(DateTime(timezone=True), nullable=True)
     
-    # Unique constraint - one registration per user per event item
+    # Waitlist ticket (set only while status == "waitlist")
+    waitlist_position = Column(BigInteger, nullable=True)
+    
     __table_args__ = (
+        # Unique constraint - one registration per user per event item
         UniqueConstraint('event_item_id', 'user_id', name='uq_registration_event_item_user'),
+        # Waitlist head lookup / position counting: partial, holds only waiting rows
+        Index(
+            "ix_registrations_waitlist", "event_item_id", "waitlist_position",
+            postgresql_where=text("status = 'waitlist'"),
+        ),
     )
     
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import uuid
@@ -11,7 +11,7 @@ class Speaker(Base):
     __tablename__ = "speakers"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
     
     name = Column(String(255), nullable=False)
     bio = Column(Text, nullable=True)
@@ -24,6 +24,12 @@ class Speaker(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        # Trigram search (pg_trgm)
+        Index("ix_speakers_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_speakers_company_trgm", "company", postgresql_using="gin", postgresql_ops={"company": "gin_trgm_ops"}),
+    )
+    
     # Relationships
     event = relationship("Event", back_populates="speakers")
     event_items = relationship("EventSpeaker", back_populates="speaker", cascade="all, delete-orphan")
@@ -37,7 +43,7 @@ class EventSpeaker(Base):
     __tablename__ = "event_speakers"
     
     event_item_id = Column(UUID(as_uuid=True), ForeignKey("event_items.id", ondelete="CASCADE"), primary_key=True)
-    speaker_id = Column(UUID(as_uuid=True), ForeignKey("speakers.id", ondelete="CASCADE"), primary_key=True)
+    speaker_id = Column(UUID(as_uuid=True), ForeignKey("speakers.id", ondelete="CASCADE"), primary_key=True, index=True)
     
     # Relationships
     event_item = relationship("EventItem", back_populates="speakers")
@@ -3,12 +3,20 @@ from app.schemas.module import ModuleCreate, ModuleUpdate, ModuleResponse, Modul
 from app.schemas.user import UserCreate, UserResponse, TelegramAuthData
 from app.schemas.event_item import EventItemCreate, EventItemUpdate, EventItemResponse, EventItemFilter
 from app.schemas.speaker import SpeakerCreate, SpeakerUpdate, SpeakerResponse
-from app.schemas.registration import RegistrationCreate, RegistrationResponse
-from app.schemas.location import LocationCreate, LocationUpdate, LocationResponse, ZoneCreate, ZoneResponse, MapDataResponse
+from app.schemas.registration import (
+    RegistrationCreate, RegistrationResponse, ConflictItem, RegistrationConflict, RegistrationBulkAction,
+    RegistrationCheckRequest,
+)
+from app.schemas.location import (
+    LocationCreate, LocationUpdate, LocationResponse, ZoneCreate, ZoneResponse, MapDataResponse,
+    RouteStep, RouteResponse, NearbyLocation, ZoneAtResponse, LocationUpcomingItem, LocationDetailResponse
+)
 from app.schemas.assistant import AssistantChatRequest, AssistantChatResponse, AssistantKnowledgeCreate, AssistantKnowledgeResponse
 from app.schemas.knowledge_chunk import KnowledgeChunkResponse, KnowledgeChunkRefreshRequest
 from app.schemas.news import NewsCreate, NewsUpdate, NewsResponse
 from app.schemas.message import MessageCreate, MessageResponse
+from app.schemas.broadcast import BroadcastCreate, BroadcastResponse
+from app.schemas.search import SearchItemHit, SearchSpeakerHit, SearchLocationHit, SearchResponse, SearchSuggestion
 
 __all__ = [
     # Event
@@ -22,9 +30,12 @@ __all__ = [
     # Speaker
     "SpeakerCreate", "SpeakerUpdate", "SpeakerResponse",
     # Registration
-    "RegistrationCreate", "RegistrationResponse",
+    "RegistrationCreate", "RegistrationResponse", "ConflictItem", "RegistrationConflict",
+    "RegistrationBulkAction", "RegistrationCheckRequest",
     # Location
     "LocationCreate", "LocationUpdate", "LocationResponse", "ZoneCreate", "ZoneResponse", "MapDataResponse",
+    "RouteStep", "RouteResponse", "NearbyLocation", "ZoneAtResponse", "LocationUpcomingItem",
+    "LocationDetailResponse",
     # Assistant
     "AssistantChatRequest", "AssistantChatResponse", "AssistantKnowledgeCreate", "AssistantKnowledgeResponse",
     # News
@@ -33,4 +44,8 @@ __all__ = [
     "MessageCreate", "MessageResponse",
     # Knowledge Chunk
     "KnowledgeChunkResponse", "KnowledgeChunkRefreshRequest",
+    # Broadcast
+    "BroadcastCreate", "BroadcastResponse",
+    # Search
+    "SearchItemHit", "SearchSpeakerHit", "SearchLocationHit", "SearchResponse", "SearchSuggestion",
 ]
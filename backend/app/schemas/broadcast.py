@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from uuid import UUID
+from typing import Optional, Literal
+
+
+class BroadcastCreate(BaseModel):
+    """
+    Schema for creating a Broadcast.
+    
+    Text (HTML) or news_id is required. Recipients: all users, users
+    registered for any item of event_id, or for event_item_id.
+    """
+    text: Optional[str] = Field(None, min_length=1, max_length=4096)
+    news_id: Optional[UUID] = None
+    audience: Literal["all", "event", "event_item"]
+    event_id: Optional[UUID] = None
+    event_item_id: Optional[UUID] = None
+
+
+class BroadcastResponse(BaseModel):
+    """Schema for Broadcast response with delivery progress"""
+    id: UUID
+    event_id: Optional[UUID] = None
+    news_id: Optional[UUID] = None
+    text: str
+    audience: str
+    audience_id: Optional[UUID] = None
+    status: str
+    total: int
+    sent: int
+    failed: int
+    blocked: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
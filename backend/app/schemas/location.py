@@ -35,6 +35,7 @@ class LocationBase(BaseModel):
     floor: Optional[int] = None
     zone_id: Optional[UUID] = None
     coordinates: dict[str, Any] = Field(default_factory=dict)
+    type: Optional[str] = Field(None, max_length=50)
 
 
 class LocationCreate(LocationBase):
@@ -49,6 +50,7 @@ class LocationUpdate(BaseModel):
     floor: Optional[int] = None
     zone_id: Optional[UUID] = None
     coordinates: Optional[dict[str, Any]] = None
+    type: Optional[str] = Field(None, max_length=50)
 
 
 class LocationResponse(LocationBase):
@@ -65,7 +67,66 @@ class LocationResponse(LocationBase):
         from_attributes = True
 
 
+class LocationUpcomingItem(BaseModel):
+    """Program item coming up at a location"""
+    id: UUID
+    title: str
+    type: Optional[str] = None
+    status: str
+    date_start: Optional[datetime] = None
+    date_end: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class LocationDetailResponse(LocationResponse):
+    """Location with its zone name and upcoming program items"""
+    upcoming_items: list[LocationUpcomingItem] = Field(default_factory=list)
+
+
 class MapDataResponse(BaseModel):
     """Schema for map data response"""
     zones: list[ZoneResponse]
     locations: list[LocationResponse]
+
+
+class RouteStep(BaseModel):
+    """Point of a route; mode is how it is reached (walk, stairs, elevator)"""
+    id: str
+    kind: str
+    name: str
+    floor: int
+    x: float
+    y: float
+    mode: Optional[str] = None
+
+
+class RouteResponse(BaseModel):
+    """Schema for indoor route response"""
+    from_id: str
+    to_id: str
+    distance: float
+    floors: list[int]
+    precomputed: bool = False
+    steps: list[RouteStep]
+
+
+class NearbyLocation(BaseModel):
+    """Location found by a nearest query; distance is in plan units (floor changes included)"""
+    id: UUID
+    name: str
+    type: Optional[str] = None
+    floor: int
+    x: float
+    y: float
+    zone_id: Optional[UUID] = None
+    distance: Optional[float] = None
+
+
+class ZoneAtResponse(BaseModel):
+    """Zones containing a point, innermost first"""
+    floor: int
+    x: float
+    y: float
+    zones: list[ZoneResponse]
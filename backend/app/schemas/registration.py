@@ -20,6 +20,36 @@ class RegistrationResponse(BaseModel):
     
     # Optional nested data
     event_item_title: Optional[str] = None
+    event_item_date_start: Optional[datetime] = None
+    event_item_date_end: Optional[datetime] = None
+    location_id: Optional[UUID] = None
+    location_name: Optional[str] = None
     
     class Config:
         from_attributes = True
+
+
+class ConflictItem(BaseModel):
+    """Event item in a schedule conflict"""
+    id: UUID
+    title: str
+    date_start: Optional[datetime] = None
+    date_end: Optional[datetime] = None
+
+
+class RegistrationConflict(BaseModel):
+    """Pair of user's registrations overlapping in time"""
+    item: ConflictItem
+    conflicts_with: ConflictItem
+
+
+class RegistrationBulkAction(BaseModel):
+    """Schema for bulk approve/reject: listed ids and/or all pending of an item or event"""
+    ids: Optional[list[UUID]] = Field(None, max_length=10000)
+    event_item_id: Optional[UUID] = None
+    event_id: Optional[UUID] = None
+
+
+class RegistrationCheckRequest(BaseModel):
+    """Schema for batch registration status check"""
+    event_item_ids: list[UUID] = Field(..., max_length=1000)
@@ -0,0 +1,49 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from uuid import UUID
+from typing import Optional, Literal
+
+
+class SearchItemHit(BaseModel):
+    """Event item found by search"""
+    id: UUID
+    title: str
+    type: Optional[str] = None
+    date_start: Optional[datetime] = None
+    date_end: Optional[datetime] = None
+    location_id: Optional[UUID] = None
+    location_name: Optional[str] = None
+    score: float
+
+
+class SearchSpeakerHit(BaseModel):
+    """Speaker found by search"""
+    id: UUID
+    name: str
+    position: Optional[str] = None
+    company: Optional[str] = None
+    photo_url: Optional[str] = None
+    score: float
+
+
+class SearchLocationHit(BaseModel):
+    """Location found by search"""
+    id: UUID
+    name: str
+    floor: Optional[int] = None
+    score: float
+
+
+class SearchResponse(BaseModel):
+    """Schema for unified event search response"""
+    query: str
+    items: list[SearchItemHit] = Field(default_factory=list)
+    speakers: list[SearchSpeakerHit] = Field(default_factory=list)
+    locations: list[SearchLocationHit] = Field(default_factory=list)
+
+
+class SearchSuggestion(BaseModel):
+    """Autocomplete suggestion"""
+    text: str
+    type: Literal["item", "speaker", "location"]
+    id: UUID
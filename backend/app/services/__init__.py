@@ -5,6 +5,8 @@ from app.services.event_item_service import EventItemService
 from app.services.registration_service import RegistrationService
 from app.services.assistant_service import AssistantService
 from app.services.knowledge_chunk_service import KnowledgeChunkService
+from app.services.bootstrap_service import BootstrapService
+from app.services.search_service import SearchService
 
 __all__ = [
     "EventService",
@@ -14,4 +16,6 @@ __all__ = [
     "RegistrationService",
     "AssistantService",
     "KnowledgeChunkService",
+    "BootstrapService",
+    "SearchService",
 ]
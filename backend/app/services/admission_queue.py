@@ -0,0 +1,183 @@
+"""
+Admission queue for registration flash crowds.
+
+Instead of every request taking the event item row lock, requests are
+queued per item and a single worker registers them in batches: one
+lock, one counter update and one insert per batch, in arrival order.
+Callers get a ticket to poll (or wait on) for the result.
+
+The queue is process-local: each API worker batches its own requests.
+Tickets are resolved from the database when polled on another worker
+(see the registration endpoints); their ids carry the issue time, so a
+ticket not yet processed there is told apart from an unknown one.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.database import async_session_maker
+from app.services.registration_service import RegistrationService
+from app.utils.cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+
+def new_ticket_id() -> str:
+    """Random ticket id ending with the issue time (hex seconds)"""
+    return f"{uuid.uuid4().hex}{int(time.time()):x}"
+
+
+def ticket_issued_at(ticket_id: str) -> Optional[float]:
+    """Issue time of a ticket id (None if it isn't one)"""
+    if len(ticket_id) <= 32:
+        return None
+    try:
+        return float(int(ticket_id[32:], 16))
+    except ValueError:
+        return None
+
+
+@dataclass
+class AdmissionTicket:
+    """Queued registration request"""
+    id: str
+    event_item_id: UUID
+    user_id: UUID
+    # Arrival number within the item's queue
+    sequence: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    status: str = "queued"  # queued, done
+    success: bool = False
+    message: str = ""
+    registration_id: Optional[UUID] = None
+    registration_status: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self, position: Optional[int] = None) -> dict:
+        return {
+            "ticket_id": self.id,
+            "status": self.status,
+            "position": position,
+            "success": self.success,
+            "message": self.message,
+            "registration_id": str(self.registration_id) if self.registration_id else None,
+            "registration_status": self.registration_status,
+        }
+
+
+class AdmissionQueue:
+    """Per-item FIFO queues of registration requests, drained in batches"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session_maker,
+        batch_size: int = settings.REGISTRATION_QUEUE_BATCH_SIZE,
+        batch_interval: float = settings.REGISTRATION_QUEUE_BATCH_INTERVAL_MS / 1000,
+        ticket_ttl: float = settings.REGISTRATION_QUEUE_TICKET_TTL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        # Tickets of queued requests must outlive the queue, so the bound is generous
+        self.tickets: LocalCache[AdmissionTicket] = LocalCache(ticket_ttl, max_size=100_000)
+        self._queues: dict[UUID, deque[AdmissionTicket]] = {}
+        self._pending: dict[tuple[UUID, UUID], AdmissionTicket] = {}
+        self._workers: dict[UUID, asyncio.Task] = {}
+
+    def enqueue(self, event_item_id: UUID, user_id: UUID) -> AdmissionTicket:
+        """Queue a registration request; repeated taps get the same ticket"""
+        ticket = self._pending.get((event_item_id, user_id))
+        if ticket:
+            return ticket
+
+        queue = self._queues.setdefault(event_item_id, deque())
+        sequence = queue[-1].sequence + 1 if queue else 0
+        ticket = AdmissionTicket(
+            id=new_ticket_id(), event_item_id=event_item_id, user_id=user_id, sequence=sequence
+        )
+        self.tickets.set(ticket.id, ticket)
+        self._pending[(event_item_id, user_id)] = ticket
+        queue.append(ticket)
+
+        if event_item_id not in self._workers:
+            self._workers[event_item_id] = asyncio.create_task(self._worker(event_item_id))
+        return ticket
+
+    def position(self, ticket: AdmissionTicket) -> Optional[int]:
+        """Get 1-based position of a queued ticket"""
+        if ticket.status != "queued":
+            return None
+        queue = self._queues.get(ticket.event_item_id)
+        # Tickets leave the queue from the head only, so sequences in it are consecutive
+        if queue and queue[0].sequence <= ticket.sequence:
+            return ticket.sequence - queue[0].sequence + 1
+        # Taken by the worker, batch in progress
+        return 0
+
+    async def wait(self, ticket: AdmissionTicket, timeout: float) -> AdmissionTicket:
+        """Wait until the ticket is processed or the timeout expires"""
+        if timeout > 0 and ticket.status == "queued":
+            try:
+                await asyncio.wait_for(ticket.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return ticket
+
+    async def close(self) -> None:
+        """Let workers drain the queues (on shutdown)"""
+        if self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    async def _worker(self, event_item_id: UUID) -> None:
+        queue = self._queues[event_item_id]
+        try:
+            while queue:
+                # Let the burst accumulate into one batch
+                await asyncio.sleep(self.batch_interval)
+                batch = [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+                await self._process(event_item_id, batch)
+        finally:
+            self._workers.pop(event_item_id, None)
+            if not queue:
+                self._queues.pop(event_item_id, None)
+
+    async def _process(self, event_item_id: UUID, batch: list[AdmissionTicket]) -> None:
+        started = time.perf_counter()
+        try:
+            async with self.session_factory() as db:
+                results = await RegistrationService(db).register_batch(
+                    event_item_id, [ticket.user_id for ticket in batch]
+                )
+                await db.commit()
+        except Exception:
+            logger.exception(f"Registration batch for item {event_item_id} failed")
+            results = {}
+
+        for ticket in batch:
+            registration, message = results.get(
+                ticket.user_id, (None, "Не удалось обработать запись, попробуйте ещё раз")
+            )
+            ticket.success = registration is not None
+            ticket.message = message
+            if registration:
+                ticket.registration_id = registration.id
+                ticket.registration_status = registration.status
+            ticket.status = "done"
+            ticket.done.set()
+            self._pending.pop((ticket.event_item_id, ticket.user_id), None)
+
+        logger.info(
+            f"Registration batch for item {event_item_id}: {len(batch)} requests "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+
+admission_queue = AdmissionQueue()
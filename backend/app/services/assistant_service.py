@@ -1,12 +1,115 @@
+import asyncio
+import logging
 from uuid import UUID
-from typing import Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Hashable, Optional
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models import Event, EventItem, AssistantKnowledge, EventSpeaker, KnowledgeChunk, Module
 from app.services.knowledge_chunk_service import KnowledgeChunkService
-from app.utils.llm_client import llm_client
+from app.services.map_snapshot import get_map_snapshot
+from app.services.program_snapshot import ProgramSnapshot, get_program_snapshot
+from app.services.spatial_index import LocationEntry
+from app.utils.cache import LocalCache
+from app.utils.event_time import format_time_range, to_event_time
+from app.utils.llm_client import ERROR_MESSAGE, UNAVAILABLE_MESSAGE, llm_client
+
+logger = logging.getLogger(__name__)
+
+# Location.type -> (name for the answer, message keywords)
+PLACE_TYPES = {
+    "toilet": ("Туалет", ("туалет", "уборн", "wc")),
+    "coffee": ("Кофе-пойнт", ("кофе", "coffee")),
+    "food": ("Питание", ("поесть", "обед", "столов", "буфет", "кафе")),
+    "wardrobe": ("Гардероб", ("гардероб",)),
+}
+
+
+class AnswerStream:
+    """
+    Assistant answer, possibly still being generated.
+    
+    The text grows as the LLM produces it; everyone asking the same
+    question meanwhile follows the same stream instead of another LLM call.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self.sources: list[str] = []
+        self.actions: list[dict] = []
+        self.done = False
+        self.failed = False
+        self._updated = asyncio.Event()
+    
+    def append(self, piece: str) -> None:
+        self.text += piece
+        self._notify()
+    
+    def finish(self, text: Optional[str] = None, failed: bool = False) -> None:
+        if text is not None:
+            self.text = text
+        self.failed = failed
+        self.done = True
+        self._notify()
+    
+    def _notify(self) -> None:
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+    
+    async def follow(self) -> AsyncIterator[str]:
+        """Yield the text so far whenever it grows, until the answer is finished"""
+        shown = ""
+        while True:
+            updated = self._updated
+            if self.text != shown:
+                shown = self.text
+                yield shown
+            if self.done:
+                return
+            await updated.wait()
+    
+    async def wait(self) -> None:
+        """Wait until the answer is finished"""
+        while not self.done:
+            await self._updated.wait()
+
+
+# Finished answers by (event_id, normalized question, context); the TTL bounds
+# staleness of "what's on now" answers, knowledge changes clear the cache
+answer_cache: LocalCache[AnswerStream] = LocalCache(settings.ASSISTANT_ANSWER_CACHE_TTL_SECONDS)
+# Answers being generated right now, by the same key
+_in_flight: dict[Hashable, AnswerStream] = {}
+# Keep references so running generations aren't garbage collected
+_tasks: set[asyncio.Task] = set()
+
+
+def answer_key(event_id: UUID, message: str, context: Optional[dict] = None) -> Hashable:
+    """Cache key of a question: case, spacing and trailing punctuation don't matter"""
+    question = " ".join(message.lower().split()).rstrip("?!. ")
+    context_key = tuple(sorted((key, str(value)) for key, value in (context or {}).items() if value is not None))
+    return event_id, question, context_key
+
+
+async def _generate(key: Hashable, answer: AnswerStream, system_prompt: str, message: str, context_str: str) -> None:
+    """Stream the LLM answer into answer; cache it unless it failed"""
+    try:
+        async for piece in llm_client.stream_response(
+            system_prompt=system_prompt,
+            user_message=message,
+            context=context_str
+        ):
+            answer.append(piece)
+        answer.finish(answer.text or "Не удалось получить ответ.")
+        answer_cache.set(key, answer)
+    except Exception:
+        if llm_client.client:
+            logger.exception("Assistant answer generation failed")
+        answer.finish(UNAVAILABLE_MESSAGE if llm_client.client is None else ERROR_MESSAGE, failed=True)
+    finally:
+        _in_flight.pop(key, None)
 
 
 class AssistantService:
@@ -27,31 +130,84 @@ class AssistantService:
         Args:
             event_id: ID of the current event
             message: User's message
-            context: Optional context (module_id, item_id)
+            context: Optional context (module_id, item_id, location_id)
             
         Returns:
             Tuple of (response text, list of sources, list of actions)
         """
+        answer = await self.answer(event_id, message, context)
+        await answer.wait()
+        return answer.text, answer.sources, answer.actions
+    
+    async def answer(
+        self,
+        event_id: UUID,
+        message: str,
+        context: Optional[dict] = None
+    ) -> AnswerStream:
+        """
+        Get the answer to a message as a stream.
+        
+        A cached answer is returned as is and a question already being
+        answered joins that generation. Otherwise the prompt is built with
+        this session and the LLM answer is generated in the background, so
+        it finishes (and gets cached) even if the asker goes away.
+        """
+        key = answer_key(event_id, message, context)
+        answer = answer_cache.get(key) or _in_flight.get(key)
+        if answer is not None:
+            return answer
+        
+        answer = _in_flight[key] = AnswerStream()
+        try:
+            prompt = await self._prepare(answer, event_id, message, context)
+        except BaseException:
+            _in_flight.pop(key, None)
+            answer.finish(ERROR_MESSAGE, failed=True)
+            raise
+        if prompt is None:
+            # Answered without the LLM
+            _in_flight.pop(key, None)
+            return answer
+        
+        task = asyncio.create_task(_generate(key, answer, *prompt))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+        return answer
+    
+    async def _prepare(
+        self,
+        answer: AnswerStream,
+        event_id: UUID,
+        message: str,
+        context: Optional[dict] = None
+    ) -> Optional[tuple[str, str, str]]:
+        """
+        Build the LLM prompt and fill sources and actions of the answer.
+        
+        Returns (system prompt, message, context) or None when the answer
+        was given right away.
+        """
         # Check for special admin command
         admin_keywords = ["admin", "админ", "админка", "панель администратора"]
         message_lower = message.lower().strip()
         
         if any(keyword in message_lower for keyword in admin_keywords):
-            from app.config import settings
             admin_url = f"{settings.TELEGRAM_WEBAPP_URL}/admin" if settings.TELEGRAM_WEBAPP_URL else "/admin"
             
-            response_text = "🔐 Перейдите в админ панель для управления мероприятиями:"
-            actions = [{
+            answer.actions = [{
                 "type": "open_admin",
                 "label": "Открыть админ панель",
                 "url": admin_url
             }]
-            return response_text, [], actions
+            answer.finish("🔐 Перейдите в админ панель для управления мероприятиями:")
+            return None
         
         # Get event info
         event = await self.db.get(Event, event_id)
         if not event:
-            return "Мероприятие не найдено.", [], []
+            answer.finish("Мероприятие не найдено.")
+            return None
         
         chunk_service = KnowledgeChunkService(self.db)
         # Build knowledge base
@@ -63,17 +219,18 @@ class AssistantService:
         # Build context string
         context_str = await self._build_context_string(event_id, context)
         
-        # Generate response
-        response = await llm_client.generate_response(
-            system_prompt=system_prompt,
-            user_message=message,
-            context=context_str
-        )
+        # "Где туалет?" - nearest places of the asked types from the map spatial index
+        places = await self._find_places(event_id, message_lower, context)
+        if places:
+            context_str = "\n".join(filter(None, [context_str] + [
+                f"{PLACE_TYPES[place.type][0]} рядом: {place.name}, этаж {place.floor}"
+                for place in places
+            ]))
         
         # Extract sources (simplified - just mention knowledge was used)
-        sources = ["База знаний мероприятия"] if knowledge_base else []
+        answer.sources = ["База знаний мероприятия"] if knowledge_base else []
 
-        actions: list[dict] = []
+        actions = answer.actions
         try:
             item_id = (context or {}).get("item_id")
             if item_id:
@@ -86,8 +243,53 @@ class AssistantService:
                     })
         except Exception:
             pass
+        for place in places:
+            actions.append({
+                "type": "open_map",
+                "label": f"{PLACE_TYPES[place.type][0]}: {place.name}",
+                "location_id": place.id,
+            })
 
-        return response, sources, actions
+        return system_prompt, message, context_str
+    
+    async def _find_places(
+        self,
+        event_id: UUID,
+        message_lower: str,
+        context: Optional[dict] = None
+    ) -> list[LocationEntry]:
+        """Find the nearest location of every place type asked about in the message"""
+        place_types = [
+            place_type for place_type, (_, keywords) in PLACE_TYPES.items()
+            if any(keyword in message_lower for keyword in keywords)
+        ]
+        if not place_types:
+            return []
+        
+        spatial = (await get_map_snapshot(self.db, event_id)).spatial
+        origin_id = await self._context_location_id(context)
+        places = []
+        for place_type in place_types:
+            hits = spatial.nearest_to_location(origin_id, place_type, k=1) if origin_id else None
+            if hits:
+                places.append(hits[0][1])
+            elif candidates := spatial.of_type(place_type):
+                # No known position of the user: any place of the type
+                places.append(candidates[0])
+        return places
+    
+    async def _context_location_id(self, context: Optional[dict] = None) -> Optional[UUID]:
+        """Location the user is at or looking at: context location_id or the item's location"""
+        context = context or {}
+        try:
+            if context.get("location_id"):
+                return UUID(str(context["location_id"]))
+            if context.get("item_id"):
+                item = await self.db.get(EventItem, UUID(str(context["item_id"])))
+                return item.location_id if item else None
+        except ValueError:
+            pass
+        return None
     
     async def _build_knowledge_base(
         self,
@@ -145,8 +347,43 @@ class AssistantService:
         relevant_chunks = await chunk_service.get_relevant_chunks(event.id, message)
         knowledge_items.extend([chunk.content for chunk in relevant_chunks])
 
+        # "Что сейчас идёт" - from the in-memory schedule index, no extra queries
+        snapshot = await get_program_snapshot(self.db, event.id)
+        schedule_summary = self._build_schedule_summary(snapshot)
+        if schedule_summary:
+            knowledge_items.append(schedule_summary)
+
         return knowledge_items
     
+    def _build_schedule_summary(self, snapshot: ProgramSnapshot, limit: int = 5) -> str:
+        """Describe items running now and the nearest upcoming ones"""
+        now = datetime.now(timezone.utc)
+        sections = [
+            ("Сейчас идёт", snapshot.schedule.now(now)[:limit]),
+            ("Далее", snapshot.schedule.next(now, limit=limit)),
+        ]
+        
+        parts = []
+        for title, positions in sections:
+            if not positions:
+                continue
+            lines = []
+            for position in positions:
+                card = snapshot.items[position]
+                line = f"- {card['title']}"
+                if card.get("date_start"):
+                    time_str = format_time_range(
+                        datetime.fromisoformat(card["date_start"]),
+                        datetime.fromisoformat(card["date_end"]) if card.get("date_end") else None,
+                    )
+                    line += f" ({time_str})"
+                if card.get("location_name"):
+                    line += f", локация: {card['location_name']}"
+                lines.append(line)
+            parts.append(f"{title} (на {to_event_time(now).strftime('%d.%m %H:%M %Z')}):\n" + "\n".join(lines))
+        
+        return "\n\n".join(parts)
+    
     async def _build_context_string(
         self,
         event_id: UUID,
@@ -171,9 +408,7 @@ class AssistantService:
             if item:
                 parts.append(f"Пользователь смотрит: {item.title}")
                 if item.date_start:
-                    time_str = item.date_start.strftime("%d.%m %H:%M")
-                    if item.date_end:
-                        time_str += f" - {item.date_end.strftime('%H:%M')}"
+                    time_str = format_time_range(item.date_start, item.date_end)
                     parts.append(f"Время: {time_str}")
                 if item.location:
                     parts.append(f"Локация: {item.location.name}")
@@ -209,6 +444,7 @@ class AssistantService:
             await chunk_service.refresh_event_chunks(event_id)
         else:
             await chunk_service.refresh_global_chunks()
+        answer_cache.clear()
         return knowledge
     
     async def get_knowledge(self, event_id: Optional[UUID] = None) -> list[AssistantKnowledge]:
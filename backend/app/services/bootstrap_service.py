@@ -0,0 +1,105 @@
+import hashlib
+from uuid import UUID
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import async_session_maker
+from app.models import Event, News, Speaker
+from app.schemas import (
+    EventResponse, ModuleResponse, SpeakerResponse, NewsResponse,
+)
+from app.services.map_snapshot import get_map_snapshot
+from app.services.module_service import ModuleService
+from app.services.program_snapshot import get_program_snapshot, get_seat_counts
+from app.utils.fast_json import dumps
+
+# Количество новостей в стартовом наборе (как у /news/events/{id}/news по умолчанию)
+BOOTSTRAP_NEWS_LIMIT = 20
+
+
+def section_version(data) -> str:
+    """Short content hash of a JSON-ready section"""
+    return hashlib.sha1(dumps(data, sort_keys=True)).hexdigest()[:12]
+
+
+class BootstrapService:
+    """
+    Service for assembling the Mini App dashboard payload.
+
+    One request replaces the separate event/modules/items/days/types/
+    speakers/map/news calls. Program and map come from the cached
+    snapshots; the rest is loaded in a single session, so a cold
+    bootstrap holds one pool connection.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker = async_session_maker):
+        self.session_factory = session_factory
+
+    async def build(self, event_id: UUID) -> Optional[dict]:
+        """
+        Build combined payload for an event.
+
+        Returns:
+            Dict with sections and per-section versions, or None if event not found
+        """
+        async with self.session_factory() as db:
+            core = await self._load_core(db, event_id)
+            if core is None:
+                return None
+            program_versions, program = await self._load_program(db, event_id)
+            speakers = await self._load_speakers(db, event_id)
+            map_data = (await get_map_snapshot(db, event_id)).data
+
+        sections = {**core, **program, "speakers": speakers, "map": map_data}
+        versions = {
+            name: program_versions.get(name) or section_version(value)
+            for name, value in sections.items()
+        }
+
+        return {
+            "event_id": str(event_id),
+            "version": section_version(versions),
+            "versions": versions,
+            **sections,
+        }
+
+    async def _load_core(self, db: AsyncSession, event_id: UUID) -> Optional[dict]:
+        """Event, enabled modules and latest news"""
+        event = await db.get(Event, event_id)
+        if not event:
+            return None
+
+        modules = await ModuleService(db).get_by_event(event_id, enabled_only=True)
+
+        news_result = await db.execute(
+            select(News)
+            .where(News.event_id == event_id)
+            .order_by(News.published_at.desc().nullslast())
+            .limit(BOOTSTRAP_NEWS_LIMIT)
+        )
+
+        return {
+            "event": EventResponse.model_validate(event).model_dump(mode="json"),
+            "modules": [ModuleResponse.model_validate(m).model_dump(mode="json") for m in modules],
+            "news": [NewsResponse.model_validate(n).model_dump(mode="json") for n in news_result.scalars().all()],
+        }
+
+    async def _load_program(self, db: AsyncSession, event_id: UUID) -> tuple[dict, dict]:
+        """Program items, days and types (with their versions) from the cached program snapshot"""
+        snapshot = await get_program_snapshot(db, event_id)
+        seats = await get_seat_counts(db, event_id)
+        versions = {
+            "items": section_version([snapshot.version, seats.version]),
+            "days": snapshot.version,
+            "types": snapshot.version,
+        }
+        return versions, {
+            "items": snapshot.cards(seats),
+            "days": [d.isoformat() for d in snapshot.days],
+            "types": snapshot.types,
+        }
+
+    async def _load_speakers(self, db: AsyncSession, event_id: UUID) -> list[dict]:
+        result = await db.execute(select(Speaker).where(Speaker.event_id == event_id))
+        return [SpeakerResponse.model_validate(s).model_dump(mode="json") for s in result.scalars().all()]
@@ -0,0 +1,159 @@
+from html import escape
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import select, insert, update, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bot.webapp import get_webapp_url
+from app.config import settings
+from app.models import Broadcast, BroadcastDelivery, EventItem, News, Registration, User
+from app.schemas import BroadcastCreate
+
+# Registrations whose owners get announcements about the item
+RECIPIENT_STATUSES = ("confirmed", "pending", "waitlist")
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+def news_text(news: News) -> str:
+    """
+    Broadcast text (HTML) of a news item.
+
+    Content beyond the Telegram message limit is cut, with a link to the
+    news in the Mini App when its URL is set.
+    """
+    title = f"<b>{escape(news.title)}</b>"
+    if not news.content:
+        return title
+    text = f"{title}\n\n{escape(news.content)}"
+    if len(text) <= MAX_MESSAGE_LENGTH:
+        return text
+
+    more = f'\n\n<a href="{escape(get_webapp_url("news"))}">Читать полностью</a>' if settings.TELEGRAM_WEBAPP_URL else ""
+    room = MAX_MESSAGE_LENGTH - len(title) - len("\n\n…") - len(more)
+    # Longest content prefix that fits once escaped
+    low, high = 0, len(news.content)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(escape(news.content[:middle])) <= room:
+            low = middle
+        else:
+            high = middle - 1
+    return f"{title}\n\n{escape(news.content[:low])}…{more}"
+
+
+class BroadcastService:
+    """Service for bot broadcasts: creation, recipient selection, progress"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, data: BroadcastCreate) -> Broadcast:
+        """
+        Create a broadcast with one pending delivery per recipient.
+
+        Recipients are selected with a single INSERT ... SELECT; the
+        broadcaster sends them in the background.
+        """
+        text = data.text
+        event_id = data.event_id
+        if data.news_id:
+            news = await self.db.get(News, data.news_id)
+            if not news:
+                raise ValueError("News not found")
+            text = text or news_text(news)
+            event_id = event_id or news.event_id
+        if not text:
+            raise ValueError("text or news_id is required")
+
+        audience_id = None
+        recipients = select(User.telegram_id)
+        if data.audience == "event":
+            if not event_id:
+                raise ValueError("event_id is required")
+            audience_id = event_id
+            recipients = (
+                recipients
+                .join(Registration, Registration.user_id == User.id)
+                .join(EventItem, Registration.event_item_id == EventItem.id)
+                .where(EventItem.event_id == event_id, Registration.status.in_(RECIPIENT_STATUSES))
+            )
+        elif data.audience == "event_item":
+            item = await self.db.get(EventItem, data.event_item_id) if data.event_item_id else None
+            if not item:
+                raise ValueError("Event item not found")
+            audience_id = item.id
+            event_id = event_id or item.event_id
+            recipients = (
+                recipients
+                .join(Registration, Registration.user_id == User.id)
+                .where(Registration.event_item_id == item.id, Registration.status.in_(RECIPIENT_STATUSES))
+            )
+
+        broadcast = Broadcast(
+            event_id=event_id,
+            news_id=data.news_id,
+            text=text,
+            audience=data.audience,
+            audience_id=audience_id,
+        )
+        self.db.add(broadcast)
+        await self.db.flush()
+
+        result = await self.db.execute(
+            insert(BroadcastDelivery).from_select(
+                ["broadcast_id", "telegram_id"],
+                recipients.with_only_columns(literal(broadcast.id), User.telegram_id).distinct()
+            )
+        )
+        broadcast.total = result.rowcount
+        if not broadcast.total:
+            broadcast.status = "done"
+            broadcast.finished_at = func.now()
+        await self.db.flush()
+        await self.db.refresh(broadcast)
+        return broadcast
+
+    async def get(self, broadcast_id: UUID) -> Optional[Broadcast]:
+        """Get broadcast by ID"""
+        return await self.db.get(Broadcast, broadcast_id)
+
+    async def get_all(self, event_id: Optional[UUID] = None, limit: int = 50) -> list[Broadcast]:
+        """Get latest broadcasts, of an event or all"""
+        query = select(Broadcast).order_by(Broadcast.created_at.desc()).limit(limit)
+        if event_id:
+            query = query.where(Broadcast.event_id == event_id)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    async def set_status(self, broadcast_id: UUID, status: str) -> Optional[Broadcast]:
+        """
+        Pause, resume or cancel a broadcast.
+
+        The broadcaster checks the status between batches. Finished and
+        cancelled broadcasts don't change.
+        """
+        allowed_from = {
+            "paused": ("pending", "running"),
+            "pending": ("paused",),
+            "cancelled": ("pending", "running", "paused"),
+        }[status]
+        values = {"status": status}
+        if status == "cancelled":
+            values["finished_at"] = func.now()
+        await self.db.execute(
+            update(Broadcast)
+            .where(Broadcast.id == broadcast_id, Broadcast.status.in_(allowed_from))
+            .values(**values)
+        )
+        broadcast = await self.db.get(Broadcast, broadcast_id, populate_existing=True)
+        return broadcast
+
+    async def delivery_stats(self, broadcast_id: UUID) -> dict[str, int]:
+        """Count deliveries by status"""
+        result = await self.db.execute(
+            select(BroadcastDelivery.status, func.count())
+            .where(BroadcastDelivery.broadcast_id == broadcast_id)
+            .group_by(BroadcastDelivery.status)
+        )
+        return {status: count for status, count in result.all()}
@@ -0,0 +1,309 @@
+"""
+Rate-limited sending of bot broadcasts.
+
+Deliveries of a broadcast are stored one row per recipient (see
+BroadcastService.create). A worker leases a broadcast, takes pending
+deliveries in batches ordered by telegram_id and sends them through
+token buckets: one global (Telegram allows about 30 messages per second
+per bot) and one per chat. A 429 answer pauses the global bucket for its
+retry_after and the message is retried; users who blocked the bot are
+marked blocked, other errors are retried up to BROADCAST_MAX_ATTEMPTS.
+
+Only one broadcast is sent at a time by all API workers together. The
+lease carries an owner token: before every batch the worker extends it
+(and stops if the token is no longer its own), and progress is written
+after every batch together with another extension. A broadcast
+interrupted by a restart or crash resumes from the first unsent batch
+once the lease expires: at most one batch can be delivered twice, and
+only deliveries still pending are recorded and counted.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import case, event, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models import Broadcast, BroadcastDelivery
+from app.utils.rate_limit import KeyedTokenBuckets, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key of claiming a broadcast
+ADVISORY_LOCK_KEY = 0xB40ADCA5
+
+# Outcome of a delivery: (status, error, attempts)
+Outcome = tuple[str, Optional[str], int]
+
+
+class BroadcastSender:
+    """Sends messages within global and per-chat limits, retrying 429 answers"""
+
+    def __init__(
+        self,
+        bot: Bot,
+        rate: float = settings.BROADCAST_RATE_PER_SECOND,
+        per_chat_rate: float = settings.BROADCAST_PER_CHAT_RATE_PER_SECOND,
+        concurrency: int = settings.BROADCAST_CONCURRENCY,
+        max_attempts: int = settings.BROADCAST_MAX_ATTEMPTS,
+    ):
+        self.bot = bot
+        # No burst allowance: messages are spread evenly over each second
+        self.bucket = TokenBucket(rate)
+        self.chat_buckets = KeyedTokenBuckets(per_chat_rate)
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_after_count = 0
+
+    async def send_many(self, telegram_ids: list[int], text: str) -> dict[int, Outcome]:
+        """Send text to all chats concurrently; returns outcome per chat"""
+        return await self.send_messages({telegram_id: text for telegram_id in telegram_ids})
+
+    async def send_messages(self, messages: dict[int, str]) -> dict[int, Outcome]:
+        """Send own text to every chat concurrently; returns outcome per chat"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(telegram_id: int, text: str) -> tuple[int, Outcome]:
+            async with semaphore:
+                return telegram_id, await self.send(telegram_id, text)
+
+        return dict(await asyncio.gather(*(send(telegram_id, text) for telegram_id, text in messages.items())))
+
+    async def send(self, telegram_id: int, text: str) -> Outcome:
+        """Send one message, waiting for tokens and retrying flood and network errors"""
+        attempts = 0
+        while True:
+            attempts += 1
+            await self.chat_buckets.get(telegram_id).acquire()
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(
+                    telegram_id, text, parse_mode=ParseMode.HTML, disable_web_page_preview=True
+                )
+                return "sent", None, attempts
+            except TelegramRetryAfter as e:
+                # Flood limits are per bot: slow everything down, not just this chat
+                self.retry_after_count += 1
+                self.bucket.pause(e.retry_after)
+                error = str(e)
+            except TelegramForbiddenError as e:
+                return "blocked", str(e)[:255], attempts
+            except TelegramBadRequest as e:
+                return "failed", str(e)[:255], attempts
+            except Exception as e:
+                error = str(e)
+                await asyncio.sleep(min(2 ** attempts, 30))
+            if attempts >= self.max_attempts:
+                return "failed", error[:255], attempts
+
+
+_sender: Optional[BroadcastSender] = None
+
+
+def get_sender(bot: Bot) -> BroadcastSender:
+    """Process-wide sender: broadcasts and reminders share the bot's rate limits"""
+    global _sender
+    if _sender is None:
+        _sender = BroadcastSender(bot)
+    return _sender
+
+
+class Broadcaster:
+    """Background job leasing and sending broadcasts of all workers"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session_maker,
+        batch_size: int = settings.BROADCAST_BATCH_SIZE,
+        poll_interval: float = settings.BROADCAST_POLL_SECONDS,
+        lease: float = settings.BROADCAST_LEASE_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.sender: Optional[BroadcastSender] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    def start(self, bot: Optional[Bot]) -> None:
+        """Start the loop (nothing to do without a bot token)"""
+        if bot is not None and self._task is None:
+            self.sender = get_sender(bot)
+            self._task = asyncio.create_task(self._loop())
+
+    def wake(self) -> None:
+        """Look for broadcasts now instead of at the next poll"""
+        self._wake.set()
+
+    async def close(self) -> None:
+        """Stop the loop; the lease of a broadcast in progress expires and another worker resumes it"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "retry_after_count": self.sender.retry_after_count if self.sender else 0,
+        }
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                while (claim := await self._claim()) is not None:
+                    await self.run(*claim)
+            except Exception:
+                logger.exception("Broadcast sending failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _lease_until(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease)
+
+    async def _claim(self) -> Optional[tuple[UUID, UUID]]:
+        """
+        Lease the oldest pending broadcast or a running one whose worker is gone.
+
+        Only one broadcast is sent at a time across all workers, so the
+        global rate limit of the bot holds.
+
+        Returns:
+            (broadcast id, lease token), or None if there is nothing to send
+        """
+        async with self.session_factory() as db, db.begin():
+            # Claims are serialized; the lock lives as long as this transaction
+            if not await db.scalar(select(func.pg_try_advisory_xact_lock(ADVISORY_LOCK_KEY))):
+                return None
+            active = await db.scalar(
+                select(Broadcast.id)
+                .where(Broadcast.status == "running", Broadcast.locked_until >= func.now())
+                .limit(1)
+            )
+            if active is not None:
+                return None
+            candidate = (
+                select(Broadcast.id)
+                .where(or_(
+                    Broadcast.status == "pending",
+                    (Broadcast.status == "running")
+                    & or_(Broadcast.locked_until.is_(None), Broadcast.locked_until < func.now()),
+                ))
+                .order_by(Broadcast.created_at)
+                .limit(1)
+                .scalar_subquery()
+            )
+            token = uuid.uuid4()
+            broadcast_id = await db.scalar(
+                update(Broadcast)
+                .where(Broadcast.id == candidate)
+                .values(
+                    status="running",
+                    locked_until=self._lease_until(),
+                    locked_by=token,
+                    started_at=func.coalesce(Broadcast.started_at, func.now()),
+                )
+                .returning(Broadcast.id)
+            )
+            return (broadcast_id, token) if broadcast_id is not None else None
+
+    async def run(self, broadcast_id: UUID, token: UUID) -> None:
+        """Send pending deliveries batch by batch while the broadcast stays running under our lease"""
+        while True:
+            async with self.session_factory() as db, db.begin():
+                # Extend the lease before sending, so it can't expire mid-batch
+                text = await db.scalar(
+                    update(Broadcast)
+                    .where(Broadcast.id == broadcast_id, Broadcast.status == "running", Broadcast.locked_by == token)
+                    .values(locked_until=self._lease_until())
+                    .returning(Broadcast.text)
+                )
+                if text is None:
+                    # Paused, cancelled or taken over by another worker
+                    return
+                telegram_ids = list((await db.scalars(
+                    select(BroadcastDelivery.telegram_id)
+                    .where(BroadcastDelivery.broadcast_id == broadcast_id, BroadcastDelivery.status == "pending")
+                    .order_by(BroadcastDelivery.telegram_id)
+                    .limit(self.batch_size)
+                )).all())
+
+            if not telegram_ids:
+                await self._finish(broadcast_id, token)
+                return
+
+            outcomes = await self.sender.send_many(telegram_ids, text)
+            await self._save(broadcast_id, token, outcomes)
+
+    async def _save(self, broadcast_id: UUID, token: UUID, outcomes: dict[int, Outcome]) -> None:
+        """
+        Record a batch: delivery rows, counters and the lease in one transaction.
+
+        Only deliveries still pending are updated and counted, so a batch
+        also sent by a worker that took the broadcast over counts once.
+        """
+        counts = {"sent": 0, "failed": 0, "blocked": 0}
+        async with self.session_factory() as db, db.begin():
+            by_outcome: dict[Outcome, list[int]] = {}
+            for telegram_id, outcome in outcomes.items():
+                by_outcome.setdefault(outcome, []).append(telegram_id)
+            for (status, error, attempts), telegram_ids in by_outcome.items():
+                updated = await db.scalars(
+                    update(BroadcastDelivery)
+                    .where(
+                        BroadcastDelivery.broadcast_id == broadcast_id,
+                        BroadcastDelivery.telegram_id.in_(telegram_ids),
+                        BroadcastDelivery.status == "pending",
+                    )
+                    .values(
+                        status=status,
+                        error=error,
+                        attempts=BroadcastDelivery.attempts + attempts,
+                        sent_at=func.now() if status == "sent" else None,
+                    )
+                    .returning(BroadcastDelivery.telegram_id)
+                    .execution_options(synchronize_session=False)
+                )
+                counts[status] += len(updated.all())
+            owned = (Broadcast.status == "running") & (Broadcast.locked_by == token)
+            await db.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id)
+                .values(
+                    sent=Broadcast.sent + counts["sent"],
+                    failed=Broadcast.failed + counts["failed"],
+                    blocked=Broadcast.blocked + counts["blocked"],
+                    # A paused or cancelled broadcast and another worker's lease keep theirs;
+                    # the loop stops before the next batch
+                    locked_until=case((owned, self._lease_until()), else_=Broadcast.locked_until),
+                )
+            )
+
+    async def _finish(self, broadcast_id: UUID, token: UUID) -> None:
+        async with self.session_factory() as db, db.begin():
+            await db.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id, Broadcast.status == "running", Broadcast.locked_by == token)
+                .values(status="done", finished_at=func.now(), locked_until=None, locked_by=None)
+            )
+        logger.info(f"Broadcast {broadcast_id} finished")
+
+
+broadcaster = Broadcaster()
+
+
+def wake_on_commit(db: AsyncSession) -> None:
+    """Let the broadcaster pick up a new or resumed broadcast once the transaction commits"""
+    event.listen(db.sync_session, "after_commit", lambda session: broadcaster.wake(), once=True)
@@ -5,8 +5,41 @@ from sqlalchemy import select, func, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models import EventItem, EventSpeaker, Speaker, Location
-from app.schemas import EventItemCreate, EventItemUpdate, EventItemFilter
+from app.models import EventItem, EventItemSeats, EventSpeaker, Speaker, Location
+from app.schemas import EventItemCreate, EventItemUpdate, EventItemFilter, EventItemResponse
+from app.services.reminder_scheduler import schedule_reminder
+
+
+# Scalar response fields; nested ones are filled from relationships below
+# (EventItem.speakers holds EventSpeaker rows, not the dicts the schema expects)
+_ITEM_RESPONSE_FIELDS = [
+    name for name in EventItemResponse.model_fields
+    if name not in ("location_name", "speakers")
+]
+
+
+def serialize_event_item(item: EventItem) -> dict:
+    """Build JSON-ready program card for an event item (location name and speakers included)"""
+    item_dict = EventItemResponse.model_validate(
+        {name: getattr(item, name) for name in _ITEM_RESPONSE_FIELDS}
+    ).model_dump(mode="json")
+    
+    # Add location name
+    if item.location:
+        item_dict["location_name"] = item.location.name
+    
+    # Add speakers
+    item_dict["speakers"] = [
+        {
+            "id": str(es.speaker.id),
+            "name": es.speaker.name,
+            "position": es.speaker.position,
+            "company": es.speaker.company,
+            "photo_url": es.speaker.photo_url
+        }
+        for es in item.speakers
+    ]
+    return item_dict
 
 
 class EventItemService:
@@ -92,6 +125,7 @@ class EventItemService:
         item = EventItem(**item_data)
         self.db.add(item)
         await self.db.flush()
+        self.db.add(EventItemSeats(event_item_id=item.id))
         
         # Add speakers if provided
         if data.speaker_ids:
@@ -103,7 +137,9 @@ class EventItemService:
                 self.db.add(event_speaker)
         
         await self.db.flush()
+        await schedule_reminder(self.db, item)
         await self.db.refresh(item)
+        self._invalidate_program(item.event_id)
         return item
     
     async def update(self, item_id: UUID, data: EventItemUpdate) -> Optional[EventItem]:
@@ -113,6 +149,7 @@ class EventItemService:
             return None
         
         update_data = data.model_dump(exclude_unset=True, exclude={"speaker_ids"})
+        old_capacity = item.capacity
         for field, value in update_data.items():
             setattr(item, field, value)
         
@@ -133,7 +170,21 @@ class EventItemService:
                 self.db.add(event_speaker)
         
         await self.db.flush()
+        
+        # Raised (or removed) capacity: hand new seats to the waitlist in one batch
+        if "capacity" in update_data and old_capacity is not None and (
+            item.capacity is None or item.capacity > old_capacity
+        ):
+            # Local import: registration_service builds on program_snapshot, which imports this module
+            from app.services.registration_service import RegistrationService
+            await RegistrationService(self.db).promote_waitlist(item.id)
+        
+        # Moved or cancelled item: the reminder follows
+        if "date_start" in update_data or "status" in update_data:
+            await schedule_reminder(self.db, item)
+        
         await self.db.refresh(item)
+        self._invalidate_program(item.event_id)
         return item
     
     async def delete(self, item_id: UUID) -> bool:
@@ -143,8 +194,15 @@ class EventItemService:
             return False
         
         await self.db.delete(item)
+        self._invalidate_program(item.event_id)
         return True
     
+    def _invalidate_program(self, event_id: UUID):
+        """Drop cached program snapshot of the event after commit"""
+        # Local import: program_snapshot builds on this module
+        from app.services.program_snapshot import invalidate_program
+        invalidate_program(self.db, event_id)
+    
     async def get_unique_types(self, event_id: UUID) -> list[str]:
         """Get unique event item types for an event"""
         query = (
@@ -4,8 +4,14 @@ from typing import Optional
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models import Event
 from app.schemas import EventCreate, EventUpdate
+from app.services.program_snapshot import invalidate_program
+from app.utils.cache import LocalCache, invalidate_on_commit
+
+# Id of the active event (key None), looked up by the bot for every question and inline query
+active_event_ids: LocalCache[UUID] = LocalCache(settings.PROGRAM_CACHE_TTL_SECONDS)
 
 
 class EventService:
@@ -63,12 +69,21 @@ class EventService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_active_id(self) -> Optional[UUID]:
+        """Get id of the active event (cached)"""
+        async def build() -> Optional[UUID]:
+            event = await self.get_active()
+            return event.id if event else None
+        
+        return await active_event_ids.get_or_build(None, build)
+    
     async def create(self, data: EventCreate) -> Event:
         """Create a new event"""
         event = Event(**data.model_dump())
         self.db.add(event)
         await self.db.flush()
         await self.db.refresh(event)
+        invalidate_on_commit(self.db, active_event_ids, None)
         return event
     
     async def update(self, event_id: UUID, data: EventUpdate) -> Optional[Event]:
@@ -83,6 +98,7 @@ class EventService:
         
         await self.db.flush()
         await self.db.refresh(event)
+        invalidate_on_commit(self.db, active_event_ids, None)
         return event
     
     async def delete(self, event_id: UUID) -> bool:
@@ -92,4 +108,6 @@ class EventService:
             return False
         
         await self.db.delete(event)
+        invalidate_program(self.db, event_id)
+        invalidate_on_commit(self.db, active_event_ids, None)
         return True
@@ -0,0 +1,190 @@
+"""
+Compact, precompressed map bundles.
+
+A bundle is the display geometry of an event map (all floors or one):
+zone polygons simplified with Douglas–Peucker, coordinates quantized to
+integers (divide by "scale"), routing-only map_data keys dropped. Each
+bundle is serialized and compressed once per map change and carries a
+content hash used as ETag.
+
+Format:
+    {"event_id", "version", "floor", "floors", "scale",
+     "zones": [{"id", "name", "floor", "polygon": [x0, y0, x1, y1, ...], "center": [x, y],
+                "path"?, "data"?}],
+     "locations": [{"id", "name", "type", "floor", "zone_id", "point": [x, y], "path"?}]}
+"""
+import gzip
+import hashlib
+import math
+from typing import Optional
+from uuid import UUID
+
+from app.models import Location, Zone
+from app.services.navigation import location_position, parse_polygon, zone_center, zone_map_data
+from app.utils.fast_json import dumps
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: bundles are then served gzip-only
+    brotli = None
+
+# Coordinates are stored as round(value * COORDINATE_SCALE)
+COORDINATE_SCALE = 10
+# Max deviation of a simplified polygon from the original, in plan units
+SIMPLIFY_TOLERANCE = 1.0
+
+# map_data keys used by routing (/route), not needed to draw the map
+ROUTING_KEYS = ("adjacent", "connector", "center")
+
+
+def _segment_distance(point, start, end) -> float:
+    """Distance from a point to a segment"""
+    (px, py), (ax, ay), (bx, by) = point, start, end
+    dx, dy = bx - ax, by - ay
+    if dx == 0 and dy == 0:
+        return math.dist(point, start)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+    return math.dist(point, (ax + t * dx, ay + t * dy))
+
+
+def simplify_line(points: list, tolerance: float) -> list:
+    """Douglas–Peucker simplification of an open polyline (iterative)"""
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, max_distance = None, tolerance
+        for i in range(first + 1, last):
+            distance = _segment_distance(points[i], points[first], points[last])
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        if farthest is not None:
+            keep[farthest] = True
+            stack += [(first, farthest), (farthest, last)]
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def simplify_polygon(polygon: list, tolerance: float = SIMPLIFY_TOLERANCE) -> list:
+    """
+    Simplify a closed ring: split at the vertex farthest from the first one
+    and simplify both halves. Rings that would collapse are kept as is.
+    """
+    if len(polygon) <= 3:
+        return list(polygon)
+    if polygon[0] == polygon[-1]:
+        polygon = polygon[:-1]
+    split = max(range(len(polygon)), key=lambda i: math.dist(polygon[0], polygon[i]))
+    first = simplify_line(polygon[:split + 1], tolerance)
+    second = simplify_line(polygon[split:] + polygon[:1], tolerance)
+    simplified = first[:-1] + second[:-1]
+    return simplified if len(simplified) >= 3 else list(polygon)
+
+
+def _quantize(value: float) -> int:
+    return round(value * COORDINATE_SCALE)
+
+
+def _flat(points: list) -> list[int]:
+    """[(x, y), ...] -> [x0, y0, x1, y1, ...] quantized"""
+    return [_quantize(c) for point in points for c in point]
+
+
+def _zone_entry(zone: Zone) -> dict:
+    entry = {"id": str(zone.id), "name": zone.name, "floor": zone.floor or 0}
+    polygon = parse_polygon(zone.coordinates)
+    if len(polygon) >= 3:
+        entry["polygon"] = _flat(simplify_polygon(polygon))
+    center = zone_center(zone)
+    if center:
+        entry["center"] = _flat([center])
+    coordinates = zone.coordinates if isinstance(zone.coordinates, dict) else {}
+    if isinstance(coordinates.get("path"), str):
+        entry["path"] = coordinates["path"]
+    data = {k: v for k, v in zone_map_data(zone).items() if k not in ROUTING_KEYS}
+    if data:
+        entry["data"] = data
+    return entry
+
+
+def _location_entry(location: Location, zone: Optional[Zone]) -> dict:
+    position = location_position(location, zone)
+    if position:
+        floor = position[0]
+    elif location.floor is not None:
+        floor = location.floor
+    else:
+        floor = (zone.floor or 0) if zone else 0
+    entry = {
+        "id": str(location.id),
+        "name": location.name,
+        "type": location.type,
+        "floor": floor,
+        "zone_id": str(location.zone_id) if location.zone_id else None,
+    }
+    if position:
+        entry["point"] = _flat([position[1:]])
+    coordinates = location.coordinates if isinstance(location.coordinates, dict) else {}
+    if isinstance(coordinates.get("path"), str):
+        entry["path"] = coordinates["path"]
+    return entry
+
+
+def _quality(params: list[str]) -> float:
+    """q value of an Accept-Encoding entry (1 if absent, 0 if malformed)"""
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value.strip())
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+class MapBundle:
+    """Serialized bundle with its precompressed variants"""
+
+    def __init__(self, event_id: UUID, zones: list[Zone], locations: list[Location], floor: Optional[int] = None):
+        zones_by_id = {zone.id: zone for zone in zones}
+        zone_entries = [_zone_entry(zone) for zone in zones]
+        location_entries = [
+            _location_entry(location, zones_by_id.get(location.zone_id)) for location in locations
+        ]
+        floors = sorted({entry["floor"] for entry in zone_entries + location_entries})
+        self.floors: list[int] = floors
+        if floor is not None:
+            zone_entries = [entry for entry in zone_entries if entry["floor"] == floor]
+            location_entries = [entry for entry in location_entries if entry["floor"] == floor]
+
+        content = {
+            "event_id": str(event_id),
+            "floor": floor,
+            "floors": floors,
+            "scale": COORDINATE_SCALE,
+            "zones": sorted(zone_entries, key=lambda entry: entry["id"]),
+            "locations": sorted(location_entries, key=lambda entry: entry["id"]),
+        }
+        self.version: str = hashlib.sha1(dumps(content, sort_keys=True)).hexdigest()[:12]
+        self.body: bytes = dumps({"version": self.version, **content})
+        self.gzip: bytes = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.brotli: Optional[bytes] = brotli.compress(self.body, quality=11) if brotli else None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def encoded(self, accept_encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+        """Pick the smallest variant the client accepts: (body, Content-Encoding)"""
+        accepted = set()
+        for part in (accept_encoding or "").split(","):
+            coding, *params = [piece.strip() for piece in part.split(";")]
+            if coding and _quality(params) > 0:
+                accepted.add(coding.lower())
+        if self.brotli is not None and "br" in accepted:
+            return self.brotli, "br"
+        if "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.body, None
@@ -0,0 +1,108 @@
+"""
+Per-event map snapshots.
+
+Zones and locations of an event are loaded once per change and kept in
+memory with the structures derived from them: navigation graph with
+precomputed routes to the most used rooms, the spatial index, the full
+map JSON and compact per-floor bundles (built on first request).
+"""
+import hashlib
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import EventItem, Location, Zone
+from app.schemas import LocationResponse, ZoneResponse
+from app.services.map_bundle import MapBundle
+from app.services.navigation import NavigationGraph
+from app.services.spatial_index import SpatialIndex
+from app.utils.cache import LocalCache, invalidate_on_commit
+from app.utils.fast_json import dumps
+
+
+class MapSnapshot:
+    """Map of an event: zones, locations, navigation graph and spatial index"""
+
+    def __init__(
+        self,
+        event_id: UUID,
+        zones: list[Zone],
+        locations: list[Location],
+        popular_location_ids: list[UUID],
+    ):
+        self.event_id = event_id
+        self.zones = zones
+        self.locations = locations
+        self.navigation = NavigationGraph(zones, locations)
+        self.navigation.precompute(str(location_id) for location_id in popular_location_ids)
+        self.spatial = SpatialIndex(zones, locations)
+        self._data: Optional[dict] = None
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._bundles: dict[Optional[int], MapBundle] = {}
+    
+    @property
+    def data(self) -> dict:
+        """Full map (MapDataResponse) as JSON-ready dict, built once"""
+        if self._data is None:
+            self._data = {
+                "zones": [ZoneResponse.model_validate(z).model_dump(mode="json") for z in self.zones],
+                "locations": [LocationResponse.model_validate(l).model_dump(mode="json") for l in self.locations],
+            }
+        return self._data
+    
+    @property
+    def body(self) -> bytes:
+        """Full map JSON (MapDataResponse), serialized once"""
+        if self._body is None:
+            self._body = dumps(self.data)
+        return self._body
+    
+    @property
+    def etag(self) -> str:
+        if self._etag is None:
+            self._etag = f'"{hashlib.sha1(self.body).hexdigest()[:12]}"'
+        return self._etag
+    
+    def bundle(self, floor: Optional[int] = None) -> Optional[MapBundle]:
+        """Compact bundle of one floor (None: all floors); None for a floor not on the map"""
+        if floor not in self._bundles:
+            # Only floors of the map get a bundle, so any number of them is bounded
+            if floor is not None and floor not in self.bundle().floors:
+                return None
+            self._bundles[floor] = MapBundle(self.event_id, self.zones, self.locations, floor)
+        return self._bundles[floor]
+
+
+map_snapshots: LocalCache[MapSnapshot] = LocalCache(settings.MAP_CACHE_TTL_SECONDS)
+
+
+async def get_map_snapshot(db: AsyncSession, event_id: UUID) -> MapSnapshot:
+    """Get cached map snapshot, building it from the database on miss"""
+    async def build() -> MapSnapshot:
+        zones = (await db.execute(select(Zone).where(Zone.event_id == event_id))).scalars().all()
+        locations = (await db.execute(select(Location).where(Location.event_id == event_id))).scalars().all()
+        # Rooms hosting the most program items are the usual destinations
+        popular = await db.execute(
+            select(EventItem.location_id)
+            .where(
+                EventItem.event_id == event_id,
+                EventItem.location_id.isnot(None),
+                EventItem.status != "cancelled"
+            )
+            .group_by(EventItem.location_id)
+            .order_by(func.count().desc())
+            .limit(settings.NAVIGATION_PRECOMPUTED_TARGETS)
+        )
+        return MapSnapshot(event_id, list(zones), list(locations), list(popular.scalars().all()))
+
+    return await map_snapshots.get_or_build(event_id, build)
+
+
+def invalidate_map(db: AsyncSession, event_id: Optional[UUID]) -> None:
+    """Drop map snapshot of an event when the current transaction commits"""
+    if event_id:
+        invalidate_on_commit(db, map_snapshots, event_id)
@@ -140,7 +140,8 @@ class ModuleService:
                     "max_capacity": 30,
                     "approval_required": False,
                     "show_remaining": True,
-                    "waitlist_enabled": False
+                    "waitlist_enabled": False,
+                    "conflict_policy": "warn"
                 }
             },
             {
@@ -0,0 +1,316 @@
+"""
+Indoor navigation graph over the event map.
+
+Nodes are locations (Location.coordinates {"x", "y"}), zone centers and
+doors between zones. Edges:
+- location <-> center of its zone;
+- zone <-> adjacent zone, through the door point if it is given.
+  Zone.map_data["adjacent"]: [zone_id, ...] or [{"zone_id": ..., "door": {"x", "y"}}, ...];
+- floor connectors: zones with the same Zone.map_data["connector"]
+  {"type": "stairs" | "elevator", "group": "A"} on different floors.
+
+Zone centers come from map_data["center"], coordinates {"x", "y"} or the
+average of coordinates["points"]. All floors share one coordinate frame;
+edge costs are plan distances plus a per-floor cost for every edge
+changing floors (a walk edge between floors, e.g. a location on its own
+floor or a door to a zone on another floor, counts as stairs, also for
+routes avoiding stairs).
+
+Routes are found with A*; routes to popular targets are read from
+shortest-path trees precomputed with Dijkstra (one tree per target).
+"""
+import heapq
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from app.models import Location, Zone
+
+# Cost of one floor change, in plan units on top of the plan distance
+STAIRS_FLOOR_COST = 150.0
+ELEVATOR_FLOOR_COST = 40.0
+ELEVATOR_WAIT_COST = 200.0
+MIN_FLOOR_COST = min(STAIRS_FLOOR_COST, ELEVATOR_FLOOR_COST)
+
+# Routes found by A* kept per graph
+ROUTE_CACHE_SIZE = 2048
+
+
+def parse_point(value: Any) -> Optional[tuple[float, float]]:
+    """Get (x, y) from {"x", "y"} or [x, y]; None for anything else"""
+    try:
+        if isinstance(value, dict):
+            return float(value["x"]), float(value["y"])
+        if isinstance(value, (list, tuple)) and len(value) >= 2:
+            return float(value[0]), float(value[1])
+    except (KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def parse_polygon(coordinates: Any) -> list[tuple[float, float]]:
+    """Get polygon vertices from coordinates["points"] (empty if there are none)"""
+    if not isinstance(coordinates, dict) or not isinstance(coordinates.get("points"), list):
+        return []
+    points = [parse_point(point) for point in coordinates["points"]]
+    return [point for point in points if point is not None]
+
+
+def zone_map_data(zone: Zone) -> dict:
+    """Zone.map_data if it is an object (it is free-form JSON)"""
+    return zone.map_data if isinstance(zone.map_data, dict) else {}
+
+
+def zone_center(zone: Zone) -> Optional[tuple[float, float]]:
+    """Anchor point of a zone on the plan"""
+    map_data = zone_map_data(zone)
+    center = parse_point(map_data.get("center")) or parse_point(zone.coordinates)
+    if center:
+        return center
+    polygon = parse_polygon(zone.coordinates)
+    if not polygon:
+        return None
+    return (
+        sum(x for x, _ in polygon) / len(polygon),
+        sum(y for _, y in polygon) / len(polygon),
+    )
+
+
+def location_position(location: Location, zone: Optional[Zone]) -> Optional[tuple[int, float, float]]:
+    """
+    Get (floor, x, y) of a location; one without own coordinates stands at
+    its zone center, floor defaults to the zone floor.
+    """
+    point = parse_point(location.coordinates)
+    if point is None and zone is not None:
+        point = zone_center(zone)
+    if point is None:
+        return None
+    if location.floor is not None:
+        floor = location.floor
+    else:
+        floor = (zone.floor or 0) if zone is not None else 0
+    return (floor, *point)
+
+
+@dataclass(frozen=True)
+class NavNode:
+    """Point of the navigation graph"""
+    id: str
+    kind: str  # location, zone, door
+    name: str
+    floor: int
+    x: float
+    y: float
+
+    def to_dict(self, mode: Optional[str] = None) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "name": self.name,
+            "floor": self.floor,
+            "x": self.x,
+            "y": self.y,
+            "mode": mode,
+        }
+
+
+@dataclass
+class Route:
+    """Path between two nodes; modes[i] is how nodes[i] is reached (None for the start)"""
+    nodes: list[NavNode]
+    modes: list[Optional[str]]
+    distance: float
+    precomputed: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "distance": round(self.distance, 1),
+            "floors": list(dict.fromkeys(node.floor for node in self.nodes)),
+            "precomputed": self.precomputed,
+            "steps": [node.to_dict(mode) for node, mode in zip(self.nodes, self.modes)],
+        }
+
+
+class NavigationGraph:
+    """Routing graph of one event map"""
+
+    def __init__(self, zones: Iterable[Zone], locations: Iterable[Location]):
+        self.nodes: dict[str, NavNode] = {}
+        # node id -> [(neighbor id, cost, mode)]
+        self.edges: dict[str, list[tuple[str, float, str]]] = {}
+        # target id -> (distance to target, next node toward target) per node
+        self._trees: dict[str, tuple[dict[str, float], dict[str, str]]] = {}
+        self._routes: OrderedDict[tuple[str, str, bool], Optional[Route]] = OrderedDict()
+
+        zones = list(zones)
+        connectors: dict[str, list[tuple[Zone, str]]] = {}
+        for zone in zones:
+            center = zone_center(zone)
+            if center is None:
+                continue
+            self._add_node(NavNode(str(zone.id), "zone", zone.name, zone.floor or 0, *center))
+            connector = zone_map_data(zone).get("connector")
+            if isinstance(connector, dict) and connector.get("group") is not None:
+                mode = "elevator" if connector.get("type") == "elevator" else "stairs"
+                connectors.setdefault(str(connector["group"]), []).append((zone, mode))
+
+        for zone in zones:
+            zone_id = str(zone.id)
+            if zone_id not in self.nodes:
+                continue
+            adjacent = zone_map_data(zone).get("adjacent")
+            for entry in adjacent if isinstance(adjacent, list) else []:
+                other_id = str(entry.get("zone_id") if isinstance(entry, dict) else entry)
+                if other_id not in self.nodes or other_id == zone_id:
+                    continue
+                door = parse_point(entry.get("door")) if isinstance(entry, dict) else None
+                if door is None:
+                    self._link(zone_id, other_id, "walk")
+                    continue
+                door_id = "door:" + ":".join(sorted((zone_id, other_id)))
+                if door_id not in self.nodes:
+                    self._add_node(NavNode(door_id, "door", "", zone.floor or 0, *door))
+                self._link(zone_id, door_id, "walk")
+                self._link(door_id, other_id, "walk")
+
+        # Every pair of a connector group's zones on different floors is one ride / climb
+        for members in connectors.values():
+            for i, (zone, mode) in enumerate(members):
+                for other, _ in members[i + 1:]:
+                    if str(zone.id) in self.nodes and str(other.id) in self.nodes \
+                            and (zone.floor or 0) != (other.floor or 0):
+                        self._link(str(zone.id), str(other.id), mode)
+
+        zones_by_id = {zone.id: zone for zone in zones}
+        for location in locations:
+            position = location_position(location, zones_by_id.get(location.zone_id))
+            if position is None:
+                continue
+            self._add_node(NavNode(str(location.id), "location", location.name, *position))
+            zone_id = str(location.zone_id) if location.zone_id else None
+            if zone_id in self.nodes:
+                self._link(str(location.id), zone_id, "walk")
+
+    def _add_node(self, node: NavNode) -> None:
+        self.nodes[node.id] = node
+        self.edges.setdefault(node.id, [])
+
+    def _link(self, a: str, b: str, mode: str) -> None:
+        """Add an undirected edge (adjacency may be listed on both zones)"""
+        first, second = self.nodes[a], self.nodes[b]
+        floors = abs(first.floor - second.floor)
+        if mode == "walk" and floors:
+            # Walking to another floor takes stairs somewhere: charged and
+            # avoided like stairs (no floor change may cost less than
+            # MIN_FLOOR_COST, see _heuristic)
+            mode = "stairs"
+        if any(neighbor == b and edge_mode == mode for neighbor, _, edge_mode in self.edges[a]):
+            return
+        cost = math.dist((first.x, first.y), (second.x, second.y))
+        if mode == "stairs":
+            cost += STAIRS_FLOOR_COST * floors
+        elif mode == "elevator":
+            cost += ELEVATOR_WAIT_COST + ELEVATOR_FLOOR_COST * floors
+        self.edges[a].append((b, cost, mode))
+        self.edges[b].append((a, cost, mode))
+
+    def _heuristic(self, a: str, b: str) -> float:
+        # Every edge costs at least its plan distance plus MIN_FLOOR_COST per floor
+        first, second = self.nodes[a], self.nodes[b]
+        return math.dist((first.x, first.y), (second.x, second.y)) \
+            + MIN_FLOOR_COST * abs(first.floor - second.floor)
+
+    def precompute(self, target_ids: Iterable[str]) -> None:
+        """Build shortest-path trees toward the targets (Dijkstra from each target)"""
+        for target in target_ids:
+            if target not in self.nodes or target in self._trees:
+                continue
+            distances = {target: 0.0}
+            next_hop: dict[str, str] = {}
+            heap = [(0.0, target)]
+            while heap:
+                distance, node = heapq.heappop(heap)
+                if distance > distances[node]:
+                    continue
+                for neighbor, cost, _ in self.edges[node]:
+                    candidate = distance + cost
+                    if candidate < distances.get(neighbor, math.inf):
+                        distances[neighbor] = candidate
+                        next_hop[neighbor] = node
+                        heapq.heappush(heap, (candidate, neighbor))
+            self._trees[target] = (distances, next_hop)
+
+    def route(self, source: str, target: str, avoid_stairs: bool = False) -> Optional[Route]:
+        """
+        Get the shortest route between two nodes.
+
+        Returns:
+            Route, or None if the nodes are unknown or not connected
+        """
+        if source not in self.nodes or target not in self.nodes:
+            return None
+        if not avoid_stairs and target in self._trees:
+            return self._tree_route(source, target)
+
+        key = (source, target, avoid_stairs)
+        if key in self._routes:
+            self._routes.move_to_end(key)
+            return self._routes[key]
+
+        route = self._astar(source, target, avoid_stairs)
+        self._routes[key] = route
+        if len(self._routes) > ROUTE_CACHE_SIZE:
+            self._routes.popitem(last=False)
+        return route
+
+    def _tree_route(self, source: str, target: str) -> Optional[Route]:
+        distances, next_hop = self._trees[target]
+        if source not in distances:
+            return None
+        path = [source]
+        while path[-1] != target:
+            path.append(next_hop[path[-1]])
+        return self._build_route(path, distances[source], precomputed=True)
+
+    def _astar(self, source: str, target: str, avoid_stairs: bool) -> Optional[Route]:
+        distances = {source: 0.0}
+        previous: dict[str, str] = {}
+        heap = [(self._heuristic(source, target), source)]
+        closed: set[str] = set()
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node == target:
+                path = [target]
+                while path[-1] != source:
+                    path.append(previous[path[-1]])
+                return self._build_route(path[::-1], distances[target], avoid_stairs=avoid_stairs)
+            if node in closed:
+                continue
+            closed.add(node)
+            for neighbor, cost, mode in self.edges[node]:
+                if avoid_stairs and mode == "stairs":
+                    continue
+                candidate = distances[node] + cost
+                if candidate < distances.get(neighbor, math.inf):
+                    distances[neighbor] = candidate
+                    previous[neighbor] = node
+                    heapq.heappush(heap, (candidate + self._heuristic(neighbor, target), neighbor))
+        return None
+
+    def _build_route(
+        self,
+        path: list[str],
+        distance: float,
+        precomputed: bool = False,
+        avoid_stairs: bool = False
+    ) -> Route:
+        modes: list[Optional[str]] = [None]
+        for a, b in zip(path, path[1:]):
+            # Cheapest allowed edge between consecutive nodes is the one the search used
+            modes.append(min(
+                (edge for edge in self.edges[a] if edge[0] == b and not (avoid_stairs and edge[2] == "stairs")),
+                key=lambda edge: edge[1]
+            )[2])
+        return Route([self.nodes[node_id] for node_id in path], modes, distance, precomputed)
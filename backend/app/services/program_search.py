@@ -0,0 +1,159 @@
+"""
+In-memory search over the program of an event.
+
+Built from the program snapshot (items and their speakers) and replaced
+with it on every program change. Words of titles, speaker names and
+secondary fields (type, location, company) are kept in a sorted
+vocabulary: a query word matches the words it is a prefix of (binary
+search, search-as-you-type), and when nothing starts with a word of at
+least three letters, words sharing enough trigrams with it (typos, like
+pg_trgm similarity in SearchService). Every query word has to match.
+Results of recent queries are kept per index.
+"""
+import re
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+WORD_RE = re.compile(r"\w+")
+
+# Like pg_trgm's default similarity threshold
+TRIGRAM_MIN_SIMILARITY = 0.3
+TRIGRAM_MIN_WORD_LENGTH = 3
+
+# Word match scores; words of secondary fields count half
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+TRIGRAM_SCORE = 0.6
+SECONDARY_WEIGHT = 0.5
+# Title starting with the whole query
+TITLE_PREFIX_BOOST = 0.5
+
+CACHED_QUERIES = 1024
+
+
+def normalize(text: str) -> str:
+    return text.casefold().replace("ё", "е")
+
+
+def tokenize(text: str) -> list[str]:
+    return WORD_RE.findall(normalize(text))
+
+
+def trigrams(word: str) -> set[str]:
+    """Trigrams of a word padded like pg_trgm does"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SearchDocument:
+    """Program item or speaker found by the search"""
+    kind: str  # item, speaker
+    id: str
+    title: str
+    # Item: its card; speaker: the speaker dict of its first card
+    card: dict
+    # Positions of the item (or the speaker's items) in the snapshot, in program order
+    positions: list[int] = field(default_factory=list)
+
+
+class ProgramSearchIndex:
+    """Prefix and trigram word index over program items and speakers"""
+
+    def __init__(self, cards: list[dict]):
+        self.documents: list[SearchDocument] = []
+        self._titles: list[str] = []
+        postings: dict[str, dict[int, float]] = {}
+
+        def add(title: str, secondary: list[Optional[str]], document: SearchDocument) -> None:
+            doc = len(self.documents)
+            self.documents.append(document)
+            self._titles.append(" ".join(tokenize(title)))
+            for text, weight in [(title, 1.0)] + [(text, SECONDARY_WEIGHT) for text in secondary if text]:
+                for word in tokenize(text):
+                    weights = postings.setdefault(word, {})
+                    weights[doc] = max(weights.get(doc, 0.0), weight)
+
+        # Items come first: document i is the item at snapshot position i
+        speakers: dict[str, SearchDocument] = {}
+        for position, card in enumerate(cards):
+            speaker_names = [speaker["name"] for speaker in card["speakers"]]
+            add(
+                card["title"],
+                [card.get("type"), card.get("location_name")] + speaker_names,
+                SearchDocument("item", card["id"], card["title"], card, [position]),
+            )
+            for speaker in card["speakers"]:
+                if speaker["id"] in speakers:
+                    speakers[speaker["id"]].positions.append(position)
+                else:
+                    speakers[speaker["id"]] = SearchDocument("speaker", speaker["id"], speaker["name"], speaker, [position])
+        for document in speakers.values():
+            add(document.title, [document.card.get("company"), document.card.get("position")], document)
+
+        self._postings = postings
+        self._words: list[str] = sorted(postings)
+        self._word_trigrams: dict[str, int] = {}
+        self._trigrams: dict[str, list[str]] = {}
+        for word in self._words:
+            if len(word) >= TRIGRAM_MIN_WORD_LENGTH:
+                word_trigrams = trigrams(word)
+                self._word_trigrams[word] = len(word_trigrams)
+                for trigram in word_trigrams:
+                    self._trigrams.setdefault(trigram, []).append(word)
+        self._cache: OrderedDict[str, list[int]] = OrderedDict()
+
+    def search(self, query: str) -> list[SearchDocument]:
+        """Documents matching every word of the query, best first"""
+        key = " ".join(tokenize(query))
+        found = self._cache.get(key)
+        if found is None:
+            found = self._cache[key] = self._search(key)
+            if len(self._cache) > CACHED_QUERIES:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return [self.documents[doc] for doc in found]
+
+    def _search(self, query: str) -> list[int]:
+        terms = query.split()
+        if not terms:
+            return []
+        scores: Optional[dict[int, float]] = None
+        for term in terms:
+            term_scores: dict[int, float] = {}
+            for word, word_score in self._match(term).items():
+                for doc, weight in self._postings[word].items():
+                    term_scores[doc] = max(term_scores.get(doc, 0.0), word_score * weight)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc: score + term_scores[doc] for doc, score in scores.items() if doc in term_scores}
+            if not scores:
+                return []
+        for doc in scores:
+            if self._titles[doc].startswith(query):
+                scores[doc] += TITLE_PREFIX_BOOST
+        # Best first; equal scores in program order, items before speakers
+        return sorted(scores, key=lambda doc: (-scores[doc], doc))
+
+    def _match(self, term: str) -> dict[str, float]:
+        """Vocabulary words matching a query word, with match scores"""
+        matches = {}
+        index = bisect_left(self._words, term)
+        while index < len(self._words) and self._words[index].startswith(term):
+            word = self._words[index]
+            matches[word] = EXACT_SCORE if word == term else PREFIX_SCORE
+            index += 1
+        if matches or len(term) < TRIGRAM_MIN_WORD_LENGTH:
+            return matches
+
+        term_trigrams = trigrams(term)
+        common = Counter(word for trigram in term_trigrams for word in self._trigrams.get(trigram, ()))
+        for word, shared in common.items():
+            similarity = shared / (len(term_trigrams) + self._word_trigrams[word] - shared)
+            if similarity >= TRIGRAM_MIN_SIMILARITY:
+                matches[word] = TRIGRAM_SCORE * similarity
+        return matches
@@ -0,0 +1,201 @@
+"""
+Precompiled per-event program snapshots.
+
+The program is serialized once per change and kept in memory as ready
+JSON bytes; filters are answered from in-memory indexes by joining the
+pre-serialized item fragments.
+
+Seat counts change with every registration, so they are not part of the
+snapshot: SeatCounts, a small per-event overlay read from
+event_item_seats, is reloaded after seat changes and its fields are
+appended to the item fragments when the program is served.
+"""
+import hashlib
+from datetime import date
+from functools import cached_property
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import EventItem, EventItemSeats
+from app.schemas import EventItemFilter
+from app.services.event_item_service import EventItemService, serialize_event_item
+from app.services.program_search import ProgramSearchIndex
+from app.services.schedule_index import ScheduleIndex
+from app.utils.cache import LocalCache, invalidate_on_commit
+from app.utils.fast_json import dumps
+
+
+# Card fields depending on taken seats, filled in from SeatCounts
+SEAT_FIELDS = ("registered_count", "available_spots", "is_full")
+
+
+class SeatCounts:
+    """Taken seats per item of an event"""
+
+    def __init__(self, taken: dict[UUID, int]):
+        self.taken = taken
+        self.version: str = hashlib.sha1(
+            dumps(sorted((str(item_id), count) for item_id, count in taken.items()))
+        ).hexdigest()[:12]
+
+
+class ProgramSnapshot:
+    """Program of an event: JSON-ready cards (without seat counts), their bytes and filter indexes"""
+
+    def __init__(self, event_id: UUID, items: list[EventItem]):
+        self.event_id = event_id
+        self.items: list[dict] = []
+        for item in items:
+            card = serialize_event_item(item)
+            for name in SEAT_FIELDS:
+                card.pop(name, None)
+            self.items.append(card)
+        # Fragments are left open ("{...") and closed with the seat fields when served
+        self._item_bytes: list[bytes] = [dumps(card)[:-1] for card in self.items]
+        self._ids: list[UUID] = [item.id for item in items]
+        self._capacities: list[Optional[int]] = [item.capacity for item in items]
+        self.version: str = hashlib.sha1(b"".join(self._item_bytes)).hexdigest()[:12]
+        # Unfiltered program rendered with the latest seat counts
+        self._body: tuple[Optional[SeatCounts], bytes] = (None, b"")
+
+        # Positions in self.items (already ordered by date_start) per filter value
+        self._by_day: dict[date, list[int]] = {}
+        self._by_type: dict[str, list[int]] = {}
+        self._by_location: dict[UUID, list[int]] = {}
+        self._search_text: list[str] = []
+
+        for position, item in enumerate(items):
+            if item.date_start:
+                self._by_day.setdefault(item.date_start.date(), []).append(position)
+            if item.type:
+                self._by_type.setdefault(item.type, []).append(position)
+            if item.location_id:
+                self._by_location.setdefault(item.location_id, []).append(position)
+            self._search_text.append(f"{item.title}\n{item.description or ''}".casefold())
+
+        self.days: list[date] = sorted(self._by_day)
+        self.types: list[str] = sorted(self._by_type)
+        self.schedule = ScheduleIndex(items)
+
+    @cached_property
+    def search_index(self) -> ProgramSearchIndex:
+        """Word index over items and speakers (bot inline search), built on first use"""
+        return ProgramSearchIndex(self.items)
+
+    @staticmethod
+    def _join(fragments) -> bytes:
+        return b"[" + b",".join(fragments) + b"]"
+
+    def seat_fields(self, position: int, seats: SeatCounts) -> dict:
+        """registered_count, available_spots and is_full of an item (like the EventItem properties)"""
+        taken = seats.taken.get(self._ids[position], 0)
+        capacity = self._capacities[position]
+        return {
+            "registered_count": taken,
+            "available_spots": None if capacity is None else max(0, capacity - taken),
+            "is_full": capacity is not None and taken >= capacity,
+        }
+
+    def cards(self, seats: SeatCounts, positions: Optional[Iterable[int]] = None) -> list[dict]:
+        """Complete cards (with seat counts) of the items at the positions, all by default"""
+        if positions is None:
+            positions = range(len(self.items))
+        return [{**self.items[p], **self.seat_fields(p, seats)} for p in positions]
+
+    def _fragment(self, position: int, seats: SeatCounts) -> bytes:
+        # Card fields, then the seat fields without their opening brace
+        return self._item_bytes[position] + b"," + dumps(self.seat_fields(position, seats))[1:]
+
+    def select(self, filters: Optional[EventItemFilter] = None, seats: Optional[SeatCounts] = None) -> list[int]:
+        """Get positions of items matching filters, in program order (available_only needs seats)"""
+        if not filters:
+            return list(range(len(self.items)))
+
+        buckets: list[list[int]] = []
+        if filters.day:
+            buckets.append(self._by_day.get(filters.day, []))
+        if filters.type:
+            buckets.append(self._by_type.get(filters.type, []))
+        if filters.location_id:
+            buckets.append(self._by_location.get(filters.location_id, []))
+        if filters.available_only and seats is not None:
+            buckets.append([
+                p for p in range(len(self.items)) if not self.seat_fields(p, seats)["is_full"]
+            ])
+
+        if buckets:
+            # Start from the smallest bucket, positions stay sorted
+            buckets.sort(key=len)
+            positions = buckets[0]
+            for bucket in buckets[1:]:
+                allowed = set(bucket)
+                positions = [p for p in positions if p in allowed]
+        else:
+            positions = list(range(len(self.items)))
+
+        if filters.search:
+            needle = filters.search.casefold()
+            positions = [p for p in positions if needle in self._search_text[p]]
+
+        return positions
+
+    def to_json(self, seats: SeatCounts, filters: Optional[EventItemFilter] = None) -> bytes:
+        """Get JSON array of matching items; unfiltered program is rendered once per seat counts"""
+        if not filters or not (
+            filters.day or filters.type or filters.location_id
+            or filters.search or filters.available_only
+        ):
+            rendered_for, body = self._body
+            if rendered_for is not seats:
+                body = self.render(range(len(self.items)), seats)
+                self._body = (seats, body)
+            return body
+        return self.render(self.select(filters, seats), seats)
+
+    def render(self, positions: Iterable[int], seats: SeatCounts) -> bytes:
+        """Get JSON array of items at the given positions"""
+        return self._join(self._fragment(p, seats) for p in positions)
+
+
+program_snapshots: LocalCache[ProgramSnapshot] = LocalCache(settings.PROGRAM_CACHE_TTL_SECONDS)
+
+
+async def get_program_snapshot(db: AsyncSession, event_id: UUID) -> ProgramSnapshot:
+    """Get cached program snapshot, building it from the database on miss"""
+    async def build() -> ProgramSnapshot:
+        items = await EventItemService(db).get_by_event(event_id)
+        return ProgramSnapshot(event_id, items)
+
+    return await program_snapshots.get_or_build(event_id, build)
+
+
+def invalidate_program(db: AsyncSession, event_id: Optional[UUID]) -> None:
+    """Drop program snapshot of an event when the current transaction commits"""
+    if event_id:
+        invalidate_on_commit(db, program_snapshots, event_id)
+
+
+seat_counts: LocalCache[SeatCounts] = LocalCache(settings.PROGRAM_CACHE_TTL_SECONDS)
+
+
+async def get_seat_counts(db: AsyncSession, event_id: UUID) -> SeatCounts:
+    """Get cached seat counts of an event's items, reading event_item_seats on miss"""
+    async def build() -> SeatCounts:
+        result = await db.execute(
+            select(EventItemSeats.event_item_id, EventItemSeats.taken)
+            .join(EventItem, EventItem.id == EventItemSeats.event_item_id)
+            .where(EventItem.event_id == event_id)
+        )
+        return SeatCounts(dict(result.all()))
+
+    return await seat_counts.get_or_build(event_id, build)
+
+
+def invalidate_seats(db: AsyncSession, event_id: Optional[UUID]) -> None:
+    """Drop seat counts of an event when the current transaction commits (the program stays)"""
+    if event_id:
+        invalidate_on_commit(db, seat_counts, event_id)
@@ -1,10 +1,59 @@
+import base64
+import binascii
+import html
+import uuid
+from collections import Counter
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import select, update
+from typing import AsyncIterator, Optional
+from sqlalchemy import select, update, func, and_, or_, values, column, Integer
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from app.models import Registration, EventItem, User
+from app.bot.notifications import notify_on_commit
+from app.config import settings
+from app.models import Registration, EventItem, EventItemSeats, Location, Module, User
+from app.models.registration import waitlist_position_seq
+from app.services.program_snapshot import invalidate_seats
+from app.services.schedule_index import DEFAULT_ITEM_DURATION
+from app.utils.cache import LocalCache, invalidate_on_commit
+from app.utils.fast_json import dumps, loads
+
+# Statuses counted in the seat counter (EventItem.registered_count)
+SEAT_HOLDING_STATUSES = ("confirmed", "pending")
+
+# Per user: event_item_id -> (event_id, status) of all not cancelled registrations
+user_registrations: LocalCache[dict[UUID, tuple[UUID, str]]] = LocalCache(
+    settings.REGISTRATION_CACHE_TTL_SECONDS, max_size=100_000
+)
+
+# Seat counter updates join event_items for event_id; they go through the Core
+# table because ORM-enabled UPDATE ... FROM returns only the primary key
+seat_counters = EventItemSeats.__table__
+
+# Registration module config "conflict_policy": off, warn (register with a warning) or block
+DEFAULT_CONFLICT_POLICY = "warn"
+
+
+def encode_cursor(date_start: Optional[datetime], registration_id: UUID) -> str:
+    """Opaque cursor for "my registrations" pagination"""
+    raw = dumps([date_start.isoformat() if date_start else None, str(registration_id)])
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[datetime], UUID]:
+    """Parse cursor from encode_cursor; raises ValueError on garbage"""
+    try:
+        date_start, registration_id = loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (datetime.fromisoformat(date_start) if date_start else None), UUID(registration_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _item_end(item):
+    """SQL end of an item; items without date_end last DEFAULT_ITEM_DURATION like in the schedule"""
+    return func.coalesce(item.date_end, item.date_start + DEFAULT_ITEM_DURATION)
 
 
 class RegistrationService:
@@ -23,6 +72,80 @@ class RegistrationService:
         result = await self.db.execute(query)
         return list(result.scalars().all())
     
+    async def get_user_registrations(
+        self,
+        user_id: UUID,
+        event_id: Optional[UUID] = None,
+        limit: Optional[int] = 50,
+        cursor: Optional[str] = None
+    ) -> tuple[list, Optional[str]]:
+        """
+        Get a page of user's registrations with item title, time and location.
+        
+        One joined query, ordered by item start (items without a date last)
+        with keyset pagination on (date_start, registration id); limit None
+        returns all of them.
+        
+        Returns:
+            Tuple of (rows, next page cursor or None)
+        """
+        query = (
+            select(
+                Registration.id,
+                Registration.event_item_id,
+                Registration.user_id,
+                Registration.status,
+                Registration.registered_at,
+                Registration.approved_at,
+                EventItem.title.label("event_item_title"),
+                EventItem.date_start.label("event_item_date_start"),
+                EventItem.date_end.label("event_item_date_end"),
+                EventItem.location_id,
+                Location.name.label("location_name"),
+            )
+            .join(EventItem, Registration.event_item_id == EventItem.id)
+            .outerjoin(Location, EventItem.location_id == Location.id)
+            .where(Registration.user_id == user_id)
+            .order_by(EventItem.date_start.asc().nulls_last(), Registration.id.asc())
+        )
+        if limit is not None:
+            query = query.limit(limit + 1)
+        if event_id:
+            query = query.where(EventItem.event_id == event_id)
+        
+        if cursor:
+            after_start, after_id = decode_cursor(cursor)
+            if after_start is None:
+                query = query.where(EventItem.date_start.is_(None), Registration.id > after_id)
+            else:
+                query = query.where(or_(
+                    EventItem.date_start > after_start,
+                    and_(EventItem.date_start == after_start, Registration.id > after_id),
+                    EventItem.date_start.is_(None),
+                ))
+        
+        rows = (await self.db.execute(query)).all()
+        if limit is None or len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].event_item_date_start, rows[-1].id)
+    
+    async def get_user_item_statuses(self, user_id: UUID) -> dict[UUID, tuple[UUID, str]]:
+        """Get cached event_item_id -> (event_id, status) of user's active registrations"""
+        async def build() -> dict[UUID, tuple[UUID, str]]:
+            query = (
+                select(Registration.event_item_id, EventItem.event_id, Registration.status)
+                .join(EventItem, Registration.event_item_id == EventItem.id)
+                .where(
+                    Registration.user_id == user_id,
+                    Registration.status.not_in(("cancelled", "rejected"))
+                )
+            )
+            result = await self.db.execute(query)
+            return {item_id: (event_id, status) for item_id, event_id, status in result.all()}
+        
+        return await user_registrations.get_or_build(user_id, build)
+    
     async def get_by_event_item(self, event_item_id: UUID) -> list[Registration]:
         """Get all registrations for an event item"""
         query = select(Registration).where(Registration.event_item_id == event_item_id)
@@ -38,77 +161,456 @@ class RegistrationService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_waitlist_position(self, registration: Registration) -> Optional[int]:
+        """Get 1-based position of a waitlisted registration (index range count)"""
+        if registration.status != "waitlist" or registration.waitlist_position is None:
+            return None
+        query = select(func.count()).select_from(Registration).where(
+            Registration.event_item_id == registration.event_item_id,
+            Registration.status == "waitlist",
+            Registration.waitlist_position <= registration.waitlist_position
+        )
+        return await self.db.scalar(query)
+    
     async def register(
         self,
         user_id: UUID,
         event_item_id: UUID,
-        approval_required: bool = False
+        approval_required: bool = False,
+        waitlist_enabled: Optional[bool] = None,
+        conflict_policy: Optional[str] = None
     ) -> tuple[Optional[Registration], str]:
         """
         Register user for an event item.
         
+        The seat is taken by a single conditional UPDATE on the item's seat
+        counter row, so concurrent requests can't overbook: the row lock
+        serializes them and the capacity check is re-evaluated on the
+        fresh row.
+        When the item is full and the waitlist is enabled, the user is put
+        on the waitlist. Overlaps with the user's other sessions are
+        reported or blocked depending on the conflict policy.
+        Unset options are taken from the registration module config.
+        
         Returns:
             Tuple of (Registration or None, status message)
         """
+        now = datetime.utcnow()
+        
         # Check if already registered
         existing = await self.get_registration(user_id, event_item_id)
-        if existing:
-            if existing.status == "cancelled":
-                # Re-activate cancelled registration
-                existing.status = "confirmed" if not approval_required else "pending"
-                existing.registered_at = datetime.utcnow()
-                await self._update_registered_count(event_item_id, 1)
-                await self.db.flush()
-                await self.db.refresh(existing)
-                return existing, "Регистрация восстановлена"
+        if existing and existing.status == "waitlist":
+            position = await self.get_waitlist_position(existing)
+            return None, f"Вы уже в листе ожидания (позиция {position})"
+        if existing and existing.status == "rejected":
+            return None, "Заявка отклонена организатором"
+        if existing and existing.status != "cancelled":
             return None, "Вы уже зарегистрированы на это мероприятие"
         
-        # Check capacity
-        event_item = await self.db.get(EventItem, event_item_id)
-        if not event_item:
-            return None, "Мероприятие не найдено"
+        if waitlist_enabled is None or conflict_policy is None:
+            config = await self._registration_config(event_item_id)
+            if waitlist_enabled is None:
+                waitlist_enabled = bool(config.get("waitlist_enabled"))
+            if conflict_policy is None:
+                conflict_policy = config.get("conflict_policy", DEFAULT_CONFLICT_POLICY)
+        
+        warning = ""
+        if conflict_policy != "off":
+            conflicts = (await self.find_conflicts([user_id], event_item_id)).get(user_id)
+            if conflicts and conflict_policy == "block":
+                return None, f"Пересекается по времени с {self._titles(conflicts)}"
+            if conflicts:
+                warning = f". Внимание: пересекается по времени с {self._titles(conflicts)}"
+        
+        if not await self._claim_seat(event_item_id):
+            event_item = await self.db.get(EventItem, event_item_id)
+            if not event_item:
+                return None, "Мероприятие не найдено"
+            if event_item.status == "cancelled":
+                return None, "Мероприятие отменено"
+            
+            if not waitlist_enabled:
+                return None, "Все места заняты"
+            registration, message = await self._join_waitlist(user_id, event_item_id, existing)
+            return registration, message + (warning if registration else "")
         
-        if event_item.capacity is not None and event_item.registered_count >= event_item.capacity:
-            return None, "Все места заняты"
+        registration = await self._save_registration(user_id, event_item_id, existing, {
+            "status": "confirmed" if not approval_required else "pending",
+            "registered_at": now,
+            "approved_at": None if approval_required else now,
+            "waitlist_position": None,
+        })
+        if not registration:
+            # A parallel request of the same user won: give the seat back
+            await self._update_registered_count(event_item_id, -1)
+            return None, "Вы уже зарегистрированы на это мероприятие"
         
-        # Create registration
-        registration = Registration(
-            user_id=user_id,
-            event_item_id=event_item_id,
-            status="confirmed" if not approval_required else "pending",
-            registered_at=datetime.utcnow()
+        if existing:
+            return registration, "Регистрация восстановлена" + warning
+        return registration, "Регистрация успешна" + warning
+    
+    async def register_batch(
+        self,
+        event_item_id: UUID,
+        user_ids: list[UUID],
+        approval_required: bool = False,
+        waitlist_enabled: Optional[bool] = None,
+        conflict_policy: Optional[str] = None
+    ) -> dict[UUID, tuple[Optional[Registration], str]]:
+        """
+        Register a batch of users (in arrival order) for one event item.
+        
+        The seat counter is locked once for the whole batch, free seats go
+        to the first users, the rest join the waitlist (if enabled) or are
+        rejected; the counter is updated with a single statement.
+        
+        Returns:
+            Mapping user_id -> (Registration or None, status message)
+        """
+        results: dict[UUID, tuple[Optional[Registration], str]] = {}
+        user_ids = list(dict.fromkeys(user_ids))
+        
+        query = select(Registration).where(
+            Registration.event_item_id == event_item_id,
+            Registration.user_id.in_(user_ids)
         )
+        existing = {r.user_id: r for r in (await self.db.execute(query)).scalars().all()}
         
-        if not approval_required:
-            registration.approved_at = datetime.utcnow()
+        pending = []
+        for user_id in user_ids:
+            registration = existing.get(user_id)
+            if registration and registration.status == "waitlist":
+                results[user_id] = (None, "Вы уже в листе ожидания")
+            elif registration and registration.status == "rejected":
+                results[user_id] = (None, "Заявка отклонена организатором")
+            elif registration and registration.status != "cancelled":
+                results[user_id] = (None, "Вы уже зарегистрированы на это мероприятие")
+            else:
+                pending.append(user_id)
+        if not pending:
+            return results
         
-        self.db.add(registration)
-        await self._update_registered_count(event_item_id, 1)
-        await self.db.flush()
-        await self.db.refresh(registration)
+        if waitlist_enabled is None or conflict_policy is None:
+            config = await self._registration_config(event_item_id)
+            if waitlist_enabled is None:
+                waitlist_enabled = bool(config.get("waitlist_enabled"))
+            if conflict_policy is None:
+                conflict_policy = config.get("conflict_policy", DEFAULT_CONFLICT_POLICY)
+        
+        warnings: dict[UUID, str] = {}
+        if conflict_policy != "off":
+            conflicts = await self.find_conflicts(pending, event_item_id)
+            for user_id, items in conflicts.items():
+                if conflict_policy == "block":
+                    results[user_id] = (None, f"Пересекается по времени с {self._titles(items)}")
+                else:
+                    warnings[user_id] = f". Внимание: пересекается по времени с {self._titles(items)}"
+            pending = [user_id for user_id in pending if user_id not in results]
+            if not pending:
+                return results
+        
+        event_item = await self._lock_seats(event_item_id)
+        if not event_item or event_item.status == "cancelled":
+            message = "Мероприятие не найдено" if not event_item else "Мероприятие отменено"
+            results.update({user_id: (None, message) for user_id in pending})
+            return results
+        
+        if event_item.capacity is None:
+            free_seats = len(pending)
+        else:
+            free_seats = max(0, event_item.capacity - event_item.taken)
+        seated, rest = pending[:free_seats], pending[free_seats:]
+        
+        now = datetime.utcnow()
+        if seated:
+            saved = await self._save_registrations(event_item_id, seated, existing, {
+                "status": "confirmed" if not approval_required else "pending",
+                "registered_at": now,
+                "approved_at": None if approval_required else now,
+                "waitlist_position": None,
+            })
+            if saved:
+                await self._update_registered_count(event_item_id, len(saved))
+            for user_id in seated:
+                registration = saved.get(user_id)
+                if not registration:
+                    results[user_id] = (None, "Вы уже зарегистрированы на это мероприятие")
+                elif user_id in existing:
+                    results[user_id] = (registration, "Регистрация восстановлена" + warnings.get(user_id, ""))
+                else:
+                    results[user_id] = (registration, "Регистрация успешна" + warnings.get(user_id, ""))
+        
+        if rest:
+            if not waitlist_enabled:
+                results.update({user_id: (None, "Все места заняты") for user_id in rest})
+                return results
+            
+            saved = await self._save_registrations(event_item_id, rest, existing, {
+                "status": "waitlist",
+                "registered_at": now,
+                "approved_at": None,
+                "waitlist_position": waitlist_position_seq.next_value(),
+            })
+            if saved:
+                # Positions of the new entries follow the ones already waiting
+                first = min(r.waitlist_position for r in saved.values())
+                ahead = await self.db.scalar(
+                    select(func.count()).select_from(Registration).where(
+                        Registration.event_item_id == event_item_id,
+                        Registration.status == "waitlist",
+                        Registration.waitlist_position < first
+                    )
+                )
+                ordered = sorted(saved.values(), key=lambda r: r.waitlist_position)
+                for position, registration in enumerate(ordered, start=ahead + 1):
+                    results[registration.user_id] = (
+                        registration,
+                        f"Все места заняты. Вы в листе ожидания (позиция {position})"
+                        + warnings.get(registration.user_id, "")
+                    )
+            for user_id in rest:
+                results.setdefault(user_id, (None, "Вы уже зарегистрированы на это мероприятие"))
         
-        return registration, "Регистрация успешна"
+        return results
+    
+    async def find_conflicts(self, user_ids: list[UUID], event_item_id: UUID) -> dict[UUID, list]:
+        """
+        Find the users' sessions overlapping with an event item.
+        
+        One query for all users: their seat-holding registrations (user_id
+        index) joined with items, filtered by interval overlap against the
+        target item's [start, end).
+        
+        Returns:
+            Mapping user_id -> rows (id, title, date_start, date_end) of overlapping items
+        """
+        target = aliased(EventItem)
+        query = (
+            select(
+                Registration.user_id,
+                EventItem.id,
+                EventItem.title,
+                EventItem.date_start,
+                EventItem.date_end,
+            )
+            .join(EventItem, Registration.event_item_id == EventItem.id)
+            .join(target, target.id == event_item_id)
+            .where(
+                Registration.user_id.in_(user_ids),
+                Registration.status.in_(SEAT_HOLDING_STATUSES),
+                EventItem.id != event_item_id,
+                EventItem.status != "cancelled",
+                EventItem.date_start < _item_end(target),
+                _item_end(EventItem) > target.date_start,
+            )
+            .order_by(EventItem.date_start)
+        )
+        conflicts: dict[UUID, list] = {}
+        for row in (await self.db.execute(query)).all():
+            conflicts.setdefault(row.user_id, []).append(row)
+        return conflicts
+    
+    async def get_user_conflicts(self, user_id: UUID, event_id: Optional[UUID] = None) -> list[tuple]:
+        """
+        Get pairs of the user's registrations that overlap in time.
+        
+        Returns:
+            List of (item row, conflicting item row), each pair once
+        """
+        first_reg, second_reg = aliased(Registration), aliased(Registration)
+        first, second = aliased(EventItem), aliased(EventItem)
+        query = (
+            select(
+                first.id, first.title, first.date_start, first.date_end,
+                second.id, second.title, second.date_start, second.date_end,
+            )
+            .select_from(first_reg)
+            .join(first, first_reg.event_item_id == first.id)
+            .join(second_reg, and_(
+                second_reg.user_id == first_reg.user_id,
+                second_reg.event_item_id > first_reg.event_item_id,
+            ))
+            .join(second, second_reg.event_item_id == second.id)
+            .where(
+                first_reg.user_id == user_id,
+                first_reg.status.in_(SEAT_HOLDING_STATUSES),
+                second_reg.status.in_(SEAT_HOLDING_STATUSES),
+                first.status != "cancelled",
+                second.status != "cancelled",
+                first.date_start < _item_end(second),
+                second.date_start < _item_end(first),
+            )
+            .order_by(first.date_start, second.date_start)
+        )
+        if event_id:
+            query = query.where(first.event_id == event_id, second.event_id == event_id)
+        
+        result = await self.db.execute(query)
+        return [(tuple(row[:4]), tuple(row[4:])) for row in result.all()]
     
     async def cancel(self, user_id: UUID, event_item_id: UUID) -> tuple[bool, str]:
         """
         Cancel registration.
         
+        A released seat goes to the head of the waitlist in the same transaction.
+        
         Returns:
             Tuple of (success, status message)
         """
-        registration = await self.get_registration(user_id, event_item_id)
+        # Row lock: a repeated cancel waits and then sees the cancelled status
+        query = (
+            select(Registration)
+            .where(
+                Registration.user_id == user_id,
+                Registration.event_item_id == event_item_id
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        registration = (await self.db.execute(query)).scalar_one_or_none()
         if not registration:
             return False, "Регистрация не найдена"
         
         if registration.status == "cancelled":
             return False, "Регистрация уже отменена"
         
+        held_seat = registration.status in SEAT_HOLDING_STATUSES
         registration.status = "cancelled"
-        await self._update_registered_count(event_item_id, -1)
+        registration.waitlist_position = None
         await self.db.flush()
+        self._invalidate_users([user_id])
+        
+        if held_seat:
+            await self._update_registered_count(event_item_id, -1)
+            await self.promote_waitlist(event_item_id)
         
         return True, "Регистрация отменена"
     
+    async def promote_waitlist(self, event_item_id: UUID, approval_required: bool = False) -> int:
+        """
+        Move users from the head of the waitlist into free seats.
+        
+        The seat counter is locked for the rest of the transaction, so free
+        seats are computed once and can't be taken concurrently. Head rows
+        come from the partial (event_item_id, waitlist_position) index.
+        Promoted users are notified by the bot after commit.
+        
+        Returns:
+            Number of promoted registrations
+        """
+        item = await self._lock_seats(event_item_id)
+        if not item or item.status == "cancelled":
+            return 0
+        
+        free_seats = None if item.capacity is None else item.capacity - item.taken
+        if free_seats is not None and free_seats <= 0:
+            return 0
+        
+        head = (
+            select(Registration.id)
+            .where(
+                Registration.event_item_id == event_item_id,
+                Registration.status == "waitlist"
+            )
+            .order_by(Registration.waitlist_position.asc())
+            # Rows locked by a concurrent cancel of a waitlisted user are skipped
+            .with_for_update(skip_locked=True)
+        )
+        if free_seats is not None:
+            head = head.limit(free_seats)
+        registration_ids = list((await self.db.execute(head)).scalars().all())
+        if not registration_ids:
+            return 0
+        
+        now = datetime.utcnow()
+        stmt = (
+            update(Registration)
+            .where(Registration.id.in_(registration_ids))
+            .values(
+                status="confirmed" if not approval_required else "pending",
+                approved_at=None if approval_required else now,
+                waitlist_position=None
+            )
+            .returning(Registration.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        user_ids = list((await self.db.execute(stmt)).scalars().all())
+        await self._update_registered_count(event_item_id, len(user_ids))
+        self._invalidate_users(user_ids)
+        
+        telegram_ids = await self.db.execute(select(User.telegram_id).where(User.id.in_(user_ids)))
+        text = (
+            f"🎉 Освободилось место! Вы записаны на «{html.escape(item.title)}»."
+            if not approval_required else
+            f"🎉 Освободилось место на «{html.escape(item.title)}». Заявка ожидает подтверждения."
+        )
+        for telegram_id in telegram_ids.scalars().all():
+            notify_on_commit(self.db, telegram_id, text)
+        
+        return len(user_ids)
+    
+    async def find_seat_drift(self, event_item_ids: Optional[list[UUID]] = None) -> list[UUID]:
+        """
+        Find items whose seat counter is missing or differs from the
+        seat-holding registrations (one aggregate query, no locks).
+        """
+        held = (
+            select(Registration.event_item_id, func.count().label("n"))
+            .where(Registration.status.in_(SEAT_HOLDING_STATUSES))
+            .group_by(Registration.event_item_id)
+            .subquery()
+        )
+        query = (
+            select(EventItem.id)
+            .outerjoin(EventItemSeats, EventItemSeats.event_item_id == EventItem.id)
+            .outerjoin(held, held.c.event_item_id == EventItem.id)
+            .where(or_(
+                EventItemSeats.event_item_id.is_(None),
+                EventItemSeats.taken != func.coalesce(held.c.n, 0),
+            ))
+        )
+        if event_item_ids:
+            query = query.where(EventItem.id.in_(event_item_ids))
+        return list((await self.db.execute(query)).scalars().all())
+    
+    async def reconcile_seats(self, event_item_id: UUID) -> Optional[tuple[int, int]]:
+        """
+        Repair the seat counter of an item from its registrations.
+        
+        The counter row is locked before counting: registrations that
+        took a seat have committed by then, and new ones wait for the
+        repair. Seats freed by the repair go to the waitlist.
+        
+        Returns:
+            (counter before, counter after) if it was repaired, otherwise None
+        """
+        item = await self._lock_seats(event_item_id)
+        if not item:
+            return None
+        
+        taken = await self.db.scalar(
+            select(func.count()).select_from(Registration).where(
+                Registration.event_item_id == event_item_id,
+                Registration.status.in_(SEAT_HOLDING_STATUSES)
+            )
+        )
+        if taken == item.taken:
+            return None
+        
+        stmt = (
+            update(seat_counters)
+            .where(
+                seat_counters.c.event_item_id == event_item_id,
+                EventItem.id == seat_counters.c.event_item_id
+            )
+            .values(taken=taken, reconciled_at=func.now())
+            .returning(EventItem.event_id)
+        )
+        invalidate_seats(self.db, (await self.db.execute(stmt)).scalar_one())
+        if taken < item.taken:
+            await self.promote_waitlist(event_item_id)
+        return item.taken, taken
+    
     async def approve(self, registration_id: UUID) -> Optional[Registration]:
         """Approve a pending registration (admin only)"""
         query = select(Registration).where(Registration.id == registration_id)
@@ -122,14 +624,362 @@ class RegistrationService:
         registration.approved_at = datetime.utcnow()
         await self.db.flush()
         await self.db.refresh(registration)
+        self._invalidate_users([registration.user_id])
         
         return registration
     
-    async def _update_registered_count(self, event_item_id: UUID, delta: int):
-        """Update registered count for an event item"""
+    async def approve_many(
+        self,
+        ids: Optional[list[UUID]] = None,
+        event_item_id: Optional[UUID] = None,
+        event_id: Optional[UUID] = None
+    ) -> int:
+        """Approve pending registrations by ids and/or item/event with one UPDATE (admin only)"""
+        stmt = (
+            update(Registration)
+            .where(*self._pending_filter(ids, event_item_id, event_id))
+            .values(status="confirmed", approved_at=datetime.utcnow())
+            .returning(Registration.id, Registration.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        approved = (await self.db.execute(stmt)).all()
+        self._invalidate_users({row.user_id for row in approved})
+        await self._notify_registrations(
+            [row.id for row in approved], "✅ Ваша заявка на «{title}» подтверждена."
+        )
+        return len(approved)
+    
+    async def reject_many(
+        self,
+        ids: Optional[list[UUID]] = None,
+        event_item_id: Optional[UUID] = None,
+        event_id: Optional[UUID] = None
+    ) -> int:
+        """
+        Reject pending registrations by ids and/or item/event (admin only).
+        
+        One UPDATE for the registrations and one for the seat counters of
+        all affected items; released seats go to the waitlists.
+        """
         stmt = (
-            update(EventItem)
+            update(Registration)
+            .where(*self._pending_filter(ids, event_item_id, event_id))
+            .values(status="rejected")
+            .returning(Registration.id, Registration.user_id, Registration.event_item_id)
+            .execution_options(synchronize_session=False)
+        )
+        rejected = (await self.db.execute(stmt)).all()
+        if not rejected:
+            return 0
+        self._invalidate_users({row.user_id for row in rejected})
+        
+        released = Counter(row.event_item_id for row in rejected)
+        counts = values(
+            column("id", PG_UUID(as_uuid=True)), column("n", Integer), name="released"
+        ).data(list(released.items()))
+        stmt = (
+            update(seat_counters)
+            .where(seat_counters.c.event_item_id == counts.c.id, EventItem.id == counts.c.id)
+            .values(taken=seat_counters.c.taken - counts.c.n)
+            .returning(EventItem.event_id)
+        )
+        for affected_event_id in set((await self.db.execute(stmt)).scalars().all()):
+            invalidate_seats(self.db, affected_event_id)
+        
+        await self._notify_registrations(
+            [row.id for row in rejected], "❌ Ваша заявка на «{title}» отклонена."
+        )
+        for item_id in released:
+            await self.promote_waitlist(item_id)
+        
+        return len(rejected)
+    
+    def _pending_filter(
+        self,
+        ids: Optional[list[UUID]],
+        event_item_id: Optional[UUID],
+        event_id: Optional[UUID]
+    ) -> list:
+        """WHERE clauses for bulk moderation of pending registrations"""
+        if not (ids or event_item_id or event_id):
+            raise ValueError("ids, event_item_id or event_id is required")
+        conditions = [Registration.status == "pending"]
+        if ids:
+            conditions.append(Registration.id.in_(ids))
+        if event_item_id:
+            conditions.append(Registration.event_item_id == event_item_id)
+        if event_id:
+            conditions.append(Registration.event_item_id.in_(
+                select(EventItem.id).where(EventItem.event_id == event_id)
+            ))
+        return conditions
+    
+    async def _notify_registrations(self, registration_ids: list[UUID], template: str):
+        """Queue bot messages to owners of registrations ({title} is the item title)"""
+        if not registration_ids:
+            return
+        query = (
+            select(User.telegram_id, EventItem.title)
+            .select_from(Registration)
+            .join(User, Registration.user_id == User.id)
+            .join(EventItem, Registration.event_item_id == EventItem.id)
+            .where(Registration.id.in_(registration_ids))
+        )
+        for telegram_id, title in (await self.db.execute(query)).all():
+            notify_on_commit(self.db, telegram_id, template.format(title=html.escape(title)))
+    
+    def export_query(
+        self,
+        event_item_id: Optional[UUID] = None,
+        event_id: Optional[UUID] = None,
+        status: Optional[str] = None
+    ):
+        """Query for registration export rows (flat: registration, item and user columns)"""
+        query = (
+            select(
+                Registration.id.label("registration_id"),
+                Registration.status,
+                Registration.registered_at,
+                Registration.approved_at,
+                EventItem.id.label("event_item_id"),
+                EventItem.title.label("event_item_title"),
+                EventItem.date_start,
+                User.telegram_id,
+                User.username,
+                User.first_name,
+                User.last_name,
+            )
+            .join(EventItem, Registration.event_item_id == EventItem.id)
+            .join(User, Registration.user_id == User.id)
+            .order_by(EventItem.date_start, EventItem.id, User.last_name, User.first_name)
+        )
+        if event_item_id:
+            query = query.where(Registration.event_item_id == event_item_id)
+        if event_id:
+            query = query.where(EventItem.event_id == event_id)
+        if status:
+            query = query.where(Registration.status == status)
+        return query
+    
+    async def stream_export(self, query, batch_size: int = 1000) -> AsyncIterator[list]:
+        """Yield export rows in batches from a server-side cursor (constant memory)"""
+        result = await self.db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            yield rows
+    
+    async def _claim_seat(self, event_item_id: UUID) -> bool:
+        """Take one seat if the item has free capacity"""
+        # Only the counter row is updated and locked; the item row is just read
+        stmt = (
+            update(seat_counters)
+            .where(
+                seat_counters.c.event_item_id == event_item_id,
+                EventItem.id == seat_counters.c.event_item_id,
+                EventItem.status != "cancelled",
+                or_(
+                    EventItem.capacity.is_(None),
+                    seat_counters.c.taken < EventItem.capacity,
+                ),
+            )
+            .values(taken=seat_counters.c.taken + 1)
+            .returning(EventItem.event_id)
+        )
+        event_id = (await self.db.execute(stmt)).scalar_one_or_none()
+        if event_id is None and await self.db.get(EventItemSeats, event_item_id) is None:
+            # Item without a counter yet (created bypassing the service)
+            await self._create_seat_counter(event_item_id)
+            event_id = (await self.db.execute(stmt)).scalar_one_or_none()
+        if event_id is None:
+            return False
+        # Spot counts are served from the seat overlay; the program snapshot stays
+        invalidate_seats(self.db, event_id)
+        return True
+    
+    async def _lock_seats(self, event_item_id: UUID):
+        """
+        Lock the item's seat counter for the rest of the transaction.
+        
+        Returns:
+            Row (title, capacity, status, taken) or None if there is no such item
+        """
+        query = (
+            select(EventItem.title, EventItem.capacity, EventItem.status, EventItemSeats.taken)
+            .join(EventItemSeats, EventItemSeats.event_item_id == EventItem.id)
             .where(EventItem.id == event_item_id)
-            .values(registered_count=EventItem.registered_count + delta)
+            .with_for_update(of=EventItemSeats)
+        )
+        item = (await self.db.execute(query)).one_or_none()
+        if item is None:
+            await self._create_seat_counter(event_item_id)
+            item = (await self.db.execute(query)).one_or_none()
+        return item
+    
+    async def _create_seat_counter(self, event_item_id: UUID):
+        """Create a missing seat counter, counted from registrations (no-op for unknown items)"""
+        taken = (
+            select(func.count())
+            .select_from(Registration)
+            .where(
+                Registration.event_item_id == event_item_id,
+                Registration.status.in_(SEAT_HOLDING_STATUSES)
+            )
+            .scalar_subquery()
+        )
+        stmt = (
+            insert(EventItemSeats)
+            .from_select(
+                ["event_item_id", "taken"],
+                select(EventItem.id, taken).where(EventItem.id == event_item_id)
+            )
+            .on_conflict_do_nothing(index_elements=[EventItemSeats.event_item_id])
         )
         await self.db.execute(stmt)
+    
+    async def _join_waitlist(
+        self,
+        user_id: UUID,
+        event_item_id: UUID,
+        existing: Optional[Registration]
+    ) -> tuple[Optional[Registration], str]:
+        """Put user at the end of the item waitlist"""
+        registration = await self._save_registration(user_id, event_item_id, existing, {
+            "status": "waitlist",
+            "registered_at": datetime.utcnow(),
+            "approved_at": None,
+            "waitlist_position": waitlist_position_seq.next_value(),
+        })
+        if not registration:
+            return None, "Вы уже зарегистрированы на это мероприятие"
+        
+        # A seat released right before we joined must not stay empty
+        await self.promote_waitlist(event_item_id)
+        await self.db.refresh(registration)
+        if registration.status != "waitlist":
+            return registration, "Регистрация успешна"
+        
+        position = await self.get_waitlist_position(registration)
+        return registration, f"Все места заняты. Вы в листе ожидания (позиция {position})"
+    
+    async def _save_registration(
+        self,
+        user_id: UUID,
+        event_item_id: UUID,
+        existing: Optional[Registration],
+        values: dict
+    ) -> Optional[Registration]:
+        """
+        Insert registration or re-activate a cancelled one.
+        
+        Returns None if a parallel request of the same user got there first.
+        """
+        if existing:
+            stmt = (
+                update(Registration)
+                .where(Registration.id == existing.id, Registration.status == "cancelled")
+                .values(**values)
+                .returning(Registration.id)
+            )
+        else:
+            stmt = (
+                insert(Registration)
+                .values(id=uuid.uuid4(), user_id=user_id, event_item_id=event_item_id, **values)
+                .on_conflict_do_nothing(constraint="uq_registration_event_item_user")
+                .returning(Registration.id)
+            )
+        registration_id = (await self.db.execute(stmt)).scalar_one_or_none()
+        if registration_id is None:
+            return None
+        self._invalidate_users([user_id])
+        
+        if existing:
+            await self.db.refresh(existing)
+            return existing
+        return await self.db.get(Registration, registration_id)
+    
+    async def _save_registrations(
+        self,
+        event_item_id: UUID,
+        user_ids: list[UUID],
+        existing: dict[UUID, Registration],
+        values: dict
+    ) -> dict[UUID, Registration]:
+        """
+        Insert registrations / re-activate cancelled ones for many users at once.
+        
+        Users that got registered by a parallel request are left out of the result.
+        """
+        saved_ids = []
+        reactivated = [existing[user_id].id for user_id in user_ids if user_id in existing]
+        if reactivated:
+            stmt = (
+                update(Registration)
+                .where(Registration.id.in_(reactivated), Registration.status == "cancelled")
+                .values(**values)
+                .returning(Registration.id)
+                .execution_options(synchronize_session=False)
+            )
+            saved_ids += (await self.db.execute(stmt)).scalars().all()
+        
+        new_users = [user_id for user_id in user_ids if user_id not in existing]
+        if new_users:
+            # Multi-row VALUES keeps arrival order for sequence-based waitlist positions
+            stmt = (
+                insert(Registration)
+                .values([
+                    {"id": uuid.uuid4(), "user_id": user_id, "event_item_id": event_item_id, **values}
+                    for user_id in new_users
+                ])
+                .on_conflict_do_nothing(constraint="uq_registration_event_item_user")
+                .returning(Registration.id)
+            )
+            saved_ids += (await self.db.execute(stmt)).scalars().all()
+        
+        if not saved_ids:
+            return {}
+        query = (
+            select(Registration)
+            .where(Registration.id.in_(saved_ids))
+            .execution_options(populate_existing=True)
+        )
+        saved = {r.user_id: r for r in (await self.db.execute(query)).scalars().all()}
+        self._invalidate_users(saved)
+        return saved
+    
+    def _invalidate_users(self, user_ids):
+        """Drop cached registration sets of users after commit"""
+        for user_id in user_ids:
+            invalidate_on_commit(self.db, user_registrations, user_id)
+    
+    async def _registration_config(self, event_item_id: UUID) -> dict:
+        """Get registration module config of the item's event (defaults if there is none)"""
+        query = (
+            select(Module.config)
+            .join(EventItem, EventItem.event_id == Module.event_id)
+            .where(
+                EventItem.id == event_item_id,
+                Module.type == "registration",
+                Module.enabled == True
+            )
+            .order_by(Module.order)
+            .limit(1)
+        )
+        return (await self.db.execute(query)).scalar_one_or_none() or {}
+    
+    @staticmethod
+    def _titles(items: list) -> str:
+        return ", ".join(f"«{item.title}»" for item in items)
+    
+    async def _update_registered_count(self, event_item_id: UUID, delta: int):
+        """Update taken seats of an event item"""
+        stmt = (
+            update(seat_counters)
+            .where(
+                seat_counters.c.event_item_id == event_item_id,
+                EventItem.id == seat_counters.c.event_item_id
+            )
+            .values(taken=seat_counters.c.taken + delta)
+            .returning(EventItem.event_id)
+        )
+        result = await self.db.execute(stmt)
+        # Spot counts are served from the seat overlay; the program snapshot stays
+        invalidate_seats(self.db, result.scalar_one_or_none())
@@ -0,0 +1,272 @@
+"""
+Session reminders.
+
+Every upcoming program item has one row in event_item_reminders with the
+time to remind its attendees (REMINDER_LEAD_MINUTES before the start).
+Item create/update keeps the row in line with the item's time and status
+(schedule_reminder); a moved item gets its reminder again.
+
+Each API worker keeps the reminders due within REMINDER_HORIZON_MINUTES
+in a heap and reloads that window every REMINDER_REFRESH_SECONDS with an
+index range scan (never the whole table). Reminders of items that have
+already started can't be sent any more: they are not stored, and rows
+left behind (missed while no worker was running) fall out of the window. The loop sleeps until the
+minute the next reminder is due and handles everything due in that
+minute as one batch: one UPDATE claims the batch (so only one worker
+sends it), one query gets the confirmed registrants of all its items,
+and every user gets a single message listing their sessions, sent
+through the bot's shared rate limits. Delivery is at most once: a worker
+dying after the claim drops that minute's reminders.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from html import escape
+from typing import Optional
+from uuid import UUID
+
+from aiogram import Bot
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models import EventItem, EventItemReminder, Location, Registration, User
+from app.services.broadcaster import BroadcastSender, get_sender
+
+logger = logging.getLogger(__name__)
+
+REMINDER_LEAD = timedelta(minutes=settings.REMINDER_LEAD_MINUTES)
+
+
+class ReminderScheduler:
+    """In-memory timer heap over the durable reminders table"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session_maker,
+        lead: timedelta = REMINDER_LEAD,
+        horizon: float = settings.REMINDER_HORIZON_MINUTES * 60,
+        refresh_interval: float = settings.REMINDER_REFRESH_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.lead = lead
+        self.horizon = horizon
+        self.refresh_interval = refresh_interval
+        self.sender: Optional[BroadcastSender] = None
+        # (due timestamp, item id); entries superseded in _due are skipped when popped
+        self._heap: list[tuple[float, UUID]] = []
+        self._due: dict[UUID, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.sent = 0
+        self.failed = 0
+
+    def start(self, bot: Optional[Bot]) -> None:
+        """Start the loop (nothing to do without a bot token)"""
+        if bot is not None and self._task is None:
+            self.sender = get_sender(bot)
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        """Stop the loop (on shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def schedule(self, event_item_id: UUID, remind_at: Optional[datetime]) -> None:
+        """Put (or move) a reminder in this worker's heap; None drops it"""
+        if remind_at is None:
+            self._due.pop(event_item_id, None)
+            return
+        due = remind_at.timestamp()
+        if due > time.time() + self.horizon:
+            # Beyond the window: the next reload picks it up
+            self._due.pop(event_item_id, None)
+            return
+        self._due[event_item_id] = due
+        heapq.heappush(self._heap, (due, event_item_id))
+        self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "scheduled": len(self._due),
+            "next_due_at": (
+                datetime.fromtimestamp(min(self._due.values()), timezone.utc).isoformat() if self._due else None
+            ),
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+    async def _loop(self) -> None:
+        try:
+            await self._realign()
+        except Exception:
+            logger.exception("Reminder realignment failed")
+        next_refresh = 0.0
+        while True:
+            try:
+                if time.time() >= next_refresh:
+                    await self._load()
+                    next_refresh = time.time() + self.refresh_interval
+                due = self._pop_due(time.time())
+                if due:
+                    await self._send(due)
+            except Exception:
+                logger.exception("Sending reminders failed")
+            await self._sleep(next_refresh)
+
+    async def _sleep(self, next_refresh: float) -> None:
+        """Sleep until the minute of the next reminder, the next reload or a new reminder"""
+        wake_at = next_refresh
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if self._heap:
+            # Everything due within one minute goes out as one batch
+            wake_at = min(wake_at, math.ceil(self._heap[0][0] / 60) * 60)
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), max(0.0, wake_at - time.time()))
+        except asyncio.TimeoutError:
+            pass
+
+    def _pop_due(self, now: float) -> list[UUID]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            timestamp, event_item_id = heapq.heappop(self._heap)
+            if self._due.get(event_item_id) == timestamp:
+                del self._due[event_item_id]
+                due.append(event_item_id)
+        return due
+
+    async def _realign(self) -> None:
+        """Move pending reminders to the configured lead (it may have changed since they were stored)"""
+        async with self.session_factory() as db, db.begin():
+            await db.execute(
+                update(EventItemReminder)
+                .where(
+                    EventItemReminder.event_item_id == EventItem.id,
+                    EventItemReminder.sent_at.is_(None),
+                    EventItem.date_start > func.now(),
+                    EventItemReminder.remind_at != EventItem.date_start - self.lead,
+                )
+                .values(remind_at=EventItem.date_start - self.lead)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def _load(self) -> None:
+        """Load pending reminders due within the horizon (index range scan)"""
+        now = datetime.now(timezone.utc)
+        until = now + timedelta(seconds=self.horizon)
+        # Older ones belong to items already started: _send would never claim them
+        since = now - self.lead
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(EventItemReminder.event_item_id, EventItemReminder.remind_at)
+                .where(
+                    EventItemReminder.sent_at.is_(None),
+                    EventItemReminder.remind_at > since,
+                    EventItemReminder.remind_at <= until,
+                )
+            )
+            rows = result.all()
+        loaded = {event_item_id: remind_at.timestamp() for event_item_id, remind_at in rows}
+        # Reminders moved out of the window or sent by another worker are dropped
+        for event_item_id in list(self._due):
+            if event_item_id not in loaded:
+                del self._due[event_item_id]
+        for event_item_id, due in loaded.items():
+            if self._due.get(event_item_id) != due:
+                self._due[event_item_id] = due
+                heapq.heappush(self._heap, (due, event_item_id))
+
+    async def _send(self, event_item_ids: list[UUID]) -> None:
+        """Claim a batch of due reminders and message the registrants"""
+        async with self.session_factory() as db, db.begin():
+            # Only items still ahead whose reminder is really due (not moved meanwhile)
+            claimed = list((await db.scalars(
+                update(EventItemReminder)
+                .where(
+                    EventItemReminder.event_item_id.in_(event_item_ids),
+                    EventItemReminder.event_item_id == EventItem.id,
+                    EventItemReminder.sent_at.is_(None),
+                    EventItemReminder.remind_at <= func.now(),
+                    EventItem.date_start > func.now(),
+                    EventItem.status != "cancelled",
+                )
+                .values(sent_at=func.now())
+                .returning(EventItemReminder.event_item_id)
+                .execution_options(synchronize_session=False)
+            )).all())
+            if not claimed:
+                return
+            result = await db.execute(
+                select(User.telegram_id, EventItem.title, EventItem.date_start, Location.name)
+                .select_from(Registration)
+                .join(User, Registration.user_id == User.id)
+                .join(EventItem, Registration.event_item_id == EventItem.id)
+                .outerjoin(Location, EventItem.location_id == Location.id)
+                .where(Registration.event_item_id.in_(claimed), Registration.status == "confirmed")
+                .order_by(User.telegram_id, EventItem.date_start)
+            )
+            rows = result.all()
+
+        now = datetime.now(timezone.utc)
+        sessions: dict[int, list[str]] = {}
+        for telegram_id, title, date_start, location_name in rows:
+            minutes = max(1, round((date_start - now).total_seconds() / 60))
+            line = f"• <b>{escape(title)}</b> — через {minutes} мин."
+            if location_name:
+                line += f"\n  📍 {escape(location_name)}"
+            sessions.setdefault(telegram_id, []).append(line)
+        messages = {
+            telegram_id: "⏰ Скоро начало:\n\n" + "\n".join(lines)
+            for telegram_id, lines in sessions.items()
+        }
+
+        outcomes = await self.sender.send_messages(messages)
+        sent = sum(1 for status, _, _ in outcomes.values() if status == "sent")
+        self.sent += sent
+        self.failed += len(outcomes) - sent
+        logger.info(f"Reminders for {len(claimed)} items: {sent} of {len(outcomes)} users notified")
+
+
+reminder_scheduler = ReminderScheduler()
+
+
+def _has_started(date_start: datetime) -> bool:
+    # Naive times (straight from a request) are stored as UTC
+    if date_start.tzinfo is None:
+        date_start = date_start.replace(tzinfo=timezone.utc)
+    return date_start <= datetime.now(timezone.utc)
+
+
+async def schedule_reminder(db: AsyncSession, item: EventItem) -> None:
+    """
+    Create, move or drop the reminder of an item after its time or status changed.
+
+    A reminder moved to another time is sent again; workers update their
+    heaps once the transaction commits (this one at once, others on reload).
+    """
+    if item.date_start is None or item.status == "cancelled" or _has_started(item.date_start):
+        # Nothing to remind of (an item already started can't be reminded any more)
+        await db.execute(delete(EventItemReminder).where(EventItemReminder.event_item_id == item.id))
+        remind_at = None
+    else:
+        remind_at = item.date_start - REMINDER_LEAD
+        stmt = insert(EventItemReminder).values(event_item_id=item.id, remind_at=remind_at)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[EventItemReminder.event_item_id],
+            set_={"remind_at": stmt.excluded.remind_at, "sent_at": None},
+            where=EventItemReminder.remind_at != stmt.excluded.remind_at,
+        ))
+    event.listen(
+        db.sync_session, "after_commit",
+        lambda session: reminder_scheduler.schedule(item.id, remind_at), once=True
+    )
@@ -0,0 +1,113 @@
+"""
+In-memory "now and next" index over an event program
+"""
+from bisect import bisect_right
+from heapq import merge
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from app.models import EventItem
+
+# Items without date_end are considered running for this long
+DEFAULT_ITEM_DURATION = timedelta(hours=1)
+# Longer items (all-day exhibitions, registration desks) are kept apart,
+# so they don't widen the "now" window of the regular sessions
+LONG_ITEM_DURATION = timedelta(hours=3)
+
+
+class _Timeline:
+    """Items of one scope (whole event or one location) sorted by start time"""
+
+    def __init__(self):
+        self.starts: list[float] = []
+        self.ends: list[float] = []
+        self.positions: list[int] = []
+        # Longest duration among items not in long_items
+        self.max_duration: float = 0.0
+        # (start, end, position) of items longer than LONG_ITEM_DURATION
+        self.long_items: list[tuple[float, float, int]] = []
+
+    def add(self, start: float, end: float, position: int) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self.positions.append(position)
+        if end - start > LONG_ITEM_DURATION.total_seconds():
+            self.long_items.append((start, end, position))
+        else:
+            self.max_duration = max(self.max_duration, end - start)
+
+
+class ScheduleIndex:
+    """
+    Sorted start/end arrays per event and per location.
+
+    "Now" bisects the window of items that started no earlier than the
+    longest regular item duration ago and checks the few long items
+    separately, so lookups cost O(log n + k + l) where k is the number of
+    items in that window and l the number of long items. Returned values
+    are positions in the program snapshot.
+    """
+
+    def __init__(self, items: list[EventItem]):
+        self._all = _Timeline()
+        self._by_location: dict[UUID, _Timeline] = {}
+
+        scheduled = [
+            (position, item) for position, item in enumerate(items)
+            if item.date_start and item.status != "cancelled"
+        ]
+        scheduled.sort(key=lambda entry: entry[1].date_start)
+
+        for position, item in scheduled:
+            start = item.date_start.timestamp()
+            end_at = item.date_end or item.date_start + DEFAULT_ITEM_DURATION
+            end = max(end_at.timestamp(), start)
+
+            self._all.add(start, end, position)
+            if item.location_id:
+                self._by_location.setdefault(item.location_id, _Timeline()).add(start, end, position)
+
+    def _timeline(self, location_id: Optional[UUID]) -> Optional[_Timeline]:
+        if location_id:
+            return self._by_location.get(location_id)
+        return self._all
+
+    @staticmethod
+    def _timestamp(at: datetime) -> float:
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        return at.timestamp()
+
+    def now(self, at: datetime, location_id: Optional[UUID] = None) -> list[int]:
+        """Get items running at the given moment"""
+        timeline = self._timeline(location_id)
+        if not timeline:
+            return []
+
+        moment = self._timestamp(at)
+        lo = bisect_right(timeline.starts, moment - timeline.max_duration)
+        hi = bisect_right(timeline.starts, moment)
+        window = [
+            (timeline.starts[i], timeline.positions[i])
+            for i in range(lo, hi)
+            # Long items in the window are taken from long_items below
+            if timeline.ends[i] > moment
+            and timeline.ends[i] - timeline.starts[i] <= LONG_ITEM_DURATION.total_seconds()
+        ]
+        long_running = [
+            (start, position)
+            for start, end, position in timeline.long_items
+            if start <= moment < end
+        ]
+        # Both are in start order; keep it
+        return [position for _, position in merge(window, long_running)]
+
+    def next(self, at: datetime, location_id: Optional[UUID] = None, limit: int = 5) -> list[int]:
+        """Get nearest items starting after the given moment"""
+        timeline = self._timeline(location_id)
+        if not timeline:
+            return []
+
+        start = bisect_right(timeline.starts, self._timestamp(at))
+        return timeline.positions[start:start + limit]
@@ -0,0 +1,198 @@
+from uuid import UUID
+from sqlalchemy import select, func, case, or_, literal, union_all, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import EventItem, Speaker, Location
+from app.schemas import (
+    SearchItemHit, SearchSpeakerHit, SearchLocationHit, SearchResponse, SearchSuggestion,
+)
+
+# Trigram operators need at least one full trigram to be useful;
+# shorter queries are matched by prefix / substring only
+TRGM_MIN_QUERY_LENGTH = 3
+
+LIKE_ESCAPE = "!"
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards in user input"""
+    return (
+        value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", f"{LIKE_ESCAPE}%")
+        .replace("_", f"{LIKE_ESCAPE}_")
+    )
+
+
+class SearchService:
+    """
+    Service for event-wide search over items, speakers and locations.
+
+    Matching and ranking rely on pg_trgm: GIN gin_trgm_ops indexes serve
+    both ILIKE substring/prefix patterns and the word similarity operator
+    (typo tolerance). Score = word similarity + boost for prefix matches.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search(self, event_id: UUID, query: str, limit: int = 10) -> SearchResponse:
+        """Search items, speakers and locations of an event"""
+        query = query.strip()
+        if not query:
+            return SearchResponse(query=query)
+
+        fuzzy = len(query) >= TRGM_MIN_QUERY_LENGTH
+        if fuzzy:
+            await self._set_similarity_threshold()
+
+        items = await self._search_items(event_id, query, fuzzy, limit)
+        speakers = await self._search_speakers(event_id, query, fuzzy, limit)
+        locations = await self._search_locations(event_id, query, fuzzy, limit)
+
+        return SearchResponse(query=query, items=items, speakers=speakers, locations=locations)
+
+    async def suggest(self, event_id: UUID, query: str, limit: int = 10) -> list[SearchSuggestion]:
+        """Autocomplete: titles and names having a word that starts with the query"""
+        query = query.strip()
+        if not query:
+            return []
+
+        sources = [
+            (EventItem, EventItem.title, "item"),
+            (Speaker, Speaker.name, "speaker"),
+            (Location, Location.name, "location"),
+        ]
+        selects = []
+        for model, column, kind in sources:
+            selects.append(
+                select(
+                    column.label("text"),
+                    literal(kind).label("type"),
+                    model.id.label("id"),
+                    self._prefix_boost(column, query).label("boost"),
+                )
+                .where(model.event_id == event_id)
+                .where(self._word_prefix_match(column, query))
+            )
+
+        combined = union_all(*selects).subquery()
+        stmt = (
+            select(combined.c.text, combined.c.type, combined.c.id)
+            .order_by(combined.c.boost.desc(), func.length(combined.c.text), combined.c.text)
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return [SearchSuggestion(text=row.text, type=row.type, id=row.id) for row in result.all()]
+
+    async def _set_similarity_threshold(self):
+        """Set word similarity threshold for the current transaction"""
+        await self.db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            {"threshold": str(settings.SEARCH_WORD_SIMILARITY_THRESHOLD)}
+        )
+
+    def _word_prefix_match(self, column, query: str):
+        """Column starts with query or has a word starting with it"""
+        escaped = _escape_like(query)
+        return or_(
+            column.ilike(f"{escaped}%", escape=LIKE_ESCAPE),
+            column.ilike(f"% {escaped}%", escape=LIKE_ESCAPE),
+        )
+
+    def _prefix_boost(self, column, query: str):
+        """1 for whole-value prefix, 0.5 for word prefix, 0 otherwise"""
+        escaped = _escape_like(query)
+        return case(
+            (column.ilike(f"{escaped}%", escape=LIKE_ESCAPE), 1.0),
+            (column.ilike(f"% {escaped}%", escape=LIKE_ESCAPE), 0.5),
+            else_=0.0,
+        )
+
+    def _match(self, column, query: str, fuzzy: bool):
+        """Substring match, plus word similarity above threshold for longer queries"""
+        condition = column.ilike(f"%{_escape_like(query)}%", escape=LIKE_ESCAPE)
+        if fuzzy:
+            # column %> query  <=>  word_similarity(query, column) > threshold
+            condition = or_(condition, column.op("%>")(query))
+        return condition
+
+    async def _search_items(self, event_id: UUID, query: str, fuzzy: bool, limit: int) -> list[SearchItemHit]:
+        description = func.coalesce(EventItem.description, "")
+        score = (
+            self._prefix_boost(EventItem.title, query)
+            + func.greatest(
+                func.word_similarity(query, EventItem.title),
+                func.word_similarity(query, description) * 0.5,
+            )
+        ).label("score")
+
+        stmt = (
+            select(
+                EventItem.id,
+                EventItem.title,
+                EventItem.type,
+                EventItem.date_start,
+                EventItem.date_end,
+                EventItem.location_id,
+                Location.name.label("location_name"),
+                score,
+            )
+            .outerjoin(Location, EventItem.location_id == Location.id)
+            .where(EventItem.event_id == event_id)
+            .where(EventItem.status != "cancelled")
+            .where(or_(
+                self._match(EventItem.title, query, fuzzy),
+                self._match(EventItem.description, query, fuzzy),
+            ))
+            .order_by(score.desc(), EventItem.date_start.asc())
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return [SearchItemHit.model_validate(row._mapping) for row in result.all()]
+
+    async def _search_speakers(self, event_id: UUID, query: str, fuzzy: bool, limit: int) -> list[SearchSpeakerHit]:
+        company = func.coalesce(Speaker.company, "")
+        score = (
+            self._prefix_boost(Speaker.name, query)
+            + func.greatest(
+                func.word_similarity(query, Speaker.name),
+                func.word_similarity(query, company) * 0.5,
+            )
+        ).label("score")
+
+        stmt = (
+            select(
+                Speaker.id,
+                Speaker.name,
+                Speaker.position,
+                Speaker.company,
+                Speaker.photo_url,
+                score,
+            )
+            .where(Speaker.event_id == event_id)
+            .where(or_(
+                self._match(Speaker.name, query, fuzzy),
+                self._match(Speaker.company, query, fuzzy),
+            ))
+            .order_by(score.desc(), Speaker.name.asc())
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return [SearchSpeakerHit.model_validate(row._mapping) for row in result.all()]
+
+    async def _search_locations(self, event_id: UUID, query: str, fuzzy: bool, limit: int) -> list[SearchLocationHit]:
+        score = (
+            self._prefix_boost(Location.name, query)
+            + func.word_similarity(query, Location.name)
+        ).label("score")
+
+        stmt = (
+            select(Location.id, Location.name, Location.floor, score)
+            .where(Location.event_id == event_id)
+            .where(self._match(Location.name, query, fuzzy))
+            .order_by(score.desc(), Location.name.asc())
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return [SearchLocationHit.model_validate(row._mapping) for row in result.all()]
@@ -0,0 +1,96 @@
+"""
+Seat counter reconciliation.
+
+Registrations update the per-item seat counters (event_item_seats)
+incrementally. A manual edit in the database, a script or a bug can make
+a counter drift from the registrations table. The reconciler
+periodically finds drifted counters with one aggregate query and repairs
+each in its own short transaction.
+
+Every API worker runs the loop; a Postgres advisory lock lets only one of
+them make a pass at a time.
+"""
+import asyncio
+import logging
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.database import async_session_maker
+from app.services.registration_service import RegistrationService
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key of a reconciliation pass
+ADVISORY_LOCK_KEY = 0x5EA75
+
+
+class SeatReconciler:
+    """Background job repairing seat counters from registrations"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session_maker,
+        interval: float = settings.SEAT_RECONCILE_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the periodic loop (disabled with a zero interval)"""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        """Stop the loop (on shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self, event_item_ids: Optional[list[UUID]] = None) -> dict[UUID, tuple[int, int]]:
+        """
+        Make one reconciliation pass.
+
+        Returns:
+            Mapping event_item_id -> (counter before, counter after) of repaired
+            items; empty if another worker is making a pass right now
+        """
+        repaired: dict[UUID, tuple[int, int]] = {}
+        # The lock lives as long as this transaction: held for the whole pass
+        async with self.session_factory() as lock_session, lock_session.begin():
+            if not await lock_session.scalar(select(func.pg_try_advisory_xact_lock(ADVISORY_LOCK_KEY))):
+                return repaired
+
+            async with self.session_factory() as db:
+                drifted = await RegistrationService(db).find_seat_drift(event_item_ids)
+
+            for event_item_id in drifted:
+                try:
+                    async with self.session_factory() as db:
+                        result = await RegistrationService(db).reconcile_seats(event_item_id)
+                        await db.commit()
+                except Exception:
+                    logger.exception(f"Seat counter repair for item {event_item_id} failed")
+                    continue
+                if result:
+                    repaired[event_item_id] = result
+                    logger.warning(
+                        f"Seat counter of item {event_item_id} drifted: {result[0]} -> {result[1]}"
+                    )
+        return repaired
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Seat counter reconciliation failed")
+
+
+seat_reconciler = SeatReconciler()
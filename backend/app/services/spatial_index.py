@@ -0,0 +1,252 @@
+"""
+Spatial index over the event map.
+
+Per floor, locations and zone polygons are put into uniform grid
+buckets. Nearest-location queries scan rings of cells around the point
+(with a separate grid per location type) and stop as soon as no unseen
+cell can hold a closer location; a point outside the grid is answered
+by a scan of the grid's locations instead. Point-in-zone lookups test only the
+polygons whose bounding box covers the point's cell.
+"""
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from uuid import UUID
+
+from app.models import Location, Zone
+from app.services.navigation import STAIRS_FLOOR_COST, location_position, parse_polygon
+
+# A floor change ranks like this much plan distance in nearest-location results
+FLOOR_DISTANCE = STAIRS_FLOOR_COST
+
+Point = tuple[float, float]
+
+
+@dataclass(frozen=True)
+class LocationEntry:
+    """Location placed on the plan"""
+    id: UUID
+    name: str
+    type: Optional[str]
+    floor: int
+    x: float
+    y: float
+    zone_id: Optional[UUID]
+
+    def to_dict(self, distance: Optional[float] = None) -> dict:
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "type": self.type,
+            "floor": self.floor,
+            "x": self.x,
+            "y": self.y,
+            "zone_id": str(self.zone_id) if self.zone_id else None,
+            "distance": round(distance, 1) if distance is not None else None,
+        }
+
+
+def _cell_size(extent: float, count: int) -> float:
+    """About one entry per cell for evenly spread entries"""
+    return max(extent / max(1, math.ceil(math.sqrt(count))), 1.0)
+
+
+def point_in_polygon(x: float, y: float, polygon: list[Point]) -> bool:
+    """Even-odd ray casting test"""
+    inside = False
+    j = len(polygon) - 1
+    for i, (xi, yi) in enumerate(polygon):
+        xj, yj = polygon[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def polygon_area(polygon: list[Point]) -> float:
+    """Area by the shoelace formula"""
+    return abs(sum(
+        x1 * y2 - x2 * y1
+        for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1])
+    )) / 2
+
+
+class _PointGrid:
+    """Locations of one floor (and type) bucketed by grid cell"""
+
+    def __init__(self, entries: list[LocationEntry]):
+        min_x, max_x = min(e.x for e in entries), max(e.x for e in entries)
+        min_y, max_y = min(e.y for e in entries), max(e.y for e in entries)
+        self.entries = entries
+        self.cell = _cell_size(max(max_x - min_x, max_y - min_y), len(entries))
+        self.cells: dict[tuple[int, int], list[LocationEntry]] = {}
+        for entry in entries:
+            self.cells.setdefault(self._key(entry.x, entry.y), []).append(entry)
+        self.bounds = (*self._key(min_x, min_y), *self._key(max_x, max_y))
+
+    def _key(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def nearest(self, x: float, y: float, k: int, exclude: Optional[UUID] = None) -> list[tuple[float, LocationEntry]]:
+        """Get up to k closest entries as (distance, entry), closest first"""
+        cx, cy = self._key(x, y)
+        min_cx, min_cy, max_cx, max_cy = self.bounds
+        if not (min_cx <= cx <= max_cx and min_cy <= cy <= max_cy):
+            # Rings from a far point would mostly cover empty cells (their number
+            # grows with the square of the distance): look at every entry instead
+            hits = [
+                (math.dist((x, y), (entry.x, entry.y)), entry)
+                for entry in self.entries if entry.id != exclude
+            ]
+            return heapq.nsmallest(k, hits, key=lambda hit: hit[0])
+
+        last_ring = max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy)
+        # Max-heap of the best k by distance (negated); the counter breaks ties
+        best: list[tuple[float, int, LocationEntry]] = []
+        counter = 0
+
+        for ring in range(last_ring + 1):
+            for key in self._ring(cx, cy, ring):
+                for entry in self.cells.get(key, ()):
+                    if entry.id == exclude:
+                        continue
+                    distance = math.dist((x, y), (entry.x, entry.y))
+                    counter += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, counter, entry))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, counter, entry))
+            # Cells outside this ring are at least ring * cell away from the point
+            if len(best) == k and -best[0][0] <= ring * self.cell:
+                break
+
+        return sorted(((-negated, entry) for negated, _, entry in best), key=lambda hit: hit[0])
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> Iterable[tuple[int, int]]:
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+
+class _ZoneGrid:
+    """Zone polygons of one floor registered in every cell their bounding box covers"""
+
+    def __init__(self, zones: list[tuple[Zone, list[Point]]]):
+        boxes = [
+            (min(x for x, _ in polygon), min(y for _, y in polygon),
+             max(x for x, _ in polygon), max(y for _, y in polygon))
+            for _, polygon in zones
+        ]
+        self.cell = max(max(max_x - min_x, max_y - min_y) for min_x, min_y, max_x, max_y in boxes)
+        self.cell = max(self.cell, 1.0)
+        self.cells: dict[tuple[int, int], list[tuple[Zone, list[Point], tuple, float]]] = {}
+        for (zone, polygon), box in zip(zones, boxes):
+            entry = (zone, polygon, box, polygon_area(polygon))
+            min_cx, min_cy = self._key(box[0], box[1])
+            max_cx, max_cy = self._key(box[2], box[3])
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    self.cells.setdefault((cx, cy), []).append(entry)
+
+    def _key(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def zones_at(self, x: float, y: float) -> list[Zone]:
+        """Get zones containing the point, smallest (innermost) first"""
+        hits = [
+            (area, zone)
+            for zone, polygon, (min_x, min_y, max_x, max_y), area in self.cells.get(self._key(x, y), ())
+            if min_x <= x <= max_x and min_y <= y <= max_y and point_in_polygon(x, y, polygon)
+        ]
+        return [zone for _, zone in sorted(hits, key=lambda hit: hit[0])]
+
+
+class SpatialIndex:
+    """Nearest-location and point-in-zone lookups for one event map"""
+
+    def __init__(self, zones: Iterable[Zone], locations: Iterable[Location]):
+        zones = list(zones)
+        zones_by_id = {zone.id: zone for zone in zones}
+
+        self.locations: dict[UUID, LocationEntry] = {}
+        by_floor_type: dict[tuple[int, Optional[str]], list[LocationEntry]] = {}
+        for location in locations:
+            position = location_position(location, zones_by_id.get(location.zone_id))
+            if position is None:
+                continue
+            entry = LocationEntry(location.id, location.name, location.type, *position, location.zone_id)
+            self.locations[entry.id] = entry
+            # Every location is in its floor's grid of all types (None) and of its own type
+            by_floor_type.setdefault((entry.floor, None), []).append(entry)
+            if entry.type:
+                by_floor_type.setdefault((entry.floor, entry.type), []).append(entry)
+        self._points = {key: _PointGrid(entries) for key, entries in by_floor_type.items()}
+        self.types: list[str] = sorted({type_ for _, type_ in self._points if type_})
+
+        polygons: dict[int, list[tuple[Zone, list[Point]]]] = {}
+        for zone in zones:
+            polygon = parse_polygon(zone.coordinates)
+            if len(polygon) >= 3:
+                polygons.setdefault(zone.floor or 0, []).append((zone, polygon))
+        self._zones = {floor: _ZoneGrid(entries) for floor, entries in polygons.items()}
+
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        floor: int = 0,
+        type: Optional[str] = None,
+        k: int = 5,
+        exclude: Optional[UUID] = None
+    ) -> list[tuple[float, LocationEntry]]:
+        """
+        Get up to k locations (of a type) closest to the point.
+
+        Locations on other floors rank FLOOR_DISTANCE farther per floor.
+
+        Returns:
+            List of (ranking distance, location entry), closest first
+        """
+        floors = sorted(
+            (grid_floor for grid_floor, grid_type in self._points if grid_type == type),
+            key=lambda grid_floor: abs(grid_floor - floor)
+        )
+        hits: list[tuple[float, LocationEntry]] = []
+        for grid_floor in floors:
+            penalty = FLOOR_DISTANCE * abs(grid_floor - floor)
+            # Farther floors can't beat the k found so far
+            if len(hits) >= k and penalty >= hits[k - 1][0]:
+                break
+            found = self._points[(grid_floor, type)].nearest(x, y, k, exclude)
+            hits = sorted(hits + [(distance + penalty, entry) for distance, entry in found], key=lambda hit: hit[0])[:k]
+        return hits
+
+    def nearest_to_location(
+        self,
+        location_id: UUID,
+        type: Optional[str] = None,
+        k: int = 5
+    ) -> Optional[list[tuple[float, LocationEntry]]]:
+        """Get locations closest to another one (None if it isn't on the map)"""
+        origin = self.locations.get(location_id)
+        if origin is None:
+            return None
+        return self.nearest(origin.x, origin.y, origin.floor, type, k, exclude=origin.id)
+
+    def of_type(self, type: str) -> list[LocationEntry]:
+        """Get all locations of a type, lower floors first"""
+        entries = [entry for entry in self.locations.values() if entry.type == type]
+        return sorted(entries, key=lambda entry: (entry.floor, entry.name))
+
+    def zones_at(self, x: float, y: float, floor: int = 0) -> list[Zone]:
+        """Get zones containing the point, innermost first"""
+        grid = self._zones.get(floor)
+        return grid.zones_at(x, y) if grid else []
@@ -0,0 +1,137 @@
+"""
+Process-local caches for derived per-event structures
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+# Session.info key with (cache, key) pairs to drop once the transaction ends
+PENDING_INVALIDATIONS_KEY = "pending_cache_invalidations"
+
+
+class _Build:
+    """Build of a key in flight, with its waiting callers and the invalidations seen meanwhile"""
+    __slots__ = ("lock", "users", "generation")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+        self.generation = 0
+
+
+class LocalCache(Generic[T]):
+    """
+    In-memory cache with TTL, LRU size bound and coalesced rebuilds.
+
+    Concurrent misses for the same key wait for a single build. A value
+    invalidated while it was being built is returned to the caller but not
+    stored. The TTL bounds staleness for writes made by other processes.
+    Expired entries are swept about once per TTL and beyond max_size the
+    least recently used ones are dropped, so keys coming from clients
+    can't grow the cache without limit.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+        self._builds: dict[Hashable, _Build] = {}
+        self._next_sweep = time.monotonic() + ttl_seconds
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Get cached value if present and not expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: T) -> None:
+        """Store value for key"""
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _sweep(self, now: float) -> None:
+        """Drop all expired entries"""
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at < now]:
+            del self._entries[key]
+        self._next_sweep = now + self.ttl_seconds
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop cached value and discard builds already in flight"""
+        self._entries.pop(key, None)
+        build = self._builds.get(key)
+        if build is not None:
+            build.generation += 1
+
+    def clear(self) -> None:
+        """Drop all cached values"""
+        self._entries.clear()
+        for build in self._builds.values():
+            build.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_build(self, key: Hashable, builder: Callable[[], Awaitable[T]]) -> T:
+        """Get cached value or build it once for all concurrent callers"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        build = self._builds.get(key)
+        if build is None:
+            build = self._builds[key] = _Build()
+        build.users += 1
+        try:
+            async with build.lock:
+                value = self.get(key)
+                if value is not None:
+                    return value
+
+                generation = build.generation
+                value = await builder()
+                if build.generation == generation:
+                    self.set(key, value)
+                return value
+        finally:
+            # The last caller forgets the build, so keys don't pile up
+            build.users -= 1
+            if build.users == 0 and self._builds.get(key) is build:
+                del self._builds[key]
+
+
+def invalidate_on_commit(db: AsyncSession, cache: LocalCache, key: Hashable) -> None:
+    """
+    Invalidate cache entry now and once more after the transaction ends.
+
+    The second pass drops values rebuilt from pre-commit data by other
+    requests while the transaction was still open.
+    """
+    cache.invalidate(key)
+    db.sync_session.info.setdefault(PENDING_INVALIDATIONS_KEY, set()).add((cache, key))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _apply_pending_invalidations(session: Session) -> None:
+    # On rollback too: a value rebuilt while the transaction was open may
+    # hold its uncommitted writes and must not stay cached for the whole TTL
+    for cache, key in session.info.pop(PENDING_INVALIDATIONS_KEY, ()):
+        cache.invalidate(key)
@@ -0,0 +1,31 @@
+"""
+Event times in text for people (bot messages, assistant context).
+
+Events have no timezone of their own: times are shown in
+settings.EVENT_TIMEZONE, where the events take place (the Mini App shows
+them in the viewer's local time).
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+
+
+@lru_cache()
+def event_timezone() -> ZoneInfo:
+    return ZoneInfo(settings.EVENT_TIMEZONE)
+
+
+def to_event_time(value: datetime) -> datetime:
+    """Convert an aware datetime to the event timezone"""
+    return value.astimezone(event_timezone())
+
+
+def format_time_range(start: datetime, end: Optional[datetime] = None) -> str:
+    """"19.10 14:00 - 15:30" in the event timezone"""
+    text = to_event_time(start).strftime("%d.%m %H:%M")
+    if end is not None:
+        text += f" - {to_event_time(end).strftime('%H:%M')}"
+    return text
@@ -0,0 +1,48 @@
+"""
+Fast JSON serialization (orjson) for API responses and cached payloads
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# UUID, date/datetime (aware and naive) and nested dicts from JSONB are
+# handled by orjson natively; UTC offsets are rendered as "Z" like pydantic does
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson doesn't know"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any, sort_keys: bool = False) -> bytes:
+    """Serialize content to compact UTF-8 JSON bytes"""
+    options = _OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _OPTIONS
+    return orjson.dumps(content, default=_default, option=options)
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON bytes or string"""
+    return orjson.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Returning it directly from an endpoint also skips FastAPI's
+    jsonable_encoder pass, so rows can be passed as plain dicts
+    with UUID/datetime values.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,115 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+The key row is inserted in the request transaction before the business
+logic runs and filled with the response right before commit, so:
+- a retry after success replays the stored response without re-running the logic;
+- a concurrent retry waits on the key row until the first request commits;
+- a failed request (rolled back) leaves no key, and a retry runs again.
+"""
+import hashlib
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import Depends, Header, HTTPException, Request, Response
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.models import IdempotencyKey
+from app.utils.fast_json import dumps
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Share of requests that also purge expired keys
+PURGE_PROBABILITY = 0.01
+
+
+class Idempotency:
+    """Idempotency-Key of the current request"""
+
+    def __init__(self, db: AsyncSession, key: Optional[str], request_hash: str):
+        self.db = db
+        self.key = key
+        self.request_hash = request_hash
+        self.scope: Optional[str] = None
+
+    async def replay(self, scope: Any) -> Optional[Response]:
+        """
+        Claim the key for this request or get the stored response.
+
+        Returns the stored response for a repeated request, None when the
+        request should be processed (no key or key claimed).
+        """
+        if not self.key:
+            return None
+        self.scope = str(scope)
+
+        now = datetime.now(timezone.utc)
+        if random.random() < PURGE_PROBABILITY:
+            await self.db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+
+        values = {
+            "scope": self.scope,
+            "key": self.key,
+            "request_hash": self.request_hash,
+            "status_code": None,
+            "response_body": None,
+            "created_at": now,
+            "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        }
+        stmt = insert(IdempotencyKey).values(**values)
+        # Expired keys are reused; a live one blocks here until its request commits
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+            set_={name: stmt.excluded[name] for name in values if name not in ("scope", "key")},
+            where=IdempotencyKey.expires_at < now,
+        ).returning(IdempotencyKey.key)
+        if (await self.db.execute(stmt)).scalar_one_or_none() is not None:
+            return None
+
+        query = select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response_body).where(
+            IdempotencyKey.scope == self.scope,
+            IdempotencyKey.key == self.key,
+        )
+        stored = (await self.db.execute(query)).one()
+        if stored.request_hash != self.request_hash:
+            raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_HEADER} was used for another request")
+        if stored.status_code is None:
+            raise HTTPException(status_code=409, detail="Request with this key is still being processed")
+
+        return Response(
+            content=stored.response_body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    async def save(self, content: Any, status_code: int = 200) -> Any:
+        """Store the response for the claimed key; content is returned as a ready response"""
+        if not self.key or self.scope is None:
+            return content
+
+        body = dumps(content)
+        await self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.scope == self.scope, IdempotencyKey.key == self.key)
+            .values(status_code=status_code, response_body=body)
+        )
+        return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+async def get_idempotency(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
+    db: AsyncSession = Depends(get_db),
+) -> Idempotency:
+    """Dependency: Idempotency-Key of the request (body is part of the request hash)"""
+    digest = hashlib.sha256(f"{request.method} {request.url.path}?{request.url.query}\n".encode())
+    if idempotency_key:
+        digest.update(await request.body())
+    return Idempotency(db, idempotency_key, digest.hexdigest())
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import AsyncIterator, Optional
 import json
 from pathlib import Path
 import httpx
@@ -6,6 +6,9 @@ from openai import AsyncOpenAI
 
 from app.config import settings
 
+UNAVAILABLE_MESSAGE = "Извините, ассистент временно недоступен. Пожалуйста, обратитесь к организаторам."
+ERROR_MESSAGE = "Произошла ошибка при обработке запроса. Попробуйте позже или обратитесь к организаторам."
+
 
 class LLMClient:
     """Client for interacting with LLM APIs"""
@@ -36,24 +39,12 @@ class LLMClient:
             Generated response string
         """
         if not self.client:
-            return "Извините, ассистент временно недоступен. Пожалуйста, обратитесь к организаторам."
+            return UNAVAILABLE_MESSAGE
         
         try:
-            messages = [
-                {"role": "system", "content": system_prompt},
-            ]
-            
-            if context:
-                messages.append({
-                    "role": "system",
-                    "content": f"Контекст события:\n{context}"
-                })
-            
-            messages.append({"role": "user", "content": user_message})
-            
             response = await self.client.chat.completions.create(
                 model=settings.OPENAI_MODEL,
-                messages=messages,
+                messages=self._build_messages(system_prompt, user_message, context),
                 max_tokens=max_tokens,
                 temperature=0.7,
             )
@@ -61,7 +52,48 @@ class LLMClient:
             return response.choices[0].message.content or "Не удалось получить ответ."
             
         except Exception as e:
-            return f"Произошла ошибка при обработке запроса. Попробуйте позже или обратитесь к организаторам."
+            return ERROR_MESSAGE
+    
+    async def stream_response(
+        self,
+        system_prompt: str,
+        user_message: str,
+        context: str = "",
+        max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """
+        Generate a response piece by piece as the LLM produces it.
+        
+        Unlike generate_response, errors are raised: the caller decides
+        what to show and must not cache a failed answer.
+        """
+        if not self.client:
+            raise RuntimeError("OPENAI_API_KEY is not set")
+        
+        stream = await self.client.chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            messages=self._build_messages(system_prompt, user_message, context),
+            max_tokens=max_tokens,
+            temperature=0.7,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _build_messages(self, system_prompt: str, user_message: str, context: str = "") -> list[dict]:
+        messages = [
+            {"role": "system", "content": system_prompt},
+        ]
+        
+        if context:
+            messages.append({
+                "role": "system",
+                "content": f"Контекст события:\n{context}"
+            })
+        
+        messages.append({"role": "user", "content": user_message})
+        return messages
     
     def build_system_prompt(self, event_name: str, knowledge_base: list[str]) -> str:
         """
@@ -0,0 +1,78 @@
+"""
+Token buckets for outgoing Telegram calls and incoming update throttling
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucket:
+    """
+    Token bucket: rate tokens per second, up to capacity stored.
+
+    acquire() waits for a token; pause() empties the bucket for a while
+    (e.g. for the retry_after of a 429 answer).
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available right now"""
+        self._refill(time.monotonic())
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Seconds until tokens are available"""
+        now = time.monotonic()
+        self._refill(now)
+        return max(0.0, self.updated_at - now) + max(0.0, (tokens - self.tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait for tokens and take them; waiters are served in order"""
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep(self.delay(tokens))
+
+    def pause(self, seconds: float) -> None:
+        """Give no tokens for the next seconds"""
+        resume_at = time.monotonic() + seconds
+        if resume_at > self.updated_at:
+            self.tokens = 0.0
+            self.updated_at = resume_at
+
+
+class KeyedTokenBuckets:
+    """Token bucket per key (chat, user), least recently used ones dropped beyond max_keys"""
+
+    def __init__(self, rate: float, capacity: float = 1.0, max_keys: int = 100_000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+
+    def get(self, key: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def __len__(self) -> int:
+        return len(self._buckets)
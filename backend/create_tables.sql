@@ -115,6 +115,7 @@ CREATE TABLE IF NOT EXISTS registrations (
     status VARCHAR(20) DEFAULT 'pending',
     registered_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
     approved_at TIMESTAMP WITH TIME ZONE,
+    waitlist_position BIGINT,
     UNIQUE (event_item_id, user_id)
 );
 
@@ -151,3 +152,107 @@ CREATE TABLE IF NOT EXISTS messages (
     read_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
 );
+
+-- Indexes for hot filter paths (see alembic revision 005_hot_path_indexes)
+CREATE INDEX IF NOT EXISTS ix_event_items_event_id_date_start ON event_items (event_id, date_start);
+CREATE INDEX IF NOT EXISTS ix_event_items_location_id ON event_items (location_id);
+CREATE INDEX IF NOT EXISTS ix_event_items_module_id ON event_items (module_id);
+CREATE INDEX IF NOT EXISTS ix_event_speakers_speaker_id ON event_speakers (speaker_id);
+CREATE INDEX IF NOT EXISTS ix_modules_event_id_order ON modules (event_id, "order");
+CREATE INDEX IF NOT EXISTS ix_assistant_knowledge_event_id ON assistant_knowledge (event_id);
+CREATE INDEX IF NOT EXISTS ix_registrations_user_id ON registrations (user_id);
+CREATE INDEX IF NOT EXISTS ix_speakers_event_id ON speakers (event_id);
+CREATE INDEX IF NOT EXISTS ix_locations_event_id ON locations (event_id);
+CREATE INDEX IF NOT EXISTS ix_locations_zone_id ON locations (zone_id);
+CREATE INDEX IF NOT EXISTS ix_zones_event_id ON zones (event_id);
+CREATE INDEX IF NOT EXISTS ix_news_event_id_published_at ON news (event_id, published_at DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS ix_messages_to_user_id_read_at ON messages (to_user_id, read_at);
+CREATE INDEX IF NOT EXISTS ix_messages_from_user_id ON messages (from_user_id);
+CREATE INDEX IF NOT EXISTS ix_messages_event_id ON messages (event_id);
+
+-- Trigram search (see alembic revision 006_trigram_search)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_event_items_title_trgm ON event_items USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_event_items_description_trgm ON event_items USING gin (description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_speakers_name_trgm ON speakers USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_speakers_company_trgm ON speakers USING gin (company gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_locations_name_trgm ON locations USING gin (name gin_trgm_ops);
+
+-- Registration waitlist (see alembic revision 007_registration_waitlist)
+CREATE SEQUENCE IF NOT EXISTS registrations_waitlist_position_seq;
+ALTER TABLE registrations ADD COLUMN IF NOT EXISTS waitlist_position BIGINT;
+CREATE INDEX IF NOT EXISTS ix_registrations_waitlist ON registrations (event_item_id, waitlist_position) WHERE status = 'waitlist';
+
+-- Stored responses for Idempotency-Key (see alembic revision 008_idempotency_keys)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope VARCHAR(64) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    response_body BYTEA,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+-- Seat counters apart from event_items (see alembic revision 009_event_item_seats)
+CREATE TABLE IF NOT EXISTS event_item_seats (
+    event_item_id UUID PRIMARY KEY REFERENCES event_items(id) ON DELETE CASCADE,
+    taken INTEGER NOT NULL DEFAULT 0,
+    reconciled_at TIMESTAMP WITH TIME ZONE
+);
+INSERT INTO event_item_seats (event_item_id, taken, reconciled_at)
+SELECT i.id, count(r.id) FILTER (WHERE r.status IN ('confirmed', 'pending')), now()
+FROM event_items i
+LEFT JOIN registrations r ON r.event_item_id = i.id
+GROUP BY i.id
+ON CONFLICT (event_item_id) DO NOTHING;
+ALTER TABLE event_items DROP COLUMN IF EXISTS registered_count;
+
+-- Location types for nearest-location queries (see alembic revision 010_location_type)
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS type VARCHAR(50);
+
+-- Bot broadcasts with resumable per-recipient progress (see alembic revision 011_broadcasts)
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    news_id UUID REFERENCES news(id) ON DELETE SET NULL,
+    text TEXT NOT NULL,
+    audience VARCHAR(20) NOT NULL,
+    audience_id UUID,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    total INTEGER NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    blocked INTEGER NOT NULL DEFAULT 0,
+    locked_until TIMESTAMP WITH TIME ZONE,
+    locked_by UUID,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS ix_broadcasts_event_id ON broadcasts (event_id);
+CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+    broadcast_id UUID NOT NULL REFERENCES broadcasts(id) ON DELETE CASCADE,
+    telegram_id BIGINT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error VARCHAR(255),
+    sent_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (broadcast_id, telegram_id)
+);
+CREATE INDEX IF NOT EXISTS ix_broadcast_deliveries_pending ON broadcast_deliveries (broadcast_id, telegram_id) WHERE status = 'pending';
+
+-- Session reminders (see alembic revision 012_event_item_reminders)
+CREATE TABLE IF NOT EXISTS event_item_reminders (
+    event_item_id UUID PRIMARY KEY REFERENCES event_items(id) ON DELETE CASCADE,
+    remind_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    sent_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS ix_event_item_reminders_pending ON event_item_reminders (remind_at) WHERE sent_at IS NULL;
+INSERT INTO event_item_reminders (event_item_id, remind_at)
+SELECT id, date_start - interval '30 minutes'
+FROM event_items
+WHERE date_start > now() AND status != 'cancelled'
+ON CONFLICT (event_item_id) DO NOTHING;
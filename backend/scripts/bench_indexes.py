@@ -0,0 +1,246 @@
+"""
+Benchmark: hot query plans and timings with and without secondary indexes.
+
+Seeds a large synthetic dataset (several events, one of them big), then
+runs the query shapes used by the services under EXPLAIN ANALYZE twice:
+inside a transaction with the model indexes dropped ("before", rolled
+back afterwards) and with the indexes in place ("after"). Seeded rows
+are removed at the end unless --keep is given.
+
+Run against a development database with migrations applied:
+    python -m scripts.bench_indexes [--database-url ...] [--items 5000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.config import settings
+from app.database import Base
+from app.models import (
+    Event, EventItem, KnowledgeChunk, Location, Message, Module, News,
+    Registration, Speaker, User, Zone,
+)
+
+BENCH_TITLE_PREFIX = "[bench]"
+BENCH_TELEGRAM_ID_BASE = 9_000_000_000
+BATCH_SIZE = 5000
+
+QUERIES = [
+    ("program", """
+        SELECT * FROM event_items WHERE event_id = :event_id ORDER BY date_start
+    """),
+    ("program by day", """
+        SELECT * FROM event_items
+        WHERE event_id = :event_id AND date_start >= :day_start AND date_start <= :day_end
+        ORDER BY date_start
+    """),
+    ("enabled modules", """
+        SELECT * FROM modules WHERE event_id = :event_id AND enabled = true ORDER BY "order"
+    """),
+    ("knowledge chunks", """
+        SELECT * FROM knowledge_chunks WHERE event_id = :event_id OR event_id IS NULL
+    """),
+    ("my registrations", """
+        SELECT * FROM registrations WHERE user_id = :user_id
+    """),
+    ("speakers", "SELECT * FROM speakers WHERE event_id = :event_id"),
+    ("locations", "SELECT * FROM locations WHERE event_id = :event_id"),
+    ("zones", "SELECT * FROM zones WHERE event_id = :event_id"),
+    ("news feed", """
+        SELECT * FROM news WHERE event_id = :event_id
+        ORDER BY published_at DESC NULLS LAST LIMIT 20
+    """),
+    ("unread messages", """
+        SELECT * FROM messages WHERE to_user_id = :user_id AND read_at IS NULL
+    """),
+]
+
+
+async def insert_batches(conn: AsyncConnection, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        await conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+async def seed(conn: AsyncConnection, args) -> dict:
+    """Insert synthetic data; returns parameters for the benchmark queries"""
+    rnd = random.Random(42)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    events = [
+        {
+            "id": uuid.uuid4(),
+            "title": f"{BENCH_TITLE_PREFIX} Event {n}",
+            "date_start": now,
+            "date_end": now + timedelta(days=3),
+            "status": "upcoming",
+        }
+        for n in range(args.events)
+    ]
+    await insert_batches(conn, Event, events)
+    target = events[0]["id"]
+
+    users = [
+        {"id": uuid.uuid4(), "telegram_id": BENCH_TELEGRAM_ID_BASE + n, "role": "user"}
+        for n in range(args.users)
+    ]
+    await insert_batches(conn, User, users)
+
+    zones, locations, speakers, modules, news, chunks, items = [], [], [], [], [], [], []
+    for event in events:
+        # The first event is the big one, others are background noise
+        scale = 1 if event["id"] == target else args.noise_scale
+        event_zones = [{"id": uuid.uuid4(), "event_id": event["id"], "name": f"Zone {n}", "floor": n % 5}
+                       for n in range(max(1, 20 // scale))]
+        zones += event_zones
+        event_locations = [
+            {"id": uuid.uuid4(), "event_id": event["id"], "name": f"Room {n}", "floor": n % 5,
+             "zone_id": rnd.choice(event_zones)["id"], "coordinates": {"x": n, "y": n}}
+            for n in range(max(1, 200 // scale))
+        ]
+        locations += event_locations
+        speakers += [{"id": uuid.uuid4(), "event_id": event["id"], "name": f"Speaker {n}"}
+                     for n in range(max(1, 500 // scale))]
+        modules += [{"id": uuid.uuid4(), "event_id": event["id"], "type": "program", "title": f"M{n}",
+                     "enabled": n % 3 != 0, "order": n} for n in range(12)]
+        news += [{"id": uuid.uuid4(), "event_id": event["id"], "title": f"News {n}",
+                  "published_at": now - timedelta(hours=n) if n % 10 else None}
+                 for n in range(max(1, 1000 // scale))]
+        chunks += [{"id": uuid.uuid4(), "event_id": event["id"], "chunk_type": "program", "content": f"Chunk {n}"}
+                   for n in range(max(1, 3000 // scale))]
+        for n in range(max(1, args.items // scale)):
+            start = now + timedelta(minutes=15 * rnd.randrange(3 * 24 * 4))
+            items.append({
+                "id": uuid.uuid4(), "event_id": event["id"], "title": f"Session {n}",
+                "date_start": start, "date_end": start + timedelta(minutes=90),
+                "location_id": rnd.choice(event_locations)["id"],
+                "capacity": 100, "type": "lecture", "status": "active",
+            })
+
+    await insert_batches(conn, Zone, zones)
+    await insert_batches(conn, Location, locations)
+    await insert_batches(conn, Speaker, speakers)
+    await insert_batches(conn, Module, modules)
+    await insert_batches(conn, News, news)
+    await insert_batches(conn, KnowledgeChunk, chunks)
+    await insert_batches(conn, EventItem, items)
+
+    registrations = []
+    for user in users:
+        for item in rnd.sample(items, args.registrations_per_user):
+            registrations.append({"id": uuid.uuid4(), "event_item_id": item["id"],
+                                  "user_id": user["id"], "status": "confirmed"})
+    await insert_batches(conn, Registration, registrations)
+
+    messages = [
+        {"id": uuid.uuid4(), "event_id": target, "from_user_id": rnd.choice(users)["id"],
+         "to_user_id": rnd.choice(users)["id"], "content": "Hi",
+         "read_at": now if rnd.random() < 0.8 else None}
+        for _ in range(args.messages)
+    ]
+    await insert_batches(conn, Message, messages)
+
+    for table in ("events", "users", "zones", "locations", "speakers", "modules", "news",
+                  "knowledge_chunks", "event_items", "registrations", "messages"):
+        await conn.execute(text(f"ANALYZE {table}"))
+
+    print(f"Seeded {len(events)} events, {len(items)} items, {len(users)} users, "
+          f"{len(registrations)} registrations, {len(messages)} messages")
+    return {
+        "event_id": target,
+        "user_id": users[0]["id"],
+        "day_start": now + timedelta(days=1),
+        "day_end": now + timedelta(days=2),
+    }
+
+
+def _plan_summary(plan: dict) -> str:
+    """Node types and indexes of a JSON plan, top-down"""
+    parts = []
+    stack = [plan]
+    while stack:
+        node = stack.pop(0)
+        label = node["Node Type"]
+        if node.get("Index Name"):
+            label += f" [{node['Index Name']}]"
+        parts.append(label)
+        stack.extend(node.get("Plans", []))
+    return " > ".join(parts)
+
+
+async def measure(conn: AsyncConnection, params: dict, repeats: int) -> dict:
+    results = {}
+    for label, sql in QUERIES:
+        used = {key: value for key, value in params.items() if f":{key}" in sql}
+        explain = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), used)
+        raw = explain.scalar_one()
+        # asyncpg returns json columns as text
+        plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            await conn.execute(text(sql), used)
+        wall_ms = (time.perf_counter() - started) * 1000 / repeats
+
+        results[label] = (_plan_summary(plan["Plan"]), plan["Execution Time"], wall_ms)
+    return results
+
+
+async def cleanup(conn: AsyncConnection) -> None:
+    await conn.execute(delete(Event).where(Event.title.startswith(BENCH_TITLE_PREFIX)))
+    await conn.execute(delete(User).where(User.telegram_id >= BENCH_TELEGRAM_ID_BASE))
+
+
+async def run(args) -> None:
+    engine = create_async_engine(args.database_url)
+    index_names = [index.name for table in Base.metadata.sorted_tables for index in table.indexes]
+
+    try:
+        async with engine.begin() as conn:
+            params = await seed(conn, args)
+
+        async with engine.connect() as conn:
+            # "Before": indexes dropped inside a transaction that is rolled back
+            transaction = await conn.begin()
+            for name in index_names:
+                await conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+            before = await measure(conn, params, args.repeats)
+            await transaction.rollback()
+
+            after = await measure(conn, params, args.repeats)
+
+        for label, _ in QUERIES:
+            plan_before, exec_before, wall_before = before[label]
+            plan_after, exec_after, wall_after = after[label]
+            print(f"\n== {label}")
+            print(f"   before: {exec_before:8.3f} ms exec, {wall_before:8.3f} ms wall  {plan_before}")
+            print(f"   after:  {exec_after:8.3f} ms exec, {wall_after:8.3f} ms wall  {plan_after}")
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await cleanup(conn)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--events", type=int, default=30)
+    parser.add_argument("--items", type=int, default=5000, help="items in the big event")
+    parser.add_argument("--noise-scale", type=int, default=5, help="other events are this many times smaller")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--registrations-per-user", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep seeded rows")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
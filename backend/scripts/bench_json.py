@@ -0,0 +1,113 @@
+"""
+Benchmark: serialization time of a 500-item program.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib json in
+JSONResponse), FastJSONResponse (orjson) and the program snapshot body,
+cached and re-rendered after a seat count change. No database needed.
+
+Usage (from backend/):
+    python -m scripts.bench_json [--items 500] [--rounds 200]
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models import EventItem, EventSpeaker, Location, Speaker
+from app.services.event_item_service import serialize_event_item
+from app.services.program_snapshot import ProgramSnapshot, SeatCounts
+from app.utils.fast_json import FastJSONResponse
+
+
+def build_items(count: int) -> list[EventItem]:
+    """Build transient program items with locations, speakers and JSONB data"""
+    now = datetime.now(timezone.utc)
+    event_id = uuid.uuid4()
+    locations = [Location(id=uuid.uuid4(), name=f"Аудитория {n}") for n in range(20)]
+    speakers = [
+        Speaker(id=uuid.uuid4(), name=f"Спикер {n}", position="Профессор", company="РАНХиГС")
+        for n in range(60)
+    ]
+
+    items = []
+    for n in range(count):
+        start = now + timedelta(minutes=30 * n)
+        location = locations[n % len(locations)]
+        item = EventItem(
+            id=uuid.uuid4(),
+            event_id=event_id,
+            module_id=None,
+            title=f"Сессия {n}: управление и цифровая трансформация",
+            description="Описание сессии " * 10,
+            date_start=start,
+            date_end=start + timedelta(minutes=90),
+            location_id=location.id,
+            capacity=100,
+            registered_count=n % 100,
+            type=("lecture", "workshop", "panel")[n % 3],
+            status="active",
+            extra_data={"tags": ["gov", "it"], "level": n % 5, "stream": {"url": None}},
+            created_at=now,
+            updated_at=now,
+        )
+        item.location = location
+        item.speakers = [EventSpeaker(speaker=speakers[(n + k) % len(speakers)]) for k in range(2)]
+        items.append(item)
+    return items
+
+
+def timeit(label: str, func, rounds: int) -> float:
+    func()  # warm-up
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed_ms = (time.perf_counter() - started) * 1000 / rounds
+    print(f"{label:<48} {elapsed_ms:8.3f} ms")
+    return elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    items = build_items(args.items)
+    # Python-mode dicts: UUID/datetime objects, as endpoints build them
+    cards = [serialize_event_item(item) for item in items]
+    for card, item in zip(cards, items):
+        card.update(id=item.id, event_id=item.event_id, date_start=item.date_start,
+                    date_end=item.date_end, created_at=item.created_at, updated_at=item.updated_at)
+    snapshot = ProgramSnapshot(items[0].event_id, items)
+    seats = SeatCounts({item.id: item.registered_count for item in items})
+
+    print(f"Program of {args.items} items, {args.rounds} rounds, time per response:")
+    baseline = timeit(
+        "jsonable_encoder + JSONResponse (stdlib json)",
+        lambda: JSONResponse(jsonable_encoder(cards)).body,
+        args.rounds,
+    )
+    fast = timeit(
+        "FastJSONResponse (orjson)",
+        lambda: FastJSONResponse(cards).body,
+        args.rounds,
+    )
+    timeit(
+        "ProgramSnapshot.to_json() (cached bytes)",
+        lambda: snapshot.to_json(seats),
+        args.rounds,
+    )
+    timeit(
+        "ProgramSnapshot.to_json() (new seat counts)",
+        lambda: snapshot.to_json(SeatCounts(seats.taken)),
+        args.rounds,
+    )
+    print(f"orjson speed-up: x{baseline / fast:.1f}; snapshot body is returned without serialization")
+    print(f"payload size: {len(snapshot.to_json(seats)) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Fake Telegram Bot API server for load tests.
+
+Answers every method of any bot token like the real Bot API would for a
+successful call (sendMessage and friends return a message) after an
+optional delay, and counts calls per method. Point the API (or bot) at
+it with TELEGRAM_API_URL=http://127.0.0.1:<port>.
+
+Like Telegram, it can enforce a flood limit: messages beyond the limit
+per second (per bot, and one per second per chat) are answered with 429
+and retry_after. Chats with ids divisible by --blocked-every answer 403
+as if they blocked the bot.
+
+Run standalone:
+    python -m scripts.fake_bot_api [--port 8081] [--delay-ms 20] [--flood-limit 30] [--blocked-every 50]
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from typing import Optional
+from collections import Counter, defaultdict
+
+from aiohttp import web
+
+MESSAGE_METHODS = {"sendmessage", "editmessagetext", "sendphoto", "senddocument", "forwardmessage", "copymessage"}
+
+
+class FakeBotAPI:
+    """aiohttp application imitating the Bot API"""
+
+    def __init__(self, delay: float = 0.0, flood_limit: int = 0, blocked_every: int = 0):
+        self.delay = delay
+        self.flood_limit = flood_limit
+        self.blocked_every = blocked_every
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        # Accepted messages per chat and send times for the flood limit
+        self.delivered: Counter = Counter()
+        self._second = 0
+        self._sent_this_second = 0
+        self._chat_sent_at: dict[int, float] = defaultdict(float)
+        self._message_ids = itertools.count(1)
+        self.app = web.Application()
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+        self.app.router.add_get("/bot{token}/{method}", self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        params = dict(await request.post()) if request.can_read_body else {}
+        self.calls[method] += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if method == "sendmessage":
+            error = self.check_send(int(params.get("chat_id", 0) or 0))
+            if error:
+                self.errors[error["error_code"]] += 1
+                return web.json_response({"ok": False, **error}, status=error["error_code"])
+        return web.json_response({"ok": True, "result": self.result(method, params)})
+
+    def check_send(self, chat_id: int) -> Optional[dict]:
+        """Error answer for a message breaking the limits, None if it's delivered"""
+        if self.blocked_every and chat_id % self.blocked_every == 0:
+            return {"error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+        if self.flood_limit:
+            now = time.monotonic()
+            if int(now) != self._second:
+                self._second, self._sent_this_second = int(now), 0
+            if self._sent_this_second >= self.flood_limit or now - self._chat_sent_at[chat_id] < 1:
+                return {
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                }
+            self._sent_this_second += 1
+            self._chat_sent_at[chat_id] = now
+        self.delivered[chat_id] += 1
+        return None
+
+    def result(self, method: str, params: dict):
+        if method == "getme":
+            return {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+        if method in MESSAGE_METHODS:
+            chat_id = int(params.get("chat_id", 0) or 0)
+            return {
+                "message_id": int(params.get("message_id") or next(self._message_ids)),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", ""),
+            }
+        return True
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> web.AppRunner:
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+async def main(args) -> None:
+    api = FakeBotAPI(delay=args.delay_ms / 1000, flood_limit=args.flood_limit, blocked_every=args.blocked_every)
+    runner = await api.start(args.host, args.port)
+    print(f"Fake Bot API on http://{args.host}:{args.port} (TELEGRAM_API_URL), Ctrl+C to stop")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            if api.calls:
+                print(f"calls {dict(api.calls)}, errors {dict(api.errors)}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay-ms", type=float, default=20, help="Latency of every call")
+    parser.add_argument("--flood-limit", type=int, default=0, help="Messages per second before 429 (0: no limit)")
+    parser.add_argument("--blocked-every", type=int, default=0, help="Chats with ids divisible by this blocked the bot")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
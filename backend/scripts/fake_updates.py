@@ -0,0 +1,89 @@
+"""
+Throughput test of the bot webhook with generated updates.
+
+Posts fake Telegram updates (commands and free text from many chats) to
+the webhook endpoint as fast as the given concurrency allows, the way
+Telegram delivers them, and prints throughput, latency percentiles and
+response codes. 503 answers are the pipeline's backpressure.
+
+Handlers reply through the Bot API, so run the API against the fake one:
+    python -m scripts.fake_bot_api --port 8081
+    TELEGRAM_BOT_TOKEN=1:fake TELEGRAM_API_URL=http://127.0.0.1:8081 \\
+    TELEGRAM_WEBHOOK_URL=http://127.0.0.1:8000/api/telegram/webhook uvicorn app.main:app
+    TELEGRAM_BOT_TOKEN=1:fake python -m scripts.fake_updates [--updates 5000] [--concurrency 100] [--chats 500]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from app.bot.updates import webhook_secret
+
+TEXTS = ["/start", "/help", "/app", "Где проходит воркшоп?", "Во сколько начало?", "привет"]
+BASE_CHAT_ID = 9_200_000_000
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> dict:
+    """Private chat text message update"""
+    user = {"id": chat_id, "is_bot": False, "first_name": "Load", "username": f"load{chat_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "Load"},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+async def main(args) -> None:
+    headers = {"X-Telegram-Bot-Api-Secret-Token": args.secret or webhook_secret()}
+    updates = asyncio.Queue()
+    for update_id in range(1, args.updates + 1):
+        chat_id = BASE_CHAT_ID + random.randrange(args.chats)
+        updates.put_nowait(make_update(update_id, chat_id, random.choice(TEXTS)))
+
+    statuses: Counter = Counter()
+    latencies: list[float] = []
+
+    async def sender(client: httpx.AsyncClient) -> None:
+        while not updates.empty():
+            update = updates.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.post(args.url, json=update, headers=headers)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(sender(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"{args.updates} updates from {args.chats} chats in {elapsed:.2f}s: {args.updates / elapsed:.0f} updates/s")
+    print(
+        f"latency ms: mean {statistics.mean(latencies) * 1000:.1f}, p50 {percentile(0.5):.1f}, "
+        f"p95 {percentile(0.95):.1f}, p99 {percentile(0.99):.1f}"
+    )
+    print(f"responses: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/telegram/webhook")
+    parser.add_argument("--secret", default=None, help="Webhook secret (derived from settings if omitted)")
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--chats", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
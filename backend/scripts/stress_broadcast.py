@@ -0,0 +1,194 @@
+"""
+Stress test: broadcast to registrants of an item through a fake Bot API.
+
+Seeds an event item with many registered users, creates a broadcast to
+them and sends it with the broadcaster against an in-process fake Bot
+API that enforces Telegram's flood limit (429 with retry_after) and has
+some users who blocked the bot. With --interrupt-after the first worker
+is stopped after that many batches and a second one resumes the
+broadcast from the stored progress once the lease expires. Checks that
+everyone was messaged, nobody more than once (beyond one batch), and
+that the stored counters match. Seeded rows are removed at the end
+unless --keep is given.
+
+Run against a development database with migrations applied:
+    python -m scripts.stress_broadcast [--database-url ...] [--users 2000] [--rate 25] [--interrupt-after 3]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from sqlalchemy import delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.models import Broadcast, Event, EventItem, EventItemSeats, Registration, User
+from app.schemas import BroadcastCreate
+from app.services.broadcast_service import BroadcastService
+from app.services.broadcaster import Broadcaster, BroadcastSender
+from scripts.fake_bot_api import FakeBotAPI
+
+BENCH_TITLE_PREFIX = "[stress-broadcast]"
+BENCH_TELEGRAM_ID_BASE = 9_300_000_000
+FAKE_API_PORT = 8089
+
+
+async def seed(session_maker: async_sessionmaker, args) -> uuid.UUID:
+    """Insert the event, the item, users and their registrations; returns item id"""
+    now = datetime.now(timezone.utc)
+    event_id, item_id = uuid.uuid4(), uuid.uuid4()
+    users = [
+        {"id": uuid.uuid4(), "telegram_id": BENCH_TELEGRAM_ID_BASE + n, "role": "user"}
+        for n in range(args.users)
+    ]
+    async with session_maker() as session, session.begin():
+        await session.execute(insert(Event), [{
+            "id": event_id, "title": f"{BENCH_TITLE_PREFIX} Event",
+            "date_start": now, "date_end": now + timedelta(days=1), "status": "upcoming",
+        }])
+        await session.execute(insert(EventItem), [{
+            "id": item_id, "event_id": event_id, "title": f"{BENCH_TITLE_PREFIX} Workshop",
+            "date_start": now + timedelta(hours=1), "type": "workshop", "status": "active",
+        }])
+        await session.execute(insert(EventItemSeats), [{"event_item_id": item_id, "taken": len(users)}])
+        await session.execute(insert(User), users)
+        await session.execute(insert(Registration), [
+            {"event_item_id": item_id, "user_id": user["id"], "status": "confirmed"} for user in users
+        ])
+    return item_id
+
+
+async def cleanup(session_maker: async_sessionmaker) -> None:
+    async with session_maker() as session, session.begin():
+        await session.execute(delete(Event).where(Event.title.startswith(BENCH_TITLE_PREFIX)))
+        await session.execute(delete(User).where(User.telegram_id >= BENCH_TELEGRAM_ID_BASE,
+                                                 User.telegram_id < BENCH_TELEGRAM_ID_BASE + 1_000_000))
+
+
+async def send_batches(broadcaster: Broadcaster, broadcast_id: uuid.UUID, token: uuid.UUID, batches: int) -> None:
+    """Send a few batches and stop like a crashed worker (the lease stays taken)"""
+    original_save = broadcaster._save
+    saved = 0
+
+    async def save(*save_args):
+        nonlocal saved
+        await original_save(*save_args)
+        saved += 1
+        if saved >= batches:
+            raise asyncio.CancelledError
+
+    broadcaster._save = save
+    try:
+        await broadcaster.run(broadcast_id, token)
+    except asyncio.CancelledError:
+        pass
+
+
+async def run(args) -> bool:
+    engine = create_async_engine(args.database_url, pool_size=10, max_overflow=0)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    api = FakeBotAPI(delay=args.delay_ms / 1000, flood_limit=args.flood_limit, blocked_every=args.blocked_every)
+    runner = await api.start(port=FAKE_API_PORT)
+    bot = Bot(
+        token="1:fake",
+        session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{FAKE_API_PORT}")),
+    )
+
+    def make_broadcaster() -> Broadcaster:
+        broadcaster = Broadcaster(session_maker, batch_size=args.batch_size, lease=args.lease)
+        broadcaster.sender = BroadcastSender(bot, rate=args.rate)
+        return broadcaster
+
+    broadcast_id = None
+    try:
+        item_id = await seed(session_maker, args)
+        async with session_maker() as session, session.begin():
+            broadcast = await BroadcastService(session).create(
+                BroadcastCreate(text="<b>Расписание изменилось</b>", audience="event_item", event_item_id=item_id)
+            )
+        broadcast_id = broadcast.id
+
+        started = time.perf_counter()
+        first = make_broadcaster()
+        claimed = await first._claim()
+        if claimed is None or claimed[0] != broadcast_id:
+            print("FAIL: broadcast was not claimed (another broadcast in progress?)")
+            return False
+        if args.interrupt_after:
+            await send_batches(first, *claimed, args.interrupt_after)
+            print(f"worker stopped after {args.interrupt_after} batches, waiting {args.lease}s for the lease")
+            await asyncio.sleep(args.lease + 1)
+            second = make_broadcaster()
+            resumed = await second._claim()
+            if resumed is None or resumed[0] != broadcast_id:
+                print("FAIL: broadcast was not resumed")
+                return False
+            await second.run(*resumed)
+            # The first worker's lease was taken over: it must not send anything more
+            await first.run(*claimed)
+        else:
+            await first.run(*claimed)
+        elapsed = time.perf_counter() - started
+
+        async with session_maker() as session:
+            broadcast = await session.get(Broadcast, broadcast_id)
+            deliveries = await BroadcastService(session).delivery_stats(broadcast_id)
+
+        blocked = sum(
+            1 for n in range(args.users)
+            if args.blocked_every and (BENCH_TELEGRAM_ID_BASE + n) % args.blocked_every == 0
+        )
+        duplicates = sum(count - 1 for count in api.delivered.values() if count > 1)
+        sent_rate = broadcast.sent / (elapsed - (args.lease + 1 if args.interrupt_after else 0))
+        print(f"{broadcast.total} recipients in {elapsed:.1f} s, ~{sent_rate:.1f} messages/s (limit {args.flood_limit})")
+        print(f"status {broadcast.status}: sent {broadcast.sent}, blocked {broadcast.blocked}, failed {broadcast.failed}")
+        print(f"deliveries {deliveries}, fake API errors {dict(api.errors)}, duplicates {duplicates}")
+
+        ok = (
+            broadcast.status == "done"
+            and broadcast.total == args.users
+            and broadcast.blocked == blocked
+            and broadcast.sent == len(api.delivered) == args.users - blocked
+            and broadcast.failed == 0
+            and duplicates <= (args.batch_size if args.interrupt_after else 0)
+        )
+        print("OK: everyone messaged once" if ok else "FAIL: deliveries don't match")
+        return ok
+    finally:
+        # A failed run must not leave a leased broadcast blocking others
+        if broadcast_id:
+            async with session_maker() as session, session.begin():
+                await session.execute(
+                    update(Broadcast)
+                    .where(Broadcast.id == broadcast_id, Broadcast.status == "running")
+                    .values(status="cancelled")
+                )
+        if not args.keep:
+            await cleanup(session_maker)
+        await bot.session.close()
+        await runner.cleanup()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=settings.BROADCAST_RATE_PER_SECOND)
+    parser.add_argument("--flood-limit", type=int, default=30, help="fake API messages per second before 429")
+    parser.add_argument("--blocked-every", type=int, default=50)
+    parser.add_argument("--delay-ms", type=float, default=30, help="fake API latency")
+    parser.add_argument("--batch-size", type=int, default=settings.BROADCAST_BATCH_SIZE)
+    parser.add_argument("--lease", type=int, default=5, help="lease seconds")
+    parser.add_argument("--interrupt-after", type=int, default=0, help="stop the first worker after N batches")
+    parser.add_argument("--keep", action="store_true", help="keep seeded rows")
+    raise SystemExit(0 if asyncio.run(run(parser.parse_args())) else 1)
+
+
+if __name__ == "__main__":
+    main()
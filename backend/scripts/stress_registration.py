@@ -0,0 +1,170 @@
+"""
+Stress test: concurrent registrations for one limited-capacity item.
+
+Seeds an event with a single item of the given capacity and a crowd of
+users, then fires one registration per user at the same moment, each in
+its own session and transaction (like separate API requests). Checks
+that no more seats than the capacity were given out and that the seat
+counter matches the stored registrations, and prints throughput. With --queue the same crowd goes through the admission
+queue (batched registration) instead. Seeded rows are removed at the end
+unless --keep is given.
+
+Run against a development database with migrations applied:
+    python -m scripts.stress_registration [--database-url ...] [--users 500] [--capacity 50] [--queue]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.models import Event, EventItem, EventItemSeats, Registration, User
+from app.services import RegistrationService
+from app.services.admission_queue import AdmissionQueue
+from app.services.registration_service import SEAT_HOLDING_STATUSES
+
+BENCH_TITLE_PREFIX = "[stress]"
+BENCH_TELEGRAM_ID_BASE = 9_100_000_000
+
+
+async def seed(session_maker: async_sessionmaker, args) -> tuple[uuid.UUID, list[uuid.UUID]]:
+    """Insert the event, the item and users; returns item id and user ids"""
+    now = datetime.now(timezone.utc)
+    event_id, item_id = uuid.uuid4(), uuid.uuid4()
+    users = [
+        {"id": uuid.uuid4(), "telegram_id": BENCH_TELEGRAM_ID_BASE + n, "role": "user"}
+        for n in range(args.users)
+    ]
+
+    async with session_maker() as session, session.begin():
+        await session.execute(insert(Event), [{
+            "id": event_id, "title": f"{BENCH_TITLE_PREFIX} Event",
+            "date_start": now, "date_end": now + timedelta(days=1), "status": "upcoming",
+        }])
+        await session.execute(insert(EventItem), [{
+            "id": item_id, "event_id": event_id, "title": f"{BENCH_TITLE_PREFIX} Workshop",
+            "date_start": now + timedelta(hours=1), "capacity": args.capacity,
+            "type": "workshop", "status": "active",
+        }])
+        await session.execute(insert(EventItemSeats), [{"event_item_id": item_id, "taken": 0}])
+        await session.execute(insert(User), users)
+
+    return item_id, [user["id"] for user in users]
+
+
+async def register_one(session_maker: async_sessionmaker, start: asyncio.Event,
+                       user_id: uuid.UUID, item_id: uuid.UUID) -> tuple[str, float]:
+    """One request: own session, own transaction; returns outcome and latency"""
+    await start.wait()
+    started = time.perf_counter()
+    try:
+        async with session_maker() as session:
+            registration, message = await RegistrationService(session).register(user_id, item_id)
+            await session.commit()
+    except Exception as exc:  # the stress test reports errors instead of stopping
+        return f"error: {type(exc).__name__}", time.perf_counter() - started
+    return ("registered" if registration else message), time.perf_counter() - started
+
+
+async def enqueue_one(queue: AdmissionQueue, start: asyncio.Event,
+                      user_id: uuid.UUID, item_id: uuid.UUID) -> tuple[str, float]:
+    """One request through the admission queue; returns outcome and latency"""
+    await start.wait()
+    started = time.perf_counter()
+    ticket = queue.enqueue(item_id, user_id)
+    await queue.wait(ticket, timeout=60)
+    outcome = "registered" if ticket.success else (ticket.message or "timeout")
+    return outcome, time.perf_counter() - started
+
+
+async def verify(session: AsyncSession, item_id: uuid.UUID) -> tuple[int, int, int]:
+    """Get capacity, registered_count and stored active registrations"""
+    item = await session.get(EventItem, item_id)
+    stored = await session.scalar(
+        select(func.count()).select_from(Registration).where(
+            Registration.event_item_id == item_id,
+            Registration.status.in_(SEAT_HOLDING_STATUSES),
+        )
+    )
+    return item.capacity, item.registered_count, stored
+
+
+async def cleanup(session_maker: async_sessionmaker) -> None:
+    async with session_maker() as session, session.begin():
+        await session.execute(delete(Event).where(Event.title.startswith(BENCH_TITLE_PREFIX)))
+        await session.execute(delete(User).where(User.telegram_id >= BENCH_TELEGRAM_ID_BASE,
+                                                 User.telegram_id < BENCH_TELEGRAM_ID_BASE + 1_000_000))
+
+
+async def run(args) -> bool:
+    engine = create_async_engine(args.database_url, pool_size=args.pool_size, max_overflow=0)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    try:
+        item_id, user_ids = await seed(session_maker, args)
+
+        start = asyncio.Event()
+        if args.queue:
+            queue = AdmissionQueue(session_maker)
+            request = lambda user_id: enqueue_one(queue, start, user_id, item_id)
+        else:
+            request = lambda user_id: register_one(session_maker, start, user_id, item_id)
+        # Also hit the same users twice to exercise the duplicate path
+        requested = user_ids + user_ids[:args.duplicates]
+        tasks = [asyncio.create_task(request(user_id)) for user_id in requested]
+        await asyncio.sleep(0)
+
+        started = time.perf_counter()
+        start.set()
+        results = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+        outcomes: dict[str, int] = {}
+        for outcome, _ in results:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        latencies = sorted(latency for _, latency in results)
+
+        async with session_maker() as session:
+            capacity, registered_count, stored = await verify(session, item_id)
+
+        print(f"{len(results)} requests in {elapsed:.3f} s: {len(results) / elapsed:.1f} req/s")
+        print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+        for outcome, count in sorted(outcomes.items(), key=lambda entry: -entry[1]):
+            print(f"  {count:6d}  {outcome}")
+        print(f"capacity {capacity}, registered_count {registered_count}, stored registrations {stored}")
+
+        # Repeated taps may share one queue ticket, so count users rather than responses
+        registered_users = {
+            user_id for user_id, (outcome, _) in zip(requested, results) if outcome == "registered"
+        }
+        ok = (
+            len(registered_users) == min(capacity, len(user_ids))
+            and registered_count == stored == len(registered_users)
+        )
+        print("OK: no overbooking" if ok else "FAIL: counters don't match")
+        return ok
+    finally:
+        if not args.keep:
+            await cleanup(session_maker)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=50)
+    parser.add_argument("--duplicates", type=int, default=50, help="users that send a second request")
+    parser.add_argument("--pool-size", type=int, default=50)
+    parser.add_argument("--queue", action="store_true", help="register through the admission queue")
+    parser.add_argument("--keep", action="store_true", help="keep seeded rows")
+    raise SystemExit(0 if asyncio.run(run(parser.parse_args())) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,12 @@ import type {
   User,
   Registration,
   MapData,
+  MapBundle,
+  Route,
+  Location,
+  LocationDetail,
+  NearbyLocation,
+  ZoneAt,
   News,
   AssistantChatRequest,
   AssistantChatResponse,
@@ -178,15 +184,66 @@ class ApiClient {
     return this.request(`/registrations/${eventItemId}/check`)
   }
 
+  async checkRegistrations(eventItemIds: string[]): Promise<{
+    items: Record<string, { registered: boolean; status: string | null }>
+  }> {
+    return this.request('/registrations/check', {
+      method: 'POST',
+      body: JSON.stringify({ event_item_ids: eventItemIds }),
+    })
+  }
+
   // Map
   async getMapData(eventId: string): Promise<MapData> {
     return this.request(`/events/${eventId}/map`)
   }
 
+  async getMapBundle(eventId: string, floor?: number, version?: string): Promise<MapBundle> {
+    const params = new URLSearchParams()
+    if (floor !== undefined) params.set('floor', String(floor))
+    if (version) params.set('v', version)
+    return this.request(`/events/${eventId}/map/bundle?${params}`)
+  }
+
+  async getRoute(eventId: string, from: string, to: string, avoidStairs = false): Promise<Route> {
+    const params = new URLSearchParams({ from, to })
+    if (avoidStairs) params.set('avoid_stairs', 'true')
+    return this.request(`/events/${eventId}/route?${params}`)
+  }
+
+  async getNearestLocations(
+    eventId: string,
+    origin: { locationId: string } | { x: number; y: number; floor?: number },
+    type?: string,
+    k = 5
+  ): Promise<NearbyLocation[]> {
+    const params = new URLSearchParams({ k: String(k) })
+    if ('locationId' in origin) {
+      params.set('location_id', origin.locationId)
+    } else {
+      params.set('x', String(origin.x))
+      params.set('y', String(origin.y))
+      params.set('floor', String(origin.floor ?? 0))
+    }
+    if (type) params.set('type', type)
+    return this.request(`/events/${eventId}/map/nearest?${params}`)
+  }
+
+  async getZoneAt(eventId: string, x: number, y: number, floor = 0): Promise<ZoneAt> {
+    const params = new URLSearchParams({ x: String(x), y: String(y), floor: String(floor) })
+    return this.request(`/events/${eventId}/map/zone-at?${params}`)
+  }
+
   async getLocation(locationId: string): Promise<Location> {
     return this.request(`/locations/${locationId}`)
   }
 
+  async getLocations(eventId: string, ids?: string[], itemsLimit = 3): Promise<LocationDetail[]> {
+    const params = new URLSearchParams({ items_limit: String(itemsLimit) })
+    ids?.forEach((id) => params.append('ids', id))
+    return this.request(`/events/${eventId}/locations?${params}`)
+  }
+
   // News
   async getEventNews(eventId: string): Promise<News[]> {
     return this.request(`/news/events/${eventId}/news`)
@@ -108,10 +108,22 @@ export interface Location {
   zone_id: string | null
   zone_name: string | null
   coordinates: Record<string, unknown>
+  type: string | null
   created_at: string
   updated_at: string
 }
 
+export interface LocationDetail extends Location {
+  upcoming_items: Array<{
+    id: string
+    title: string
+    type: string | null
+    status: EventItem['status']
+    date_start: string | null
+    date_end: string | null
+  }>
+}
+
 export interface Zone {
   id: string
   event_id: string
@@ -128,6 +140,70 @@ export interface MapData {
   locations: Location[]
 }
 
+// Compact map: coordinates are integers, divide by scale
+export interface MapBundle {
+  event_id: string
+  version: string
+  floor: number | null
+  floors: number[]
+  scale: number
+  zones: Array<{
+    id: string
+    name: string
+    floor: number
+    polygon?: number[]
+    center?: number[]
+    path?: string
+    data?: Record<string, unknown>
+  }>
+  locations: Array<{
+    id: string
+    name: string
+    type: string | null
+    floor: number
+    zone_id: string | null
+    point?: number[]
+    path?: string
+  }>
+}
+
+export interface NearbyLocation {
+  id: string
+  name: string
+  type: string | null
+  floor: number
+  x: number
+  y: number
+  zone_id: string | null
+  distance: number | null
+}
+
+export interface ZoneAt {
+  floor: number
+  x: number
+  y: number
+  zones: Zone[]
+}
+
+export interface RouteStep {
+  id: string
+  kind: 'location' | 'zone' | 'door'
+  name: string
+  floor: number
+  x: number
+  y: number
+  mode: 'walk' | 'stairs' | 'elevator' | null
+}
+
+export interface Route {
+  from_id: string
+  to_id: string
+  distance: number
+  floors: number[]
+  precomputed: boolean
+  steps: RouteStep[]
+}
+
 // News types
 export interface News {
   id: string
@@ -154,6 +230,7 @@ export interface AssistantChatRequest {
   context?: {
     module_id?: string
     item_id?: string
+    location_id?: string
   }
 }
 